@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
+from urllib.parse import quote
 
 from decouple import Csv, config
 
@@ -38,6 +40,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "corsheaders",
     "django_extensions",
@@ -46,6 +49,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Đầu tiên để đo cả thời gian của các middleware khác (contacts/timing.py)
+    "contacts.timing.ServerTimingMiddleware",
+    # Chỉ hoạt động khi SLOW_QUERY_THRESHOLD_MS > 0 (contacts/slow_queries.py)
+    "contacts.slow_queries.SlowQuerySourceMiddleware",
+    "contacts.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -54,6 +62,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Cuối cùng để biết request.user; chỉ hoạt động khi PROFILING_ENABLED (contacts/profiling.py)
+    "contacts.profiling.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "contact_book_project.urls"
@@ -94,6 +104,63 @@ DATABASES = {
     }
 }
 
+# Cache (Redis trong docker-compose.yml)
+
+REDIS_PASSWORD = config("REDIS_PASSWORD", default="")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://{auth}{host}:{port}/{db}".format(
+            auth=f":{quote(REDIS_PASSWORD, safe='')}@" if REDIS_PASSWORD else "",
+            host=config("REDIS_HOST", default="localhost"),
+            port=config("REDIS_PORT", default=6379, cast=int),
+            db=config("REDIS_DB", default=0, cast=int),
+        ),
+        "KEY_PREFIX": "contact_book",
+    }
+}
+
+# Cache response GET của API (contacts/caching.py)
+API_CACHE_ENABLED = config("API_CACHE_ENABLED", default=True, cast=bool)
+
+# Danh sách (contacts, groups, members) serialize từ values_list() thay vì model instance
+# (contacts/compiled.py); False = luôn dùng serializer DRF
+COMPILED_SERIALIZERS = config("COMPILED_SERIALIZERS", default=True, cast=bool)
+
+# Tỉ lệ request được đo SQL/thời gian và trả header Server-Timing (0 = tắt, 1 = mọi request)
+SERVER_TIMING_SAMPLE_RATE = config("SERVER_TIMING_SAMPLE_RATE", default=0.01, cast=float)
+
+# Ghi query chậm hơn ngưỡng (ms) vào SLOW_QUERY_LOG_FILE (0 = tắt, contacts/slow_queries.py)
+SLOW_QUERY_THRESHOLD_MS = config("SLOW_QUERY_THRESHOLD_MS", default=0, cast=float)
+# Tỉ lệ query chậm (chỉ SELECT) được chạy lại với EXPLAIN (ANALYZE, BUFFERS)
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = config("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", default=0.1, cast=float)
+SLOW_QUERY_LOG_FILE = config(
+    "SLOW_QUERY_LOG_FILE", default=str(BASE_DIR / "logs" / "slow_queries.jsonl")
+)
+
+# Metrics Prometheus tại /metrics (contacts/metrics.py)
+METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+# Chỉ scrape từ các mạng trong METRICS_ALLOWED_NETWORKS (mặc định: localhost) hoặc với header
+# "Authorization: Bearer <METRICS_TOKEN>" (bearer_token trong cấu hình scrape của Prometheus)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+METRICS_ALLOWED_NETWORKS = config(
+    "METRICS_ALLOWED_NETWORKS", default="127.0.0.0/8,::1/128", cast=Csv()
+)
+# Nhiều worker: thư mục chung để gộp metrics của các process (rỗng = một process).
+# prometheus_client đọc biến môi trường lúc import nên phải đặt trước khi app được nạp
+PROMETHEUS_MULTIPROC_DIR = config("PROMETHEUS_MULTIPROC_DIR", default="")
+if PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", PROMETHEUS_MULTIPROC_DIR)
+
+# Profile một request theo yêu cầu (header X-Profile / ?_profile=, contacts/profiling.py):
+# chỉ staff hoặc request có header X-Profile-Token khớp PROFILING_TOKEN
+PROFILING_ENABLED = config("PROFILING_ENABLED", default=False, cast=bool)
+PROFILING_TOKEN = config("PROFILING_TOKEN", default="")
+PROFILING_DIR = config("PROFILING_DIR", default=str(BASE_DIR / "logs" / "profiles"))
+# Chu kỳ lấy mẫu stack (giây) của chế độ "stacks"
+PROFILING_SAMPLE_INTERVAL = config("PROFILING_SAMPLE_INTERVAL", default=0.005, cast=float)
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -151,14 +218,17 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # REST FRAMEWORK
 
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    # ?page=N như cũ, ?pagination=cursor để dùng keyset pagination
+    "DEFAULT_PAGINATION_CLASS": "contacts.pagination.ContactBookPagination",
     "PAGE_SIZE": 10,
+    # orjson nếu đã cài, không thì json stdlib (contacts/renderers.py);
+    # Browsable API chỉ bật khi DEBUG
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
-        "rest_framework.renderers.BrowsableAPIRenderer",
+        "contacts.renderers.FastJSONRenderer",
+        *(["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else []),
     ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "contacts.parsers.FastJSONParser",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
@@ -189,12 +259,26 @@ LOGGING = {
             "format": "{levelname} {asctime} {module} {message}",
             "style": "{",
         },
+        "message": {
+            "format": "{message}",
+            "style": "{",
+        },
     },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
             "formatter": "verbose",
         },
+        "slow_queries": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": SLOW_QUERY_LOG_FILE,
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            "encoding": "utf-8",
+            # Chỉ mở file khi có query chậm đầu tiên
+            "delay": True,
+            "formatter": "message",
+        },
     },
     "root": {
         "handlers": ["console"],
@@ -206,5 +290,10 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        "contacts.slow_queries": {
+            "handlers": ["slow_queries"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
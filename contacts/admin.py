@@ -1,5 +1,4 @@
 from django.contrib import admin
-from django.db.models import Count
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
@@ -17,6 +16,12 @@ class ContactGroupMembershipInline(admin.TabularInline):
     verbose_name = _("Thành viên")
     verbose_name_plural = _("Danh sách thành viên")
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # Membership cũ vẫn có thể trỏ tới contact đã soft delete
+        if db_field.name == "contact":
+            kwargs["queryset"] = Contact.all_objects.all()
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 
 @admin.register(ContactGroup)
 class ContactGroupAdmin(admin.ModelAdmin):
@@ -58,9 +63,9 @@ class ContactGroupAdmin(admin.ModelAdmin):
 
     actions = ["mark_as_family", "mark_as_work"]
 
-    @admin.display(description="Số thành viên", ordering="total_members")
+    @admin.display(description="Số thành viên", ordering="member_count")
     def member_count_display(self, obj):
-        count = getattr(obj, "total_members", 0)
+        count = obj.member_count
 
         if count > 0:
             return format_html(
@@ -70,10 +75,6 @@ class ContactGroupAdmin(admin.ModelAdmin):
             )
         return format_html('<span style="color: #999;">{}</span>', 0)
 
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.annotate(total_members=Count("contacts", distinct=True))
-
     @admin.display(description="Loại nhóm", ordering="group_type")
     def colored_group_type(self, obj):
         colors = {
@@ -101,11 +102,6 @@ class ContactGroupAdmin(admin.ModelAdmin):
         updated = queryset.update(group_type=ContactGroup.GroupType.WORK)
         self.message_user(request, f"Đã cập nhật {updated} nhóm thành Công việc.", level="success")
 
-    def get_queryset(self, request):
-        """Annotate with member count to avoid N+1 queries"""
-        qs = super().get_queryset(request)
-        return qs.annotate(total_members=Count("contacts"))
-
 
 @admin.register(Contact)
 class ContactAdmin(admin.ModelAdmin):
@@ -206,28 +202,32 @@ class ContactAdmin(admin.ModelAdmin):
 
     @admin.action(description="⭐ Đánh dấu yêu thích")
     def mark_as_favorite(self, request, queryset):
-        updated = queryset.update(is_favorite=True)
+        _, updated = queryset.favorite()
         self.message_user(request, f"Đã đánh dấu {updated} contacts là yêu thích.", level="success")
 
     @admin.action(description="✖️ Bỏ đánh dấu yêu thích")
     def unmark_favorite(self, request, queryset):
-        updated = queryset.update(is_favorite=False)
+        _, updated = queryset.unfavorite()
         self.message_user(
             request, f"Đã bỏ đánh dấu yêu thích cho {updated} contacts.", level="success"
         )
 
     @admin.action(description="🗑️ Xóa contacts (soft delete)")
     def soft_delete_contacts(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        _, updated = queryset.soft_delete()
         self.message_user(request, f"Đã xóa {updated} contacts (soft delete).", level="warning")
 
     @admin.action(description="♻️ Khôi phục contacts")
     def restore_contacts(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        _, updated = queryset.restore()
         self.message_user(request, f"Đã khôi phục {updated} contacts.", level="success")
 
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
+        # Admin quản lý cả contact đã soft delete (lọc bằng list_filter is_active)
+        qs = Contact.all_objects.all()
+        ordering = self.get_ordering(request)
+        if ordering:
+            qs = qs.order_by(*ordering)
         return qs.prefetch_related("groups").select_related()
 
 
@@ -271,6 +271,11 @@ class ContactGroupMembershipAdmin(admin.ModelAdmin):
 
     list_per_page = 30
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "contact":
+            kwargs["queryset"] = Contact.all_objects.all()
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
     def get_queryset(self, request):
         """Select related to avoid N+1"""
         qs = super().get_queryset(request)
@@ -8,3 +8,8 @@ class ContactsConfig(AppConfig):
 
     def ready(self):
         import contacts.signals
+        from contacts import lookups, metrics, slow_queries
+
+        lookups.install()
+        metrics.install()
+        slow_queries.install()
@@ -0,0 +1,133 @@
+"""
+View async (ASGI) cho các endpoint đọc nhiều nhất, dưới /api/async/...
+
+Cùng filter/search/ordering/phân trang/serializer với ViewSet sync (dựng queryset bằng
+chính ViewSet, không có query nào ở bước này), chỉ khác ở chỗ thực thi query bằng async
+ORM (aget, acount, async for) nên worker ASGI không bị chặn trong lúc chờ Postgres.
+Không qua response cache (@cache_response) của bản sync.
+"""
+
+from functools import wraps
+
+from django.db.models import aprefetch_related_objects
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from .compiled import compile_serializer
+from .fieldsets import selected_fields, trim_serializer
+from .models import ContactGroup
+from .pagination import ContactBookPagination, KeysetPagination
+from .renderers import FastJSONRenderer
+from .serializers import ContactGroupSerializer, ContactListSerializer
+from .views import (
+    ContactGroupViewSet,
+    ContactViewSet,
+    contact_list_queryset,
+    group_members_queryset,
+    member_serializer_class,
+)
+
+
+def _render(data, status=200, headers=None):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def async_api_view(view_func):
+    """
+    Bọc view async: chỉ nhận GET, truyền vào rest_framework Request (query_params...)
+    và trả lỗi APIException (404, cursor sai...) cùng định dạng JSON với bản sync.
+    """
+
+    @require_GET
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view_func(Request(request), *args, **kwargs)
+        except (APIException, Http404) as exc:
+            response = exception_handler(exc, {})
+            headers = {name: value for name, value in response.items() if name != "Content-Type"}
+            return _render(response.data, status=response.status_code, headers=headers)
+
+    return wrapper
+
+
+def _viewset(viewset_class, request, action, **kwargs):
+    return viewset_class(request=request, action=action, format_kwarg=None, args=(), kwargs=kwargs)
+
+
+async def _paginated(paginator, queryset, request, serializer_class, fieldset=None):
+    compiled = compile_serializer(serializer_class, fieldset)
+    if compiled is None:
+        page = await paginator.apaginate_queryset(queryset, request)
+        serializer = serializer_class(page, many=True)
+        data = (serializer if fieldset is None else trim_serializer(serializer, fieldset)).data
+    else:
+        page = await paginator.apaginate_queryset(compiled.fetch(queryset), request)
+        data = compiled.to_representation(page)
+    return _render(paginator.get_paginated_response(data).data)
+
+
+@async_api_view
+async def contact_list(request):
+    """GET /api/async/contacts/ (như /api/contacts/, không có ETag)"""
+    queryset = contact_list_queryset(request)
+    fieldset = selected_fields(request, ContactListSerializer)
+    return await _paginated(
+        ContactBookPagination(), queryset, request, ContactListSerializer, fieldset
+    )
+
+
+@async_api_view
+async def contact_detail(request, pk):
+    """GET /api/async/contacts/{id}/ (có ETag/Last-Modified, If-None-Match -> 304)"""
+    view = _viewset(ContactViewSet, request, "retrieve", pk=pk)
+    contact = await aget_object_or_404(view.filter_queryset(view.get_queryset()), pk=pk)
+
+    etag, last_modified = view.get_object_validators(contact)
+    not_modified = view.not_modified_response(request._request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    await aprefetch_related_objects([contact], *view.detail_prefetch_related)
+    data = view.get_serializer(contact).data
+    return view.set_validators(_render(data), etag, last_modified)
+
+
+@async_api_view
+async def contact_favorites(request):
+    """GET /api/async/contacts/favorites/"""
+    view = _viewset(ContactViewSet, request, "favorites")
+    favorites = [contact async for contact in view.get_queryset().filter(is_favorite=True)]
+    # Trong async context không được lazy-load quan hệ -> prefetch groups (1 query) trước
+    await aprefetch_related_objects(favorites, *view.detail_prefetch_related)
+    return _render(view.get_serializer(favorites, many=True).data)
+
+
+@async_api_view
+async def group_list(request):
+    """GET /api/async/groups/"""
+    view = _viewset(ContactGroupViewSet, request, "list")
+    queryset = view.filter_queryset(view.get_queryset())
+    return await _paginated(
+        ContactBookPagination(), queryset, request, ContactGroupSerializer, view.get_fieldset()
+    )
+
+
+@async_api_view
+async def group_members(request, pk):
+    """GET /api/async/groups/{id}/members/ (cursor như /api/groups/{id}/members/)"""
+    group = await aget_object_or_404(ContactGroup, pk=pk)
+
+    queryset = group_members_queryset(request, group)
+    serializer_class = member_serializer_class(request)
+    fieldset = selected_fields(request, serializer_class)
+    return await _paginated(KeysetPagination(), queryset, request, serializer_class, fieldset)
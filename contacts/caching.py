@@ -0,0 +1,184 @@
+import hashlib
+import logging
+import time
+from functools import partial, wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "api-cache:gen:{label}"
+RESPONSE_KEY = "api-cache:resp:{endpoint}:{digest}"
+STATS_KEY = "api-cache:stats:{endpoint}:{outcome}"
+
+STATS_OUTCOMES = ("hit", "miss", "bypass")
+# Header được lưu cùng nội dung để response từ cache vẫn hỗ trợ conditional request
+CACHED_HEADERS = ("ETag", "Last-Modified")
+BYPASS_DIRECTIVES = {"no-cache", "no-store"}
+
+# Các endpoint đã gắn @cache_response (để lệnh cache_stats liệt kê)
+CACHED_ENDPOINTS = []
+
+
+def _generation_key(model):
+    return GENERATION_KEY.format(label=model._meta.label_lower)
+
+
+def bump_generation(*models):
+    """
+    Tăng generation của model sau khi transaction commit. Response đã cache phụ thuộc
+    model đó mang generation cũ trong key nên tự hết hiệu lực, không cần xóa từng key.
+    Chờ commit để request khác không kịp cache lại dữ liệu cũ dưới generation mới.
+    """
+    transaction.on_commit(partial(_incr_generations, models))
+
+
+def _incr_generations(models):
+    for model in models:
+        key = _generation_key(model)
+        try:
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Key chưa có hoặc đã bị evict: khởi tạo bằng thời gian hiện tại
+                # để không trùng lại một generation cũ
+                cache.add(key, time.time_ns(), timeout=None)
+        except Exception:
+            logger.warning("Không tăng được cache generation %s", key, exc_info=True)
+
+
+def get_generations(models):
+    keys = [_generation_key(model) for model in models]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time.time_ns(), timeout=None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def _response_key(endpoint, request, depends_on):
+    # ?b=2&a=1 và ?a=1&b=2 dùng chung key; thứ tự giá trị trong cùng một param được giữ nguyên
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    generations = ",".join(str(value) for value in get_generations(depends_on))
+    raw = f"{request.path}?{query}|{generations}"
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return RESPONSE_KEY.format(endpoint=endpoint, digest=digest)
+
+
+def _wants_bypass(request):
+    directives = request.headers.get("Cache-Control", "").lower().replace(" ", "").split(",")
+    return bool(BYPASS_DIRECTIVES.intersection(directives))
+
+
+def _record(endpoint, outcome):
+    CACHE_REQUESTS.labels(endpoint, outcome).inc()
+    key = STATS_KEY.format(endpoint=endpoint, outcome=outcome)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, timeout=None):
+                cache.incr(key)
+    except Exception:
+        logger.debug("Không ghi được cache stats %s", key, exc_info=True)
+
+
+def _store(key, timeout, response):
+    try:
+        headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+        cache.set(key, (response.content, response["Content-Type"], headers), timeout)
+    except Exception:
+        logger.warning("Không ghi được response cache %s", key, exc_info=True)
+
+
+def get_stats():
+    """{endpoint: {"hit": n, "miss": n, "bypass": n}} cho các endpoint có cache."""
+    keys = {
+        (endpoint, outcome): STATS_KEY.format(endpoint=endpoint, outcome=outcome)
+        for endpoint in CACHED_ENDPOINTS
+        for outcome in STATS_OUTCOMES
+    }
+    values = cache.get_many(list(keys.values()))
+    stats = {endpoint: dict.fromkeys(STATS_OUTCOMES, 0) for endpoint in CACHED_ENDPOINTS}
+    for (endpoint, outcome), key in keys.items():
+        stats[endpoint][outcome] = values.get(key, 0)
+    return stats
+
+
+def reset_stats():
+    cache.delete_many(
+        [
+            STATS_KEY.format(endpoint=endpoint, outcome=outcome)
+            for endpoint in CACHED_ENDPOINTS
+            for outcome in STATS_OUTCOMES
+        ]
+    )
+
+
+def cache_response(timeout, depends_on):
+    """
+    Cache response GET của một action trong ViewSet (chỉ JSON, status 200).
+
+    Key gồm endpoint, path, query params đã chuẩn hóa và generation của các model
+    trong depends_on (xem bump_generation); depends_on là list model, hoặc hàm nhận view
+    trả về list model khi phụ thuộc vào request (ví dụ ?expand=). Header
+    "Cache-Control: no-cache" bỏ qua
+    cache và ghi lại kết quả mới. Response có header X-Cache: HIT | MISS | BYPASS.
+    Redis lỗi thì chạy view như bình thường.
+    """
+
+    def decorator(view_method):
+        endpoint = view_method.__qualname__
+        CACHED_ENDPOINTS.append(endpoint)
+
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if (
+                not settings.API_CACHE_ENABLED
+                or request.method != "GET"
+                or request.accepted_renderer.format != "json"
+            ):
+                return view_method(self, request, *args, **kwargs)
+
+            models = depends_on(self) if callable(depends_on) else depends_on
+            bypass = _wants_bypass(request)
+            try:
+                key = _response_key(endpoint, request, models)
+                cached = None if bypass else cache.get(key)
+            except Exception:
+                logger.warning("Response cache không khả dụng", exc_info=True)
+                return view_method(self, request, *args, **kwargs)
+
+            if cached is not None:
+                _record(endpoint, "hit")
+                content, content_type, headers = cached
+                response = HttpResponse(content, content_type=content_type, headers=headers)
+                last_modified = headers.get("Last-Modified")
+                response = get_conditional_response(
+                    request,
+                    etag=headers.get("ETag"),
+                    last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+                    response=response,
+                )
+                response["X-Cache"] = "HIT"
+                return response
+
+            _record(endpoint, "bypass" if bypass else "miss")
+            response = view_method(self, request, *args, **kwargs)
+            response["X-Cache"] = "BYPASS" if bypass else "MISS"
+            if response.status_code == 200:
+                response.add_post_render_callback(partial(_store, key, timeout))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,203 @@
+"""
+Serialize danh sách không qua model instance: đọc đúng các cột serializer khai báo bằng
+values_list() rồi đổi từng cột bằng converter tính sẵn một lần cho mỗi serializer class.
+
+Kết quả (list dict, đúng thứ tự field) giống hệt serializer(many=True).data nên JSON
+render ra giống byte. Chỉ serializer "phẳng" mới compile được: mọi field đọc thẳng một
+cột/annotation (không source lồng, không nested/related/SerializerMethodField) và không
+ghi đè to_representation; serializer khác đi đường DRF như cũ. Tắt bằng
+COMPILED_SERIALIZERS=False.
+"""
+
+from functools import cache
+from operator import itemgetter
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .fieldsets import SparseFieldsetMixin
+from .timing import current_timing
+
+# Giá trị từ database đã đúng kiểu output -> giữ nguyên
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.EmailField,
+    serializers.SlugField,
+    serializers.URLField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+)
+# to_representation chỉ đọc giá trị (không đọc instance/context) -> gọi bound method
+VALUE_FIELDS = (
+    serializers.ChoiceField,
+    serializers.DateField,
+    serializers.DateTimeField,
+    serializers.DecimalField,
+    serializers.DurationField,
+    serializers.FloatField,
+    serializers.JSONField,
+    serializers.TimeField,
+    serializers.UUIDField,
+)
+# Có từ DRF 3.17 (field mặc định của BigAutoField), chỉ đổi kiểu khi COERCE_BIGINT_TO_STRING
+BigIntegerField = getattr(serializers, "BigIntegerField", None)
+
+
+def _is_value_field(field):
+    if type(field) is BigIntegerField:
+        return getattr(field, "coerce_to_string", api_settings.COERCE_BIGINT_TO_STRING)
+    return type(field) in VALUE_FIELDS
+
+
+def _is_iso_datetime(field):
+    return (
+        type(field) is serializers.DateTimeField
+        and not hasattr(field, "timezone")
+        and getattr(field, "format", api_settings.DATETIME_FORMAT) == api_settings.DATETIME_FORMAT
+        and (api_settings.DATETIME_FORMAT or "").lower() == "iso-8601"
+    )
+
+
+def _iso_datetime(tz):
+    """DateTimeField.to_representation (ISO 8601) với timezone hiện tại đã lấy sẵn."""
+
+    def convert(value):
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+class CompiledSerializer:
+    """
+    Bản "biên dịch" của một serializer class:
+
+        compiled = compile_serializer(ContactListSerializer)
+        rows = compiled.fetch(queryset)          # values_list(named=True)
+        data = compiled.to_representation(rows)  # == ContactListSerializer(qs, many=True).data
+    """
+
+    def __init__(self, serializer_class, fields):
+        self.serializer_class = serializer_class
+        self.names = [field.field_name for field in fields]
+        self.columns = list(dict.fromkeys(field.source for field in fields))
+        index = {column: position for position, column in enumerate(self.columns)}
+        self._values = itemgetter(*(index[field.source] for field in fields))
+        self._datetimes = [field.field_name for field in fields if _is_iso_datetime(field)]
+        self._converters = [
+            (field.field_name, field.to_representation)
+            for field in fields
+            if _is_value_field(field) and not _is_iso_datetime(field)
+        ]
+
+    def fetch(self, queryset):
+        """
+        values_list(named=True) gồm các cột của serializer và cột sắp xếp của queryset
+        -> KeysetPagination vẫn đọc được giá trị cursor bằng getattr.
+        """
+        extra = ["pk"]
+        for field in [*queryset.query.order_by, *queryset.model._meta.ordering]:
+            if isinstance(field, str) and field != "?":
+                name = field.lstrip("-")
+                if "__" not in name:
+                    extra.append(name)
+        columns = list(dict.fromkeys([*self.columns, *extra]))
+        return queryset.values_list(*columns, named=True)
+
+    def to_representation(self, rows):
+        names, values = self.names, self._values
+        if len(names) == 1:
+            data = [{names[0]: values(row)} for row in rows]
+        else:
+            data = [dict(zip(names, values(row))) for row in rows]
+
+        converters = list(self._converters)
+        if self._datetimes:
+            if settings.USE_TZ:
+                convert = _iso_datetime(timezone.get_current_timezone())
+            else:
+                convert = serializers.DateTimeField().to_representation
+            converters += [(name, convert) for name in self._datetimes]
+        for name, convert in converters:
+            for item in data:
+                value = item[name]
+                if value is not None:
+                    item[name] = convert(value)
+        return data
+
+
+@cache
+def _compile(serializer_class, fieldset):
+    if serializer_class.to_representation is not serializers.Serializer.to_representation:
+        return None
+    if getattr(getattr(serializer_class, "Meta", None), "list_serializer_class", None):
+        return None
+    fields = []
+    for field in serializer_class().fields.values():
+        if field.write_only or (fieldset is not None and field.field_name not in fieldset):
+            continue
+        if type(field) not in (*IDENTITY_FIELDS, *VALUE_FIELDS, BigIntegerField):
+            return None
+        if len(field.source_attrs) != 1:
+            return None
+        fields.append(field)
+    return CompiledSerializer(serializer_class, fields) if fields else None
+
+
+def compile_serializer(serializer_class, fieldset=None):
+    """
+    CompiledSerializer cho serializer_class (chỉ các field trong fieldset nếu có, xem
+    contacts/fieldsets.py), hoặc None nếu không compile được/đã tắt.
+    """
+    if not settings.COMPILED_SERIALIZERS:
+        return None
+    return _compile(serializer_class, fieldset)
+
+
+class CompiledListMixin:
+    """
+    Mixin cho ViewSet: list() (và list_response() cho action khác) đọc trang bằng
+    CompiledSerializer khi serializer compile được, không thì như ListModelMixin.list.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.list_response(queryset, self.paginator)
+
+    def get_compiled_serializer(self, serializer_class):
+        """CompiledSerializer cho response của request này, None -> serializer DRF."""
+        fieldset = self.get_fieldset() if isinstance(self, SparseFieldsetMixin) else None
+        return compile_serializer(serializer_class, fieldset)
+
+    def list_response(self, queryset, paginator=None, serializer_class=None):
+        compiled = self.get_compiled_serializer(serializer_class or self.get_serializer_class())
+        if compiled is not None:
+            queryset = compiled.fetch(queryset)
+
+        page = None
+        if paginator is not None:
+            page = paginator.paginate_queryset(queryset, self.request, view=self)
+        rows = queryset if page is None else page
+
+        if compiled is None:
+            if serializer_class is None:
+                serializer = self.get_serializer(rows, many=True)
+            else:
+                serializer = serializer_class(
+                    rows, many=True, context=self.get_serializer_context()
+                )
+            data = serializer.data
+        else:
+            timing = current_timing()
+            if timing is None:
+                data = compiled.to_representation(rows)
+            else:
+                with timing.phase("serialize"):
+                    data = compiled.to_representation(rows)
+
+        if page is not None:
+            return paginator.get_paginated_response(data)
+        return Response(data)
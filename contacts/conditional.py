@@ -0,0 +1,160 @@
+import hashlib
+import logging
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.db import transaction
+from django.db.models import Count, Max, Subquery, prefetch_related_objects
+from django.db.models.functions import Now
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .caching import get_generations
+
+logger = logging.getLogger(__name__)
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "Dữ liệu đã bị thay đổi bởi request khác (If-Match không khớp), hãy tải lại"
+    default_code = "precondition_failed"
+
+
+def make_etag(*parts):
+    """Strong ETag từ các giá trị đại diện cho phiên bản dữ liệu."""
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value is not None else None
+
+
+class ConditionalRequestMixin:
+    """
+    Conditional request dựa trên updated_at cho ModelViewSet:
+
+    - retrieve trả ETag + Last-Modified, list chỉ trả ETag; If-None-Match /
+      If-Modified-Since khớp -> 304 ngay sau query fingerprint, không serialize
+    - PUT/PATCH/DELETE có If-Match: so ETag rồi compare-and-swap trên updated_at
+      (xem compare_and_swap), không cần SELECT ... FOR UPDATE
+    """
+
+    # Prefetch cho retrieve, chỉ chạy khi thực sự phải serialize (không chạy khi trả 304)
+    detail_prefetch_related = []
+
+    def get_object_validators(self, instance):
+        """(etag, last_modified) của một object; ghi đè nếu response gồm cả dữ liệu liên quan."""
+        return make_etag(instance.pk, instance.updated_at.isoformat()), instance.updated_at
+
+    def get_list_dependencies(self):
+        """
+        Model khác có dữ liệu nằm trong response list (ví dụ quan hệ ?expand=). ETag của
+        list gồm cả cache generation của các model này (xem contacts/caching.py).
+        """
+        return []
+
+    def get_list_validators(self, queryset):
+        """
+        Fingerprint rẻ của queryset đã lọc, cộng query params (trang, ordering, search...):
+        count của queryset + max(updated_at) trên mọi dòng của bảng (kể cả đã soft delete).
+        Sửa/soft delete/thêm dòng nào cũng làm tăng max đó, xóa dòng làm đổi count.
+
+        List không có Last-Modified (trả về None): max(updated_at) của riêng queryset đã lọc
+        không tăng khi một dòng rời khỏi danh sách, If-Modified-Since sẽ trả 304 sai.
+        Không đọc được generation của get_list_dependencies() -> (None, None), không ETag.
+        """
+        dependencies = self.get_list_dependencies()
+        try:
+            generations = get_generations(dependencies) if dependencies else []
+        except Exception:
+            logger.warning("Không đọc được cache generation cho ETag", exc_info=True)
+            return None, None
+
+        latest = queryset.model._base_manager.order_by("-updated_at").values("updated_at")[:1]
+        summary = queryset.order_by().aggregate(changed_at=Max(Subquery(latest)), total=Count("pk"))
+        changed_at = summary["changed_at"]
+        query = urlencode(sorted(self.request.query_params.lists()), doseq=True)
+        etag = make_etag(
+            self.request.path,
+            query,
+            changed_at.isoformat() if changed_at else None,
+            summary["total"],
+            *generations,
+        )
+        return etag, None
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_object_validators(instance)
+
+        not_modified = self.not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        if self.detail_prefetch_related:
+            prefetch_related_objects([instance], *self.detail_prefetch_related)
+        serializer = self.get_serializer(instance)
+        return self.set_validators(Response(serializer.data), etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = self.get_list_validators(queryset)
+        if etag is None:
+            return super().list(request, *args, **kwargs)
+
+        not_modified = self.not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        return self.set_validators(super().list(request, *args, **kwargs), etag, last_modified)
+
+    @staticmethod
+    def not_modified_response(request, etag, last_modified):
+        """304 (hoặc 412) nếu header điều kiện của request khớp, ngược lại None."""
+        return get_conditional_response(request, etag=etag, last_modified=_timestamp(last_modified))
+
+    @staticmethod
+    def set_validators(response, etag, last_modified):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(_timestamp(last_modified))
+        return response
+
+    def perform_update(self, serializer):
+        with self.compare_and_swap(serializer.instance):
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with self.compare_and_swap(instance):
+            super().perform_destroy(instance)
+
+    @contextmanager
+    def compare_and_swap(self, instance):
+        """
+        Nếu có If-Match: ETag phải khớp với phiên bản vừa đọc, sau đó "giữ chỗ" bằng
+        UPDATE ... SET updated_at = now() WHERE pk = ... AND updated_at = <giá trị đã đọc>.
+        Request đồng thời cùng phiên bản sẽ cập nhật 0 dòng và nhận 412 thay vì ghi đè.
+        """
+        if_match = self.request.headers.get("If-Match")
+        if if_match is None:
+            yield
+            return
+
+        etag, _ = self.get_object_validators(instance)
+        expected = parse_etags(if_match)
+        if "*" not in expected and etag not in expected:
+            raise PreconditionFailed()
+
+        with transaction.atomic():
+            claimed = (
+                type(instance)
+                ._base_manager.filter(pk=instance.pk, updated_at=instance.updated_at)
+                .update(updated_at=Now())
+            )
+            if not claimed:
+                raise PreconditionFailed()
+            yield
@@ -0,0 +1,133 @@
+"""
+?expand= cho ViewSet: thêm quan hệ lồng vào response, ví dụ
+/api/contacts/?expand=groups,memberships.group hoặc /api/memberships/?expand=contact.
+
+Quan hệ nhiều được nạp bằng một Prefetch() (queryset bên trong đã select_related sẵn
+những gì serializer lồng đọc), khóa ngoại bằng select_related trong cùng query -> mỗi quan
+hệ mở rộng tốn tối đa một query, dù trang có 10 hay 1000 dòng.
+
+Tên có dấu chấm mở rộng field của quan hệ cha (memberships.group: group của từng membership
+thành object thay vì id); quan hệ cha được tự thêm vào. Dùng chung với ?fields=/?omit=
+(contacts/fieldsets.py): quan hệ không được chọn thì không mở rộng, không prefetch.
+"""
+
+from rest_framework.exceptions import ValidationError
+
+from .fieldsets import SparseFieldsetMixin
+
+EXPAND_PARAM = "expand"
+
+
+class Expansion:
+    """
+    Một quan hệ mở rộng được:
+
+    - field: hàm trả về field serializer lồng (read_only), gọi cho mỗi response
+    - prefetch: hàm trả về Prefetch() cho quan hệ nhiều (queryset mới cho mỗi request)
+    - select_related: tên khóa ngoại, JOIN luôn trong query chính
+    """
+
+    def __init__(self, field, prefetch=None, select_related=None):
+        self.field = field
+        self.prefetch = prefetch
+        self.select_related = select_related
+
+
+def requested_expansions(request, expandable):
+    """Tên quan hệ cần mở rộng (kèm quan hệ cha), theo thứ tự khai báo trong expandable."""
+    names = [part.strip() for part in request.query_params.get(EXPAND_PARAM, "").split(",")]
+    names = [name for name in names if name]
+    unknown = [name for name in names if name not in expandable]
+    if unknown:
+        raise ValidationError(
+            {
+                EXPAND_PARAM: f"Không mở rộng được: {', '.join(unknown)} "
+                f"(chọn trong: {', '.join(expandable) or 'không có'})"
+            }
+        )
+
+    requested = set()
+    for name in names:
+        parts = name.split(".")
+        requested.update(".".join(parts[:depth]) for depth in range(1, len(parts) + 1))
+    return tuple(name for name in expandable if name in requested)
+
+
+class ExpandMixin(SparseFieldsetMixin):
+    """
+    Mixin cho ViewSet (gồm cả ?fields=/?omit=), đặt trước ConditionalRequestMixin và
+    CompiledListMixin:
+
+        expandable = {"groups": Expansion(lambda: GroupSerializer(many=True, read_only=True),
+                                          prefetch=lambda: Prefetch("groups"))}
+
+    Danh sách có ?expand= đi đường serializer DRF (values_list không có quan hệ lồng).
+    """
+
+    expandable = {}
+    # Action tự chạy prefetch (ví dụ retrieve của ConditionalRequestMixin chỉ prefetch khi
+    # thực sự serialize, không prefetch khi trả 304): get_queryset chỉ select_related
+    expand_deferred_actions = ()
+
+    def get_expand(self):
+        """Quan hệ được mở rộng cho request này (bỏ quan hệ bị loại bởi ?fields=/?omit=)."""
+        if not hasattr(self, "_expand"):
+            self._expand = tuple(
+                name for name in self._requested_expand() if self.fieldset_needs(name.split(".")[0])
+            )
+        return self._expand
+
+    def _requested_expand(self):
+        if not hasattr(self, "_requested"):
+            self._requested = ()
+            if self.is_read_request():
+                # Action trả model khác (ví dụ /api/contacts/{id}/groups/) không mở rộng được
+                model = getattr(getattr(self.get_serializer_class(), "Meta", None), "model", None)
+                expandable = self.expandable if model is self.queryset.model else {}
+                self._requested = requested_expansions(self.request, expandable)
+        return self._requested
+
+    def expands(self, name):
+        return name in self.get_expand()
+
+    def get_expand_prefetches(self):
+        """Prefetch() của các quan hệ được mở rộng."""
+        return [
+            self.expandable[name].prefetch()
+            for name in self.get_expand()
+            if self.expandable[name].prefetch is not None
+        ]
+
+    def fieldset_extra_fields(self):
+        names = [name for name in self._requested_expand() if "." not in name]
+        return (*super().fieldset_extra_fields(), *names)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        related = [
+            self.expandable[name].select_related
+            for name in self.get_expand()
+            if self.expandable[name].select_related
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+        if self.action not in self.expand_deferred_actions:
+            prefetches = self.get_expand_prefetches()
+            if prefetches:
+                queryset = queryset.prefetch_related(*prefetches)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        for name in self.get_expand():
+            *parents, field_name = name.split(".")
+            fields = getattr(serializer, "child", serializer).fields
+            for parent in parents:
+                fields = getattr(fields[parent], "child", fields[parent]).fields
+            fields[field_name] = self.expandable[name].field()
+        return serializer
+
+    def get_compiled_serializer(self, serializer_class):
+        if self.get_expand():
+            return None
+        return super().get_compiled_serializer(serializer_class)
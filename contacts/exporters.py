@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+from abc import ABC, abstractmethod
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from rest_framework.renderers import BaseRenderer
+
+from .models import ContactGroup
+
+EXPORT_FIELDS = [
+    "id",
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "address",
+    "notes",
+    "is_favorite",
+    "created_at",
+    "updated_at",
+]
+EXPORT_COLUMNS = EXPORT_FIELDS + ["groups"]
+
+VCARD_LINE_OCTETS = 75
+
+
+def export_rows(queryset, chunk_size=2000):
+    """
+    Duyệt queryset bằng server-side cursor, mỗi contact thành một dict (kèm tên group).
+    Group được prefetch theo từng lô chunk_size contact -> 1 query / lô, không N+1.
+    """
+    queryset = queryset.only(*EXPORT_FIELDS).prefetch_related(
+        Prefetch("groups", queryset=ContactGroup.objects.only("id", "name").order_by("name"))
+    )
+    for contact in queryset.iterator(chunk_size=chunk_size):
+        row = {name: getattr(contact, name) for name in EXPORT_FIELDS}
+        row["groups"] = [group.name for group in contact.groups.all()]
+        yield row
+
+
+class ContactExportRenderer(BaseRenderer, ABC):
+    """
+    Renderer cho GET /api/contacts/export/: mỗi contact render độc lập nên response
+    được stream theo từng lô dòng thay vì dựng toàn bộ trong bộ nhớ.
+    Thuộc tính format giúp content negotiation của DRF nhận ?format=csv|ndjson|vcf.
+    """
+
+    charset = "utf-8"
+    rows_per_chunk = 500
+
+    def header(self):
+        return ""
+
+    @abstractmethod
+    def render_row(self, row):
+        """Một contact (dict của export_rows) thành text, kể cả ký tự xuống dòng."""
+
+    def stream(self, rows):
+        chunk = [self.header()]
+        for row in rows:
+            chunk.append(self.render_row(row))
+            if len(chunk) >= self.rows_per_chunk:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # Response lỗi (format không hỗ trợ, filter sai...) -> text đơn giản
+            return "\n".join(f"{key}: {value}" for key, value in data.items()).encode(self.charset)
+        return "".join(self.stream(data)).encode(self.charset)
+
+
+class CSVExportRenderer(ContactExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def header(self):
+        return self._write_line(EXPORT_COLUMNS)
+
+    def render_row(self, row):
+        values = dict(row, groups="; ".join(row["groups"]))
+        values["is_favorite"] = "true" if row["is_favorite"] else "false"
+        for name in ("created_at", "updated_at"):
+            values[name] = row[name].isoformat() if row[name] else ""
+        return self._write_line([values[name] for name in EXPORT_COLUMNS])
+
+    @staticmethod
+    def _write_line(values):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue()
+
+
+class NDJSONExportRenderer(ContactExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render_row(self, row):
+        return json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+class VCardExportRenderer(ContactExportRenderer):
+    """vCard 4.0, đọc lại được bằng import (X-CONTACTBOOK-FAVORITE giữ trạng thái yêu thích)."""
+
+    media_type = "text/vcard"
+    format = "vcf"
+
+    def render_row(self, row):
+        first_name, last_name = _escape_vcard(row["first_name"]), _escape_vcard(row["last_name"])
+        lines = [
+            "BEGIN:VCARD",
+            "VERSION:4.0",
+            f"N:{last_name};{first_name};;;",
+            f"FN:{last_name} {first_name}".rstrip(),
+            f"EMAIL:{row['email']}",
+        ]
+        if row["phone"]:
+            lines.append(f"TEL;VALUE=uri:tel:{row['phone']}")
+        if row["address"]:
+            lines.append(f"ADR:;;{_escape_vcard(row['address'])};;;;")
+        if row["notes"]:
+            lines.append(f"NOTE:{_escape_vcard(row['notes'])}")
+        if row["groups"]:
+            lines.append("CATEGORIES:" + ",".join(_escape_vcard(name) for name in row["groups"]))
+        if row["is_favorite"]:
+            lines.append("X-CONTACTBOOK-FAVORITE:1")
+        lines.append("END:VCARD")
+        return "".join(_fold_vcard_line(line) + "\r\n" for line in lines)
+
+
+def _escape_vcard(value):
+    return (
+        value.replace("\\", "\\\\")
+        .replace(",", "\\,")
+        .replace(";", "\\;")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold_vcard_line(line):
+    """Gập dòng dài hơn 75 octet (RFC 6350), không cắt giữa một ký tự UTF-8."""
+    if len(line.encode("utf-8")) <= VCARD_LINE_OCTETS:
+        return line
+
+    parts, current, size = [], [], 0
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        # Dòng tiếp theo bắt đầu bằng một khoảng trắng nên còn 74 octet
+        limit = VCARD_LINE_OCTETS if not parts else VCARD_LINE_OCTETS - 1
+        if size + char_size > limit:
+            parts.append("".join(current))
+            current, size = [], 0
+        current.append(char)
+        size += char_size
+    parts.append("".join(current))
+    return "\r\n ".join(parts)
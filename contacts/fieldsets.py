@@ -0,0 +1,134 @@
+"""
+Sparse fieldset cho GET trên các ViewSet: ?fields=id,first_name,phone chỉ trả các field
+này, ?omit=address,notes trả mọi field trừ các field này (dùng được cả hai cùng lúc).
+
+Không chỉ cắt output: queryset chỉ SELECT cột của field được chọn (.only()) nên TextField
+lớn (address, notes...) không rời database khi không cần; view bỏ annotation/prefetch của
+field không được chọn qua fieldset_needs(). Danh sách đi đường values_list
+(contacts/compiled.py) cũng chỉ đọc các cột được chọn.
+"""
+
+from functools import cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+
+
+@cache
+def _field_sources(serializer_class):
+    """{tên field: tên thuộc tính đầu tiên của source} theo thứ tự field của serializer."""
+    return {
+        name: field.source_attrs[0] if field.source_attrs else None
+        for name, field in serializer_class().fields.items()
+    }
+
+
+def _param(request, name):
+    return [part.strip() for part in request.query_params.get(name, "").split(",") if part.strip()]
+
+
+def selected_fields(request, serializer_class, extra=()):
+    """
+    Tuple tên field được chọn (theo thứ tự của serializer, rồi extra), hoặc None nếu
+    request không có ?fields=/?omit=. Tên field không có trong serializer/extra -> 400.
+    """
+    fields, omit = _param(request, FIELDS_PARAM), _param(request, OMIT_PARAM)
+    if not fields and not omit:
+        return None
+
+    available = tuple(dict.fromkeys([*_field_sources(serializer_class), *extra]))
+    errors = {}
+    for param, names in ((FIELDS_PARAM, fields), (OMIT_PARAM, omit)):
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            errors[param] = (
+                f"Field không tồn tại: {', '.join(unknown)} (chọn trong: {', '.join(available)})"
+            )
+    if errors:
+        raise ValidationError(errors)
+    return tuple(name for name in available if (not fields or name in fields) and name not in omit)
+
+
+def trim_serializer(serializer, fieldset):
+    """Bỏ các field không có trong fieldset (many=True: bỏ trên child)."""
+    fields = getattr(serializer, "child", serializer).fields
+    for name in list(fields):
+        if name not in fieldset:
+            del fields[name]
+    return serializer
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin cho ViewSet (đặt trước các mixin/ViewSet khác):
+
+    - get_serializer(): chỉ giữ field được chọn (chỉ GET/HEAD/OPTIONS và read_only_actions;
+      request ghi luôn dùng đủ field để validate input)
+    - get_queryset(): .only() cột của field được chọn + pk + fieldset_columns + cột sắp xếp
+    - fieldset_needs(*names): view hỏi trước khi annotate/prefetch cho các field đó
+    """
+
+    # Cột luôn đọc dù không có trong ?fields= (ví dụ updated_at cho ETag)
+    fieldset_columns = []
+    # False: queryset dùng cho endpoint khác (ví dụ contact_list_queryset), không áp ?fields=
+    sparse_fieldsets = True
+    # Action POST chỉ đọc (body là tham số, ví dụ danh sách id dài) vẫn áp ?fields=
+    read_only_actions = ()
+
+    def is_read_request(self):
+        return self.request.method in SAFE_METHODS or self.action in self.read_only_actions
+
+    def get_fieldset(self):
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = None
+            if self.sparse_fieldsets and self.is_read_request():
+                self._fieldset = selected_fields(
+                    self.request, self.get_serializer_class(), self.fieldset_extra_fields()
+                )
+        return self._fieldset
+
+    def fieldset_extra_fields(self):
+        """Field ngoài serializer được chọn bằng ?fields= (ví dụ quan hệ ?expand=)."""
+        return ()
+
+    def fieldset_needs(self, *names):
+        """True nếu response có ít nhất một field trong names."""
+        fieldset = self.get_fieldset()
+        return fieldset is None or any(name in fieldset for name in names)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_fieldset()
+        return serializer if fieldset is None else trim_serializer(serializer, fieldset)
+
+    def get_queryset(self):
+        return self.project_queryset(super().get_queryset())
+
+    def project_queryset(self, queryset):
+        """queryset.only() các cột response cần (giữ nguyên nếu không có fieldset)."""
+        fieldset = self.get_fieldset()
+        serializer_class = self.get_serializer_class()
+        if fieldset is None or serializer_class.Meta.model is not queryset.model:
+            return queryset
+
+        sources = _field_sources(serializer_class)
+        ordering_fields = getattr(self, "ordering_fields", None)
+        names = [
+            *(sources.get(name) for name in fieldset),
+            *self.fieldset_columns,
+            *(field.lstrip("-") for field in getattr(self, "ordering", None) or ()),
+            *(ordering_fields if isinstance(ordering_fields, (list, tuple)) else ()),
+        ]
+        columns = []
+        for name in dict.fromkeys(filter(None, names)):
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                columns.append(name)
+        return queryset.only(*columns or ["pk"])
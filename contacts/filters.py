@@ -0,0 +1,83 @@
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from django_filters import rest_framework as django_filters
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .models import Contact
+
+WORD_RE = re.compile(r"\w+")
+
+
+def fold_accents(value):
+    """
+    Bỏ dấu tiếng Việt và viết thường: "Nguyễn Đức" -> "nguyen duc".
+    Khớp với unaccent()/lower() mà trigger dùng để dựng search_document.
+    """
+    value = value.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower().strip()
+
+
+def build_prefix_tsquery(terms):
+    """["nguyen", "an"] -> "nguyen:* & an:*" (mỗi từ khớp theo tiền tố)."""
+    words = [word for term in terms for word in WORD_RE.findall(term)]
+    return " & ".join(f"{word}:*" for word in words)
+
+
+class ContactFilter(django_filters.FilterSet):
+    """?is_favorite=true&is_active=false của /api/contacts/ (và filters của các endpoint bulk_*)"""
+
+    class Meta:
+        model = Contact
+        fields = ["is_favorite", "is_active"]
+
+
+class ContactSearchFilter(filters.SearchFilter):
+    """
+    Thay cho SearchFilter mặc định (ILIKE '%term%' trên từng cột, luôn seq scan).
+
+    - Khớp theo từ/tiền tố: search_vector @@ tsquery (GIN index idx_contact_search)
+    - Khớp chuỗi con (email, SĐT): search_document LIKE '%term%'
+      (GIN trigram index idx_contact_search_trgm)
+
+    Cả hai cột đều đã bỏ dấu nên ?search=nguyen khớp "Nguyễn". Kết quả được
+    sắp theo độ liên quan, trừ khi client truyền ?ordering= rõ ràng.
+    """
+
+    rank_annotation = "search_rank"
+
+    def filter_queryset(self, request, queryset, view):
+        keep_ordering = bool(request.query_params.get(api_settings.ORDERING_PARAM))
+        return self.search(queryset, self.get_search_terms(request), keep_ordering)
+
+    def search(self, queryset, terms, keep_ordering=False):
+        """Lọc queryset theo các term của ?search= (gọi trực tiếp được, không cần request)."""
+        terms = [fold_accents(term) for term in terms]
+        terms = [term for term in terms if term]
+        if not terms:
+            return queryset
+
+        # Giống SearchFilter: mọi term đều phải khớp
+        substring_match = Q()
+        for term in terms:
+            substring_match &= Q(search_document__contains=term)
+
+        raw_query = build_prefix_tsquery(terms)
+        if not raw_query:
+            return queryset.filter(substring_match)
+
+        query = SearchQuery(raw_query, config="simple", search_type="raw")
+        # ts_rank trả về real; ép sang double để giá trị rank trong cursor so sánh bằng chính xác
+        rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+        queryset = queryset.filter(Q(search_vector=query) | substring_match).annotate(
+            **{self.rank_annotation: rank}
+        )
+
+        if keep_ordering:
+            return queryset
+        return queryset.order_by(f"-{self.rank_annotation}", *queryset.query.order_by)
@@ -0,0 +1,392 @@
+import csv
+import io
+import json
+import os
+
+from django.core.exceptions import ValidationError
+from django.core.validators import EmailValidator
+from django.db import connection, transaction
+
+from .models import Contact, queryset_updated
+
+IMPORT_FIELDS = ["first_name", "last_name", "email", "phone", "address", "notes", "is_favorite"]
+REQUIRED_FIELDS = ["first_name", "last_name", "email"]
+# Các cột không bắt buộc: dòng nào không có cột đó thì giữ giá trị cũ khi upsert
+OPTIONAL_FIELDS = ["phone", "address", "notes", "is_favorite"]
+
+FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".vcf": "vcf",
+    ".vcard": "vcf",
+}
+
+# File import được đọc bằng UTF-8 (có hoặc không có BOM)
+ENCODING_ERROR = "File không đúng mã hóa UTF-8, hãy lưu lại file dạng UTF-8 rồi import lại"
+
+TRUE_VALUES = {"1", "true", "t", "yes", "y", "x"}
+PHONE_SEPARATORS = str.maketrans("", "", " -.()")
+
+STAGING_TABLE = "contact_import_staging"
+STAGING_COLUMNS = ["row_no"] + IMPORT_FIELDS + ["missing"]
+
+CREATE_STAGING_TABLE = f"""
+CREATE TEMPORARY TABLE {STAGING_TABLE} (
+    row_no integer PRIMARY KEY,
+    first_name text,
+    last_name text,
+    email text,
+    phone text,
+    address text,
+    notes text,
+    is_favorite boolean,
+    missing text[]
+) ON COMMIT DROP
+"""
+
+# Email trùng trong cùng file: giữ dòng đầu tiên
+DELETE_DUPLICATE_EMAILS = f"""
+WITH ranked AS (
+    SELECT row_no,
+           row_number() OVER (PARTITION BY email ORDER BY row_no) AS position,
+           min(row_no) OVER (PARTITION BY email) AS first_row
+    FROM {STAGING_TABLE}
+)
+DELETE FROM {STAGING_TABLE} s
+USING ranked r
+WHERE s.row_no = r.row_no AND r.position > 1
+RETURNING s.row_no, r.first_row
+"""
+
+# Cột không có trong dòng -> lấy giá trị hiện tại của contact cùng email
+FILL_MISSING_FROM_EXISTING = f"""
+UPDATE {STAGING_TABLE} s SET
+    phone = CASE WHEN 'phone' = ANY(s.missing) THEN c.phone ELSE s.phone END,
+    address = CASE WHEN 'address' = ANY(s.missing) THEN c.address ELSE s.address END,
+    notes = CASE WHEN 'notes' = ANY(s.missing) THEN c.notes ELSE s.notes END,
+    is_favorite = CASE
+        WHEN 'is_favorite' = ANY(s.missing) THEN c.is_favorite ELSE s.is_favorite
+    END
+FROM contacts c
+WHERE c.email = s.email AND cardinality(s.missing) > 0
+"""
+
+# unique_contact_name_phone: trùng (tên, họ, SĐT) trong file ...
+DELETE_DUPLICATE_NAME_PHONE = f"""
+WITH ranked AS (
+    SELECT row_no,
+           row_number() OVER (
+               PARTITION BY first_name, last_name, phone ORDER BY row_no
+           ) AS position,
+           min(row_no) OVER (PARTITION BY first_name, last_name, phone) AS first_row
+    FROM {STAGING_TABLE}
+    WHERE phone IS NOT NULL
+)
+DELETE FROM {STAGING_TABLE} s
+USING ranked r
+WHERE s.row_no = r.row_no AND r.position > 1
+RETURNING s.row_no, r.first_row
+"""
+
+# ... hoặc trùng với một contact khác (khác email) đã có trong DB
+DELETE_EXISTING_NAME_PHONE = f"""
+DELETE FROM {STAGING_TABLE} s
+USING contacts c
+WHERE s.phone IS NOT NULL
+  AND c.first_name = s.first_name
+  AND c.last_name = s.last_name
+  AND c.phone = s.phone
+  AND c.email <> s.email
+RETURNING s.row_no, c.id
+"""
+
+UPSERT_CONTACTS = f"""
+WITH upserted AS (
+    INSERT INTO contacts (
+        first_name, last_name, email, phone, address, notes, is_favorite,
+        is_active, group_count, search_document, created_at, updated_at
+    )
+    SELECT first_name, last_name, email, phone, address, notes, coalesce(is_favorite, false),
+           true, 0, '', now(), now()
+    FROM {STAGING_TABLE}
+    ORDER BY row_no
+    ON CONFLICT (email) DO UPDATE SET
+        first_name = EXCLUDED.first_name,
+        last_name = EXCLUDED.last_name,
+        phone = EXCLUDED.phone,
+        address = EXCLUDED.address,
+        notes = EXCLUDED.notes,
+        is_favorite = EXCLUDED.is_favorite,
+        -- Import lại contact đã soft delete: khôi phục, nếu không dòng "cập nhật" vẫn bị ẩn
+        is_active = true,
+        updated_at = EXCLUDED.updated_at
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+"""
+
+
+def detect_format(filename):
+    """Đoán định dạng từ đuôi file: contacts.csv -> "csv"."""
+    _, extension = os.path.splitext(filename or "")
+    return FORMAT_EXTENSIONS.get(extension.lower())
+
+
+def iter_csv(stream):
+    reader = csv.DictReader(stream)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row_no, record in enumerate(reader, start=1):
+        yield row_no, record, None
+
+
+def iter_jsonl(stream):
+    row_no = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        row_no += 1
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield row_no, None, f"JSON không hợp lệ: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield row_no, None, "Mỗi dòng phải là một JSON object"
+            continue
+        yield row_no, record, None
+
+
+def _unescape_vcard(value):
+    return (
+        value.replace("\\n", "\n")
+        .replace("\\N", "\n")
+        .replace("\\,", ",")
+        .replace("\\;", ";")
+        .replace("\\\\", "\\")
+    )
+
+
+def _unfold_vcard_lines(stream):
+    """Ghép các dòng bị gập (dòng bắt đầu bằng khoảng trắng/tab) theo RFC 6350."""
+    current = None
+    for line in stream:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def iter_vcard(stream):
+    """Đọc từng BEGIN:VCARD ... END:VCARD, chỉ lấy N/FN, EMAIL, TEL, ADR, NOTE."""
+    row_no = 0
+    card = None
+    for line in _unfold_vcard_lines(stream):
+        if ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        name = key.split(";", 1)[0].upper()
+
+        if name == "BEGIN" and value.upper() == "VCARD":
+            card = {}
+        elif name == "END" and value.upper() == "VCARD" and card is not None:
+            row_no += 1
+            yield row_no, card, None
+            card = None
+        elif card is None:
+            continue
+        elif name == "N":
+            parts = [_unescape_vcard(part) for part in value.split(";")] + ["", ""]
+            card["last_name"], card["first_name"] = parts[0], parts[1]
+        elif name == "FN" and "first_name" not in card:
+            # Không có N: tách FN theo kiểu Việt Nam (tên là từ cuối cùng)
+            last_name, _, first_name = _unescape_vcard(value).strip().rpartition(" ")
+            card["last_name"], card["first_name"] = last_name, first_name
+        elif name == "EMAIL":
+            card.setdefault("email", value)
+        elif name == "TEL":
+            card.setdefault("phone", value.removeprefix("tel:"))
+        elif name == "ADR":
+            parts = [_unescape_vcard(part).strip() for part in value.split(";")]
+            card.setdefault("address", ", ".join(part for part in parts if part))
+        elif name == "NOTE":
+            card["notes"] = _unescape_vcard(value)
+        elif name == "X-CONTACTBOOK-FAVORITE":
+            card["is_favorite"] = value
+
+
+PARSERS = {
+    "csv": iter_csv,
+    "jsonl": iter_jsonl,
+    "vcf": iter_vcard,
+}
+
+
+class ImportResult:
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.total_rows = 0
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row_no, errors):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row_no, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "total_rows": self.total_rows,
+            "created": self.created,
+            "updated": self.updated,
+            "skipped": self.error_count,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.error_count > len(self.errors),
+        }
+
+
+def copy_from(cursor, sql, buffer):
+    """Chạy COPY ... FROM STDIN với dữ liệu trong buffer (StringIO) trên cursor Django."""
+    raw_cursor = cursor.cursor
+    if hasattr(raw_cursor, "copy_expert"):  # psycopg2
+        raw_cursor.copy_expert(sql, buffer)
+    else:  # psycopg 3
+        with raw_cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+class ContactImporter:
+    """
+    Import contact hàng loạt: đọc file theo dòng (stream), validate theo lô,
+    COPY vào bảng staging tạm rồi upsert một lần bằng INSERT ... ON CONFLICT (email).
+
+    Bộ nhớ không phụ thuộc kích thước file: mỗi lúc chỉ giữ một lô dòng,
+    kiểm tra trùng lặp trong file được làm bằng SQL trên bảng staging.
+    """
+
+    def __init__(self, file_format, batch_size=5000, max_errors=1000):
+        if file_format not in PARSERS:
+            raise ValueError(
+                f"Định dạng không hỗ trợ: {file_format!r} (chọn một trong: {', '.join(PARSERS)})"
+            )
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.email_validator = EmailValidator()
+        self.phone_regex = Contact.phone_regex.regex
+        self.max_lengths = {
+            name: Contact._meta.get_field(name).max_length
+            for name in ["first_name", "last_name", "email", "phone"]
+        }
+
+    def run(self, stream):
+        """stream: file text (đã decode). Trả về ImportResult."""
+        result = ImportResult(self.max_errors)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(CREATE_STAGING_TABLE)
+
+            batch = []
+            for row_no, record, parse_error in PARSERS[self.file_format](stream):
+                result.total_rows += 1
+                if parse_error:
+                    result.add_error(row_no, {"non_field_errors": [parse_error]})
+                    continue
+                batch.append((row_no, record))
+                if len(batch) >= self.batch_size:
+                    self._load_batch(cursor, batch, result)
+                    batch = []
+            if batch:
+                self._load_batch(cursor, batch, result)
+
+            self._reject_conflicts(cursor, result)
+            cursor.execute(UPSERT_CONTACTS)
+            result.created, result.updated = cursor.fetchone()
+
+            # Upsert bằng SQL thuần, không có post_save
+            if result.created or result.updated:
+                queryset_updated.send(sender=Contact)
+
+        return result
+
+    def _load_batch(self, cursor, batch, result):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row_no, record in batch:
+            values, errors = self._clean(record)
+            if errors:
+                result.add_error(row_no, errors)
+                continue
+            missing = [name for name in OPTIONAL_FIELDS if name not in record]
+            writer.writerow(
+                [row_no]
+                + [values[name] for name in IMPORT_FIELDS]
+                + ["{" + ",".join(missing) + "}"]
+            )
+
+        buffer.seek(0)
+        self._copy(cursor, buffer)
+
+    def _clean(self, record):
+        """Chuẩn hóa + validate một dòng, trả về (values, errors)."""
+        values = {}
+        errors = {}
+        for name in IMPORT_FIELDS:
+            value = record.get(name)
+            value = str(value).strip() if value is not None else ""
+            values[name] = value or None
+
+        for name in REQUIRED_FIELDS:
+            if not values[name]:
+                errors[name] = ["Trường này là bắt buộc"]
+
+        if values["phone"]:
+            values["phone"] = values["phone"].translate(PHONE_SEPARATORS)
+            if not self.phone_regex.match(values["phone"]):
+                errors["phone"] = [str(Contact.phone_regex.message)]
+
+        if values["email"]:
+            try:
+                self.email_validator(values["email"])
+            except ValidationError:
+                errors["email"] = ["Email không hợp lệ"]
+
+        for name, max_length in self.max_lengths.items():
+            if values[name] and len(values[name]) > max_length and name not in errors:
+                errors[name] = [f"Tối đa {max_length} ký tự"]
+
+        if values["is_favorite"] is not None:
+            values["is_favorite"] = "t" if values["is_favorite"].lower() in TRUE_VALUES else "f"
+
+        return values, errors
+
+    def _copy(self, cursor, buffer):
+        sql = f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+        copy_from(cursor, sql, buffer)
+
+    def _reject_conflicts(self, cursor, result):
+        cursor.execute(DELETE_DUPLICATE_EMAILS)
+        for row_no, first_row in cursor:
+            result.add_error(row_no, {"email": [f"Email trùng với dòng {first_row} trong file"]})
+
+        cursor.execute(FILL_MISSING_FROM_EXISTING)
+
+        cursor.execute(DELETE_DUPLICATE_NAME_PHONE)
+        for row_no, first_row in cursor:
+            result.add_error(
+                row_no, {"phone": [f"Trùng họ tên + SĐT với dòng {first_row} trong file"]}
+            )
+
+        cursor.execute(DELETE_EXISTING_NAME_PHONE)
+        for row_no, contact_id in cursor:
+            result.add_error(
+                row_no, {"phone": [f"Trùng họ tên + SĐT với contact #{contact_id} đã có"]}
+            )
@@ -0,0 +1,40 @@
+"""
+Lookup __any cho Postgres: Contact.objects.filter(pk__any=[1, 2, 3]) sinh
+"contacts"."id" = ANY(%s) với cả danh sách là một tham số mảng.
+
+So với __in (IN (%s, %s, ...)): câu SQL không đổi theo số phần tử và chỉ có một tham số dù
+danh sách dài bao nhiêu (psycopg2 ghép mảng vào câu lệnh dạng ARRAY[...], psycopg 3 gửi
+mảng như một tham số bind).
+
+Chỉ đăng ký trên khóa chính của Contact (install(), gọi trong ContactsConfig.ready), không
+thêm __any cho field của mọi model/app khác.
+"""
+
+from django.db.models import Lookup
+
+from .models import Contact
+
+
+class Any(Lookup):
+    lookup_name = "any"
+
+    def get_prep_lookup(self):
+        if hasattr(self.rhs, "resolve_expression"):
+            return self.rhs
+        field = self.lhs.output_field
+        return [field.get_prep_value(value) for value in self.rhs]
+
+    def get_db_prep_lookup(self, value, connection):
+        field = self.lhs.output_field
+        # list (không phải tuple): psycopg chuyển thành mảng Postgres
+        return "%s", [[field.get_db_prep_value(item, connection, prepared=True) for item in value]]
+
+    def as_sql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs_sql} = ANY({rhs_sql})", (*lhs_params, *rhs_params)
+
+
+def install():
+    """Đăng ký __any trên khóa chính của Contact (gọi trong AppConfig.ready)."""
+    Contact._meta.pk.register_lookup(Any)
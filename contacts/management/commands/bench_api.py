@@ -0,0 +1,253 @@
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.settings import api_settings
+
+from contacts.models import Contact, ContactGroup
+from contacts.synthetic import SyntheticDataset
+
+# Chỉ số so với baseline: (tên, True nếu càng lớn càng tốt)
+COMPARED_METRICS = [("rps", True), ("p95_ms", False), ("p99_ms", False)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark API trên database test riêng: seed dữ liệu, gọi từng endpoint bằng nhiều "
+        "luồng, đo req/s, p50/p95/p99 và số query SQL mỗi request; lưu/so sánh baseline JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--contacts",
+            type=int,
+            default=5000,
+            help="Số contact trong dataset (mặc định: 5000)",
+        )
+        parser.add_argument(
+            "--groups",
+            type=int,
+            default=20,
+            help="Số group trong dataset (mặc định: 20)",
+        )
+        parser.add_argument(
+            "--memberships-per-contact",
+            type=int,
+            default=2,
+            help="Số group mỗi contact tham gia (mặc định: 2)",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Số request đo cho mỗi endpoint (mặc định: 200)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Số luồng gửi request đồng thời (mặc định: 8)",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Số request chạy trước, không tính vào kết quả (mặc định: 10)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Seed ngẫu nhiên để dataset giống nhau giữa các lần chạy (mặc định: 42)",
+        )
+        parser.add_argument(
+            "--with-cache",
+            action="store_true",
+            help="Bật response cache (mặc định tắt để đo đường đi view -> ORM)",
+        )
+        parser.add_argument("--output", help="Ghi kết quả ra file JSON (làm baseline)")
+        parser.add_argument("--baseline", help="File JSON của lần chạy trước để so sánh")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=20.0,
+            help="Phần trăm chậm đi tối đa so với baseline trước khi báo lỗi (mặc định: 20)",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Giữ lại database test sau khi chạy",
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests và --concurrency phải >= 1")
+        if options["memberships_per_contact"] > options["groups"]:
+            raise CommandError("--memberships-per-contact không được lớn hơn --groups")
+
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"], encoding="utf-8") as stream:
+                    baseline = json.load(stream)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Không đọc được baseline {options['baseline']}: {exc}")
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+        try:
+            self._seed(options)
+            with override_settings(API_CACHE_ENABLED=options["with_cache"]):
+                results = self._run(options)
+        finally:
+            connections.close_all()
+            if not options["keepdb"]:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "dataset": {
+                name: options[name] for name in ("contacts", "groups", "memberships_per_contact")
+            },
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "with_cache": options["with_cache"],
+            "endpoints": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as stream:
+                json.dump(report, stream, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\n✓ Đã ghi kết quả vào {options['output']}"))
+
+        if baseline is not None:
+            self._compare(baseline, report, options["threshold"])
+
+    def _seed(self, options):
+        self.stdout.write(
+            f"Đang seed {options['contacts']} contacts, {options['groups']} groups "
+            f"({options['memberships_per_contact']} group/contact)..."
+        )
+        SyntheticDataset(
+            contacts=options["contacts"],
+            groups=options["groups"],
+            memberships_per_contact=options["memberships_per_contact"],
+            seed=options["seed"],
+        ).load()
+
+    def _endpoints(self):
+        contact = Contact.objects.order_by("pk").first()
+        group = ContactGroup.objects.order_by("-member_count").first()
+        # Trang giữa danh sách: OFFSET lớn như khi client lật sâu
+        middle_page = max(1, Contact.objects.count() // api_settings.PAGE_SIZE // 2)
+        endpoints = {
+            "contacts-list": "/api/contacts/",
+            "contacts-list-deep": f"/api/contacts/?page={middle_page}",
+            "contacts-search": "/api/contacts/?search=nguyen",
+            "contacts-retrieve": f"/api/contacts/{contact.pk}/" if contact else None,
+            "contacts-favorites": "/api/contacts/favorites/",
+            "group-members": f"/api/groups/{group.pk}/members/" if group else None,
+            "memberships-list": "/api/memberships/",
+        }
+        return {name: url for name, url in endpoints.items() if url}
+
+    def _run(self, options):
+        self.stdout.write(
+            f"\n{options['requests']} request/endpoint, {options['concurrency']} luồng\n"
+            f"\n{'Endpoint':<22} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'SQL/req':>8}"
+        )
+        results = {}
+        for name, url in self._endpoints().items():
+            self._drive(url, options["warmup"], options["concurrency"])
+            elapsed, samples = self._drive(url, options["requests"], options["concurrency"])
+            latencies = sorted(latency * 1000 for latency, _ in samples)
+            queries = [count for _, count in samples]
+            percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else None
+            results[name] = {
+                "url": url,
+                "rps": round(len(samples) / elapsed, 1),
+                "p50_ms": round(statistics.median(latencies), 2),
+                "p95_ms": round(percentiles[94] if percentiles else latencies[0], 2),
+                "p99_ms": round(percentiles[98] if percentiles else latencies[0], 2),
+                "queries_per_request": round(statistics.mean(queries), 2),
+            }
+            row = results[name]
+            self.stdout.write(
+                f"{name:<22} {row['rps']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} "
+                f"{row['p99_ms']:>8} {row['queries_per_request']:>8}"
+            )
+        return results
+
+    def _drive(self, url, total, concurrency):
+        """Gửi total request tới url bằng concurrency luồng; trả (thời gian, [(latency, số query)])."""
+        if total < 1:
+            return 0, []
+
+        def worker(count):
+            client = Client(HTTP_ACCEPT="application/json")
+            queries = []
+
+            def count_query(execute, sql, params, many, context):
+                queries.append(sql)
+                return execute(sql, params, many, context)
+
+            samples = []
+            try:
+                with connection.execute_wrapper(count_query):
+                    for _ in range(count):
+                        queries.clear()
+                        started = time.perf_counter()
+                        response = client.get(url)
+                        latency = time.perf_counter() - started
+                        if response.status_code != 200:
+                            raise CommandError(f"{url} trả về {response.status_code}")
+                        samples.append((latency, len(queries)))
+            finally:
+                connection.close()
+            return samples
+
+        workers = min(concurrency, total)
+        shares = [len(range(index, total, workers)) for index in range(workers)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(worker, shares))
+        return time.perf_counter() - started, [sample for chunk in results for sample in chunk]
+
+    def _compare(self, baseline, report, threshold):
+        self.stdout.write(f"\nSo với baseline (ngưỡng {threshold:g}%):")
+        regressions = []
+        for name, current in report["endpoints"].items():
+            previous = baseline.get("endpoints", {}).get(name)
+            if previous is None:
+                self.stdout.write(f"  ○ {name}: không có trong baseline")
+                continue
+
+            for metric, higher_is_better in COMPARED_METRICS:
+                before, after = previous[metric], current[metric]
+                if not before:
+                    continue
+                change = (after - before) / before * 100
+                worse = -change if higher_is_better else change
+                line = f"{name} {metric}: {before} -> {after} ({change:+.1f}%)"
+                if worse > threshold:
+                    regressions.append(line)
+                    self.stdout.write(self.style.ERROR(f"  ✗ {line}"))
+                else:
+                    self.stdout.write(f"  ✓ {line}")
+
+            # Số query là tất định: tăng dù chỉ một query cũng là regression (N+1...)
+            before, after = previous["queries_per_request"], current["queries_per_request"]
+            if after > before:
+                line = f"{name} SQL/req: {before} -> {after}"
+                regressions.append(line)
+                self.stdout.write(self.style.ERROR(f"  ✗ {line}"))
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} chỉ số chậm đi quá ngưỡng so với baseline")
+        self.stdout.write(self.style.SUCCESS("✓ Không có regression"))
@@ -0,0 +1,138 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+
+from contacts.models import Contact, ContactGroup
+
+ENDPOINTS = [
+    "contact-list",
+    "contact-search",
+    "contact-detail",
+    "favorites",
+    "group-list",
+    "group-members",
+]
+
+
+class Command(BaseCommand):
+    help = "So sánh req/s và p50/p99 của endpoint đọc sync (/api/...) và async (/api/async/...)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Số request cho mỗi endpoint (mặc định: 500)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Số request chạy đồng thời (mặc định: 20)",
+        )
+        parser.add_argument(
+            "--endpoints",
+            nargs="+",
+            choices=ENDPOINTS,
+            default=ENDPOINTS,
+            help="Chỉ đo các endpoint này (mặc định: tất cả)",
+        )
+
+    def handle(self, *args, **options):
+        total, concurrency = options["requests"], options["concurrency"]
+        if total < 1 or concurrency < 1:
+            raise CommandError("--requests và --concurrency phải >= 1")
+
+        contact_id = Contact.objects.values_list("id", flat=True).first()
+        group_id = (
+            ContactGroup.objects.order_by("-member_count").values_list("id", flat=True).first()
+        )
+        if contact_id is None or group_id is None:
+            raise CommandError("Chưa có dữ liệu, chạy seed_data trước")
+
+        paths = {
+            "contact-list": "contacts/?page=5",
+            "contact-search": "contacts/?search=nguyen",
+            "contact-detail": f"contacts/{contact_id}/",
+            "favorites": "contacts/favorites/",
+            "group-list": "groups/",
+            "group-members": f"groups/{group_id}/members/",
+        }
+
+        self.stdout.write(
+            f"\n{total} request/endpoint, {concurrency} đồng thời, response cache tắt\n"
+            f"\n{'Endpoint':<32} {'Mode':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}"
+        )
+        # Tắt response cache để đo đúng đường đi view -> ORM -> serializer của cả hai bản
+        with override_settings(API_CACHE_ENABLED=False):
+            for path in (paths[name] for name in options["endpoints"]):
+                for mode, run in (("sync", self._run_sync), ("async", self._run_async)):
+                    url = f"/api/{'async/' if mode == 'async' else ''}{path}"
+                    elapsed, latencies = run(url, total, concurrency)
+                    self._report(path, mode, total / elapsed, latencies)
+
+    def _run_sync(self, url, total, concurrency):
+        """WSGI: mỗi request chiếm một luồng (một kết nối DB) trong suốt thời gian chạy."""
+
+        def worker(count):
+            client = Client(HTTP_ACCEPT="application/json")
+            latencies = []
+            try:
+                for _ in range(count):
+                    latencies.append(self._timed(client.get, url))
+            finally:
+                connections.close_all()
+            return latencies
+
+        shares = [len(range(i, total, concurrency)) for i in range(min(concurrency, total))]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(shares)) as executor:
+            results = list(executor.map(worker, shares))
+        return time.perf_counter() - started, [value for chunk in results for value in chunk]
+
+    def _run_async(self, url, total, concurrency):
+        """ASGI: các request dùng chung event loop, chờ DB bằng async ORM."""
+
+        async def run():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.get(url)
+                    self._check(url, response)
+                    return time.perf_counter() - started
+
+            started = time.perf_counter()
+            latencies = await asyncio.gather(*(one() for _ in range(total)))
+            return time.perf_counter() - started, latencies
+
+        try:
+            return asyncio.run(run())
+        finally:
+            connections.close_all()
+
+    def _timed(self, get, url):
+        started = time.perf_counter()
+        response = get(url)
+        self._check(url, response)
+        return time.perf_counter() - started
+
+    @staticmethod
+    def _check(url, response):
+        if response.status_code != 200:
+            raise CommandError(f"{url} trả về {response.status_code}")
+
+    def _report(self, path, mode, throughput, latencies):
+        latencies = sorted(value * 1000 for value in latencies)
+        p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+        self.stdout.write(
+            f"{path:<32} {mode:<6} {throughput:>8.1f} "
+            f"{statistics.median(latencies):>8.2f} {p99:>8.2f}"
+        )
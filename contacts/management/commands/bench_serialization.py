@@ -0,0 +1,190 @@
+import io
+import json
+import random
+import statistics
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from contacts.compiled import compile_serializer
+from contacts.models import Contact, ContactGroup
+from contacts.parsers import FastJSONParser
+from contacts.renderers import FastJSONRenderer, orjson
+from contacts.serializers import ContactGroupSerializer, ContactListSerializer
+from contacts.synthetic import FAMILY_NAMES, MALE_GIVEN_NAMES, MALE_MIDDLE_NAMES
+
+
+def build_contacts(rows, seed):
+    """Contact trong bộ nhớ (không cần database) với dữ liệu giống seed_data."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    family_names = [name for name, _ in FAMILY_NAMES]
+    return [
+        Contact(
+            id=number,
+            first_name=rng.choice(MALE_GIVEN_NAMES),
+            last_name=f"{rng.choice(family_names)} {rng.choice(MALE_MIDDLE_NAMES)}",
+            email=f"user{number}@example.vn",
+            phone=f"+8490{number:07d}",
+            is_favorite=rng.random() < 0.1,
+            is_active=True,
+            group_count=rng.randint(0, 5),
+            created_at=now - timedelta(seconds=rng.randrange(3 * 365 * 86400)),
+        )
+        for number in range(1, rows + 1)
+    ]
+
+
+def as_rows(contacts, columns):
+    """Dòng values_list(named=True) tương ứng với các Contact trong bộ nhớ."""
+    row_class = namedtuple("Row", columns)
+    return [row_class(*(getattr(contact, column) for column in columns)) for contact in contacts]
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo serialize (ContactListSerializer so với bản compile từ values_list), render JSON "
+        "và parse JSON: renderer/parser của DRF so với FastJSONRenderer/FastJSONParser. "
+        "--database: đo thêm query + serialize trên dữ liệu thật"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[10, 100, 1000],
+            help="Số contact mỗi lần đo (mặc định: 10 100 1000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=50,
+            help="Số lần đo mỗi thao tác (mặc định: 50)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--database",
+            action="store_true",
+            help="Đo thêm query + serialize (model instance so với values_list) trên database",
+        )
+        parser.add_argument("--output", help="Ghi kết quả ra file JSON")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1 or min(options["rows"]) < 1:
+            raise CommandError("--repeat và --rows phải >= 1")
+
+        backend = f"orjson {orjson.__version__}" if orjson else "json stdlib (chưa cài orjson)"
+        self.stdout.write(f"FastJSON backend: {backend}; median của {options['repeat']} lần, ms\n")
+        self.stdout.write(
+            f"{'Dòng':>6} {'Serialize':>10} {'Compiled':>9} {'x':>6} {'Render DRF':>11} {'Render fast':>12} {'x':>6} "
+            f"{'Parse DRF':>10} {'Parse fast':>11} {'x':>6}  Giống byte"
+        )
+
+        drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        drf_parser, fast_parser = JSONParser(), FastJSONParser()
+        compiled = compile_serializer(ContactListSerializer)
+        if compiled is None:
+            raise CommandError("ContactListSerializer không compile được (COMPILED_SERIALIZERS?)")
+        results = []
+        for rows in options["rows"]:
+            contacts = build_contacts(rows, options["seed"])
+            values = as_rows(contacts, compiled.columns)
+            data = ContactListSerializer(contacts, many=True).data
+            body = drf_renderer.render(data)
+
+            result = {
+                "rows": rows,
+                "serialize_ms": self._time(
+                    lambda: ContactListSerializer(contacts, many=True).data, options["repeat"]
+                ),
+                "compiled_ms": self._time(
+                    lambda: compiled.to_representation(values), options["repeat"]
+                ),
+                "render_drf_ms": self._time(lambda: drf_renderer.render(data), options["repeat"]),
+                "render_fast_ms": self._time(lambda: fast_renderer.render(data), options["repeat"]),
+                "parse_drf_ms": self._time(
+                    lambda: drf_parser.parse(io.BytesIO(body)), options["repeat"]
+                ),
+                "parse_fast_ms": self._time(
+                    lambda: fast_parser.parse(io.BytesIO(body)), options["repeat"]
+                ),
+                "identical": fast_renderer.render(data) == body
+                and fast_renderer.render(compiled.to_representation(values)) == body
+                and fast_parser.parse(io.BytesIO(body)) == drf_parser.parse(io.BytesIO(body)),
+            }
+            results.append(result)
+            self.stdout.write(
+                f"{rows:>6} {result['serialize_ms']:>10} {result['compiled_ms']:>9} "
+                f"{result['serialize_ms'] / result['compiled_ms']:>5.1f}x "
+                f"{result['render_drf_ms']:>11} "
+                f"{result['render_fast_ms']:>12} "
+                f"{result['render_drf_ms'] / result['render_fast_ms']:>5.1f}x "
+                f"{result['parse_drf_ms']:>10} {result['parse_fast_ms']:>11} "
+                f"{result['parse_drf_ms'] / result['parse_fast_ms']:>5.1f}x  "
+                f"{'✓' if result['identical'] else '✗'}"
+            )
+
+        database = self._bench_database(options) if options["database"] else []
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as stream:
+                json.dump(
+                    {"backend": backend, "results": results, "database": database},
+                    stream,
+                    indent=2,
+                )
+            self.stdout.write(self.style.SUCCESS(f"\n✓ Đã ghi kết quả vào {options['output']}"))
+        if not all(result["identical"] for result in results + database):
+            raise CommandError("FastJSONRenderer/FastJSONParser/bản compile cho kết quả khác DRF")
+
+    def _bench_database(self, options):
+        """Query + serialize N dòng đầu: queryset model instance so với values_list."""
+        self.stdout.write(
+            f"\nQuery + serialize trên database, median của {options['repeat']} lần, ms\n"
+            f"{'Serializer':<24} {'Dòng':>6} {'Model':>9} {'Compiled':>9} {'x':>6}  Giống byte"
+        )
+        renderer = FastJSONRenderer()
+        results = []
+        for serializer_class, queryset in (
+            (ContactListSerializer, Contact.objects.order_by("last_name", "first_name", "pk")),
+            (ContactGroupSerializer, ContactGroup.objects.order_by("name", "pk")),
+        ):
+            compiled = compile_serializer(serializer_class)
+            for rows in options["rows"]:
+
+                def model(rows=rows, queryset=queryset, serializer_class=serializer_class):
+                    return serializer_class(queryset[:rows], many=True).data
+
+                def values(rows=rows, queryset=queryset, compiled=compiled):
+                    return compiled.to_representation(compiled.fetch(queryset)[:rows])
+
+                result = {
+                    "serializer": serializer_class.__name__,
+                    "rows": rows,
+                    "model_ms": self._time(model, options["repeat"]),
+                    "compiled_ms": self._time(values, options["repeat"]),
+                    "identical": renderer.render(model()) == renderer.render(values()),
+                }
+                results.append(result)
+                self.stdout.write(
+                    f"{result['serializer']:<24} {rows:>6} {result['model_ms']:>9} "
+                    f"{result['compiled_ms']:>9} "
+                    f"{result['model_ms'] / result['compiled_ms']:>5.1f}x  "
+                    f"{'✓' if result['identical'] else '✗'}"
+                )
+        return results
+
+    @staticmethod
+    def _time(func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return round(statistics.median(timings), 3)
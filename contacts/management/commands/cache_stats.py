@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+import contacts.views  # noqa: F401  (đăng ký các endpoint có @cache_response)
+from contacts.caching import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = "Xem số lần hit/miss/bypass của response cache theo từng endpoint API"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Đưa bộ đếm về 0 sau khi in",
+        )
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+
+        self.stdout.write(f"\n{'Endpoint':<40} {'Hit':>8} {'Miss':>8} {'Bypass':>8} {'Hit %':>7}")
+        for endpoint, counts in stats.items():
+            lookups = counts["hit"] + counts["miss"]
+            ratio = f"{counts['hit'] / lookups:.1%}" if lookups else "-"
+            self.stdout.write(
+                f"{endpoint:<40} {counts['hit']:>8} {counts['miss']:>8} "
+                f"{counts['bypass']:>8} {ratio:>7}"
+            )
+
+        if options["reset"]:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("\n✓ Đã reset bộ đếm"))
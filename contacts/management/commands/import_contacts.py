@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from contacts.importers import ENCODING_ERROR, PARSERS, ContactImporter, detect_format
+
+
+class Command(BaseCommand):
+    help = "Import contacts hàng loạt từ file CSV / JSON Lines / vCard (upsert theo email)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Đường dẫn file cần import")
+        parser.add_argument(
+            "--format",
+            choices=list(PARSERS),
+            help="Định dạng file (mặc định: đoán theo đuôi file)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Số dòng validate + COPY mỗi lô (mặc định: 5000)",
+        )
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            default=50,
+            help="Số lỗi tối đa in ra (mặc định: 50)",
+        )
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or detect_format(options["path"])
+        try:
+            importer = ContactImporter(
+                file_format, batch_size=options["batch_size"], max_errors=options["max_errors"]
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"Đang import {options['path']} ({file_format})...")
+        with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+            try:
+                result = importer.run(stream).as_dict()
+            except UnicodeDecodeError:
+                raise CommandError(ENCODING_ERROR)
+
+        self.stdout.write(self.style.SUCCESS(f"\n✓ Đã đọc {result['total_rows']} dòng"))
+        self.stdout.write(f"  ✓ Tạo mới:   {result['created']}")
+        self.stdout.write(f"  ✓ Cập nhật:  {result['updated']}")
+        self.stdout.write(f"  ✗ Bỏ qua:    {result['skipped']}")
+
+        for error in result["errors"]:
+            messages = "; ".join(
+                f"{field}: {', '.join(messages)}" for field, messages in error["errors"].items()
+            )
+            self.stdout.write(self.style.ERROR(f"  Dòng {error['row']}: {messages}"))
+        if result["errors_truncated"]:
+            self.stdout.write(self.style.WARNING("  ... (còn lỗi khác, tăng --max-errors để xem)"))
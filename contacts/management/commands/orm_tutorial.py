@@ -1,12 +1,126 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from django.db.models import Count, F, Prefetch, Q
 
 from contacts.models import Contact, ContactGroup, ContactGroupMembership
 
+# ========================================================================
+# BENCHMARK: các pattern của section 3 (joins) và 4 (aggregations)
+# ========================================================================
+# {tên: (nhóm, mô tả, hàm(scale) -> số dòng đã xử lý)}; pattern đầu tiên của mỗi nhóm
+# là mốc so sánh. Nhóm trong SCALED_GROUPS duyệt scale contact/membership đầu tiên, các nhóm
+# còn lại (aggregation) chạy trên toàn bảng, không phụ thuộc scale.
+BENCHMARKS = {}
+SCALED_GROUPS = {"contact-groups", "membership-fk"}
+
+
+def benchmark(group, description):
+    def register(func):
+        BENCHMARKS[func.__name__] = (group, description, func)
+        return func
+
+    return register
+
+
+@benchmark("contact-groups", "N+1: contact.groups.all() trong vòng lặp")
+def n_plus_one(scale):
+    rows = 0
+    for contact in Contact.objects.order_by("pk")[:scale]:
+        rows += len([group.name for group in contact.groups.all()])
+    return rows
+
+
+@benchmark("contact-groups", "prefetch_related('groups')")
+def prefetch_related(scale):
+    rows = 0
+    for contact in Contact.objects.order_by("pk").prefetch_related("groups")[:scale]:
+        rows += len([group.name for group in contact.groups.all()])
+    return rows
+
+
+@benchmark("contact-groups", "Prefetch() với queryset chỉ lấy id, name")
+def prefetch_object(scale):
+    groups = Prefetch("groups", queryset=ContactGroup.objects.only("id", "name"), to_attr="loaded")
+    rows = 0
+    for contact in Contact.objects.order_by("pk").prefetch_related(groups)[:scale]:
+        rows += len([group.name for group in contact.loaded])
+    return rows
+
+
+@benchmark("contact-groups", "values_list qua bảng membership (không tạo model)")
+def values_join(scale):
+    ids = Contact.objects.order_by("pk").values("pk")[:scale]
+    return len(
+        ContactGroupMembership.objects.filter(contact_id__in=ids).values_list(
+            "contact_id", "group__name"
+        )
+    )
+
+
+@benchmark("membership-fk", "N+1: membership.contact / membership.group")
+def fk_lazy(scale):
+    rows = 0
+    for membership in ContactGroupMembership.objects.order_by("pk")[:scale]:
+        rows += bool(membership.contact.first_name and membership.group.name)
+    return rows
+
+
+@benchmark("membership-fk", "select_related('contact', 'group')")
+def select_related(scale):
+    rows = 0
+    queryset = ContactGroupMembership.objects.order_by("pk").select_related("contact", "group")
+    for membership in queryset[:scale]:
+        rows += bool(membership.contact.first_name and membership.group.name)
+    return rows
+
+
+@benchmark("group-members", "annotate(Count('contacts'))")
+def annotate_count(scale):
+    return len(ContactGroup.objects.annotate(total=Count("contacts")).values_list("name", "total"))
+
+
+@benchmark("group-members", "cột member_count đếm sẵn")
+def stored_count(scale):
+    return len(ContactGroup.objects.values_list("name", "member_count"))
+
+
+@benchmark("group-favorites", "annotate(Count(filter=Q(...)))")
+def annotate_filtered_count(scale):
+    favorites = Count("contacts", filter=Q(contacts__is_favorite=True))
+    return len(ContactGroup.objects.annotate(favorites=favorites).values_list("name", "favorites"))
+
+
+@benchmark("contact-stats", "aggregate(Count, Count(filter))")
+def aggregate_counts(scale):
+    Contact.objects.aggregate(
+        total=Count("id"), favorite_count=Count("id", filter=Q(is_favorite=True))
+    )
+    return 1
+
+
+@benchmark("contact-stats", "hai lần count()")
+def separate_counts(scale):
+    Contact.objects.count()
+    Contact.objects.filter(is_favorite=True).count()
+    return 1
+
+
+@benchmark("group-types", "values('group_type').annotate(Count) = GROUP BY")
+def group_by_type(scale):
+    return len(ContactGroup.objects.values("group_type").annotate(count=Count("id")))
+
 
 class Command(BaseCommand):
-    help = "Django ORM Tutorial"
+    help = (
+        "Django ORM Tutorial; --benchmark đo thời gian, số query và bộ nhớ peak của các "
+        "pattern section 3-4 trên database hiện tại"
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -15,8 +129,37 @@ class Command(BaseCommand):
             choices=[1, 2, 3, 4, 5],
             help="Chọn phần muốn học (1-5)",
         )
+        parser.add_argument(
+            "--benchmark",
+            action="store_true",
+            help="Chạy benchmark các pattern thay vì tutorial",
+        )
+        parser.add_argument(
+            "--patterns",
+            nargs="+",
+            choices=list(BENCHMARKS),
+            help="Chỉ chạy các pattern này (mặc định: tất cả)",
+        )
+        parser.add_argument(
+            "--scale",
+            type=int,
+            nargs="+",
+            default=[100, 1000],
+            help="Số contact/membership mà pattern joins duyệt (mặc định: 100 1000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Số lần đo mỗi pattern (mặc định: 5)",
+        )
+        parser.add_argument("--output", help="Ghi kết quả ra file JSON")
 
     def handle(self, *args, **options):
+        if options["benchmark"]:
+            self.run_benchmark(options)
+            return
+
         section = options.get("section")
 
         self.stdout.write(self.style.SUCCESS("\n" + "=" * 70))
@@ -298,14 +441,15 @@ class Command(BaseCommand):
 
         # 4.2 - annotate(): Thêm field tính toán cho từng object
         self.stdout.write(self.style.HTTP_INFO("\n4.2 - annotate(): Thêm field tính toán"))
-        groups_with_count = ContactGroup.objects.annotate(member_count=Count("contacts")).order_by(
-            "-member_count"
+        # (Thực tế ContactGroup đã có cột member_count đếm sẵn, đây là cách tính lúc query)
+        groups_with_count = ContactGroup.objects.annotate(total_members=Count("contacts")).order_by(
+            "-total_members"
         )
 
         self.stdout.write("  → Groups theo số thành viên:\n")
         for group in groups_with_count:
             self.stdout.write(
-                f"    • {group.name}: {group.member_count} members "
+                f"    • {group.name}: {group.total_members} members "
                 f"(type: {group.get_group_type_display()})"
             )
 
@@ -434,3 +578,82 @@ class Command(BaseCommand):
         self.stdout.write("  ✅ Giữ transactions ngắn gọn (avoid long queries)")
         self.stdout.write("  ❌ KHÔNG gọi external APIs trong transaction")
         self.stdout.write("  ❌ KHÔNG đọc files/images trong transaction\n")
+
+    # ========================================================================
+    # BENCHMARK
+    # ========================================================================
+    def run_benchmark(self, options):
+        if options["repeat"] < 1 or min(options["scale"]) < 1:
+            raise CommandError("--repeat và --scale phải >= 1")
+        names = options["patterns"] or list(BENCHMARKS)
+
+        self.stdout.write(
+            f"{Contact.objects.count()} contacts, {ContactGroup.objects.count()} groups, "
+            f"{ContactGroupMembership.objects.count()} memberships; "
+            f"{options['repeat']} lần đo mỗi pattern\n"
+        )
+        self.stdout.write(
+            f"{'Pattern':<24} {'Scale':>6} {'Dòng':>7} {'Query':>6} {'Median ms':>10} "
+            f"{'Min ms':>9} {'Peak KiB':>9} {'So với mốc':>11}"
+        )
+
+        results = []
+        baselines = {}
+        for name in names:
+            group, description, func = BENCHMARKS[name]
+            scales = options["scale"] if group in SCALED_GROUPS else [None]
+            for scale in scales:
+                result = self._measure(name, func, scale, options["repeat"])
+                result.update(group=group, description=description)
+                # Mốc: pattern đầu tiên (theo thứ tự khai báo) của nhóm có mặt trong lần chạy
+                baseline = baselines.setdefault((group, scale), result)
+                result["speedup"] = round(baseline["median_ms"] / result["median_ms"], 2)
+                results.append(result)
+                self.stdout.write(
+                    f"{name:<24} {scale or '-':>6} {result['rows']:>7} {result['queries']:>6} "
+                    f"{result['median_ms']:>10} {result['min_ms']:>9} {result['peak_kib']:>9} "
+                    f"{result['speedup']:>10}x"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as stream:
+                json.dump({"repeat": options["repeat"], "results": results}, stream, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"\n✓ Đã ghi kết quả vào {options['output']}"))
+
+    @staticmethod
+    def _measure(name, func, scale, repeat):
+        """Lần chạy đầu (warmup) đếm query, repeat lần đo thời gian, một lần đo bộ nhớ."""
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            rows = func(scale)
+
+        timings = []
+        for _ in range(repeat):
+            gc.collect()
+            started = time.perf_counter()
+            func(scale)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        # tracemalloc làm chậm -> đo riêng, không tính vào thời gian
+        tracemalloc.start()
+        try:
+            func(scale)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "pattern": name,
+            "scale": scale,
+            "rows": rows,
+            "queries": queries,
+            "median_ms": round(statistics.median(timings), 2),
+            "min_ms": round(min(timings), 2),
+            "peak_kib": round(peak / 1024, 1),
+        }
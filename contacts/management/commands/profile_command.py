@@ -0,0 +1,56 @@
+import argparse
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from contacts.profiling import MODES, Profiler, parse_modes, profile_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Chạy một management command khác dưới profiler, ví dụ: "
+        "manage.py profile_command --modes cpu,stacks seed_data --contacts 50000. "
+        "Chỉ profile process hiện tại (không gồm worker của --workers)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--modes",
+            default="stacks,memory",
+            help=f"Các chế độ, phân cách bằng dấu phẩy: {', '.join(MODES)} "
+            "(mặc định: stacks,memory)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.PROFILING_SAMPLE_INTERVAL,
+            help="Chu kỳ lấy mẫu stack, giây",
+        )
+        parser.add_argument(
+            "--output-dir",
+            default=settings.PROFILING_DIR,
+            help="Thư mục ghi kết quả (mặc định: PROFILING_DIR)",
+        )
+        parser.add_argument("command_name", help="Command cần profile")
+        parser.add_argument(
+            "command_args",
+            nargs=argparse.REMAINDER,
+            help="Tham số truyền nguyên cho command",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            modes = parse_modes(options["modes"])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        name = options["command_name"]
+        profiler = Profiler(modes, options["interval"])
+        try:
+            with profiler:
+                call_command(name, *options["command_args"], stdout=self.stdout)
+        finally:
+            self.stdout.write(profiler.report())
+            for path in profiler.save(options["output_dir"], profile_name(name)):
+                self.stdout.write(self.style.SUCCESS(f"✓ {path}"))
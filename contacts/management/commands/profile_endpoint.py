@@ -0,0 +1,99 @@
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from contacts.profiling import MODES, Profiler, parse_modes, profile_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Gọi một URL N lần trong process (dữ liệu của database đang cấu hình) dưới profiler; "
+        "ghi collapsed stack cho flamegraph, pstats và top vị trí cấp phát bộ nhớ"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Đường dẫn, ví dụ /api/contacts/?search=nguyen")
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Số lần gọi được profile (mặc định: 20)",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=2,
+            help="Số lần gọi trước khi profile (mặc định: 2)",
+        )
+        parser.add_argument("--method", default="GET", help="HTTP method (mặc định: GET)")
+        parser.add_argument("--data", help="Body JSON cho POST/PATCH...")
+        parser.add_argument(
+            "--modes",
+            default="stacks,memory",
+            help=f"Các chế độ, phân cách bằng dấu phẩy: {', '.join(MODES)} "
+            "(mặc định: stacks,memory)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.PROFILING_SAMPLE_INTERVAL,
+            help="Chu kỳ lấy mẫu stack, giây",
+        )
+        parser.add_argument(
+            "--output-dir",
+            default=settings.PROFILING_DIR,
+            help="Thư mục ghi kết quả (mặc định: PROFILING_DIR)",
+        )
+        parser.add_argument(
+            "--with-cache",
+            action="store_true",
+            help="Giữ response cache (mặc định tắt để profile đường đi view -> ORM)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            modes = parse_modes(options["modes"])
+        except ValueError as exc:
+            raise CommandError(exc)
+        if options["repeat"] < 1:
+            raise CommandError("--repeat phải >= 1")
+        if options["data"]:
+            try:
+                json.loads(options["data"])
+            except ValueError as exc:
+                raise CommandError(f"--data không phải JSON hợp lệ: {exc}")
+
+        client = Client(HTTP_ACCEPT="application/json")
+        method = options["method"].upper()
+
+        def call():
+            return client.generic(
+                method,
+                options["url"],
+                options["data"] or "",
+                content_type="application/json",
+            )
+
+        statuses = Counter()
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            API_CACHE_ENABLED=settings.API_CACHE_ENABLED and options["with_cache"],
+        ):
+            for _ in range(options["warmup"]):
+                call()
+            with Profiler(modes, options["interval"]) as profiler:
+                for _ in range(options["repeat"]):
+                    statuses[call().status_code] += 1
+
+        self.stdout.write(profiler.report())
+        self.stdout.write(
+            f"Status: {', '.join(f'{code} x{count}' for code, count in sorted(statuses.items()))}"
+        )
+        paths = profiler.save(options["output_dir"], profile_name(method, options["url"]))
+        for path in paths:
+            self.stdout.write(self.style.SUCCESS(f"✓ {path}"))
+        if any(code >= 500 for code in statuses):
+            raise CommandError(f"{options['url']} trả về lỗi server")
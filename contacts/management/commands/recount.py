@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Max, Min
+
+from contacts.models import Contact, ContactGroup
+
+
+class Command(BaseCommand):
+    help = "Đếm lại Contact.group_count và ContactGroup.member_count (sửa lệch counter)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Số id mỗi lô (mặc định: 10000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Số luồng chạy song song, mỗi luồng một kết nối DB (mặc định: 4)",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        workers = options["workers"]
+
+        targets = [
+            ("Contacts", Contact.all_objects, "recount_groups"),
+            ("Groups", ContactGroup.objects, "recount_members"),
+        ]
+
+        for label, manager, method in targets:
+            self.stdout.write(f"\nĐang đếm lại {label}...")
+            chunks = self._id_chunks(manager, chunk_size)
+
+            fixed = 0
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(self._recount_chunk, manager, method, start, end)
+                    for start, end in chunks
+                ]
+                for future in as_completed(futures):
+                    fixed += future.result()
+
+            self.stdout.write(
+                self.style.SUCCESS(f"  ✓ {label}: {len(chunks)} lô, sửa {fixed} dòng bị lệch")
+            )
+
+    def _id_chunks(self, manager, chunk_size):
+        bounds = manager.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            return []
+        return [
+            (start, start + chunk_size)
+            for start in range(bounds["low"], bounds["high"] + 1, chunk_size)
+        ]
+
+    def _recount_chunk(self, manager, method, start, end):
+        try:
+            with transaction.atomic():
+                queryset = manager.filter(pk__gte=start, pk__lt=end)
+                return getattr(queryset, method)()
+        finally:
+            # Mỗi luồng có kết nối riêng -> đóng lại khi xong
+            connections.close_all()
@@ -1,35 +1,121 @@
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
 from contacts.models import Contact, ContactGroup, ContactGroupMembership
+from contacts.synthetic import SyntheticDataset, truncate_contact_data
+
+SUMMARY_GROUPS = 10  # Số group lớn nhất in trong thống kê
 
 
 class Command(BaseCommand):
-    help = "Tạo dữ liệu mẫu cho Contact Book"
+    help = (
+        "Tạo dữ liệu mẫu cho Contact Book (mặc định: vài contact viết tay; "
+        "--contacts N: sinh dữ liệu giả lập quy mô lớn)"
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
             "--clear",
             action="store_true",
-            help="Xóa toàn bộ data cũ trước khi seed",
+            help="Xóa toàn bộ data cũ (TRUNCATE) trước khi seed",
+        )
+        parser.add_argument(
+            "--contacts",
+            type=int,
+            help="Sinh N contact giả lập thay cho dữ liệu mẫu viết tay",
+        )
+        parser.add_argument(
+            "--groups",
+            type=int,
+            default=20,
+            help="Số group giả lập (mặc định: 20)",
+        )
+        parser.add_argument(
+            "--memberships-per-contact",
+            type=int,
+            default=2,
+            help="Số group mỗi contact tham gia (mặc định: 2)",
+        )
+        parser.add_argument(
+            "--zipf-exponent",
+            type=float,
+            default=1.0,
+            help="Độ lệch kích thước group theo Zipf, 0 = đều nhau (mặc định: 1.0)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Seed ngẫu nhiên, cùng seed cho cùng dữ liệu (mặc định: 42)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Số contact mỗi lô COPY (mặc định: 10000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Số process nạp song song, mỗi process một kết nối DB (mặc định: 1)",
         )
 
     def handle(self, *args, **options):
         if options["clear"]:
             self.stdout.write(self.style.WARNING("Đang xóa dữ liệu cũ..."))
-            ContactGroupMembership.objects.all().delete()
-            Contact.objects.all().delete()
-            ContactGroup.objects.all().delete()
+            truncate_contact_data()
             self.stdout.write(self.style.SUCCESS("✓ Đã xóa dữ liệu cũ"))
 
-        with transaction.atomic():
-            self._create_groups()
-            self._create_contacts()
-            self._assign_contacts_to_groups()
+        if options["contacts"] is not None:
+            self._load_synthetic(options)
+        else:
+            with transaction.atomic():
+                self._create_groups()
+                self._create_contacts()
+                self._assign_contacts_to_groups()
 
         self.stdout.write(self.style.SUCCESS("\n✓ Seed data thành công!"))
         self._print_summary()
 
+    def _load_synthetic(self, options):
+        try:
+            dataset = SyntheticDataset(
+                contacts=options["contacts"],
+                groups=options["groups"],
+                memberships_per_contact=options["memberships_per_contact"],
+                seed=options["seed"],
+                zipf_exponent=options["zipf_exponent"],
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"\nĐang sinh {options['contacts']} contacts, {options['groups']} groups, "
+            f"{options['memberships_per_contact']} group/contact ({options['workers']} process)..."
+        )
+        started = time.monotonic()
+
+        def progress(contacts, memberships):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"  {contacts}/{options['contacts']} contacts, {memberships} memberships "
+                f"({elapsed:.0f}s)"
+            )
+
+        result = dataset.load(progress=progress)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"  ✓ {result['contacts']} contacts, {result['groups']} groups, "
+                f"{result['memberships']} memberships trong {elapsed:.1f}s"
+            )
+        )
+
     def _create_groups(self):
         self.stdout.write("\n1. Đang tạo Groups...")
 
@@ -198,7 +284,7 @@ class Command(BaseCommand):
         ]
 
         for data in contacts_data:
-            contact, created = Contact.objects.get_or_create(email=data["email"], defaults=data)
+            contact, created = Contact.all_objects.get_or_create(email=data["email"], defaults=data)
             status = "✓ Tạo mới" if created else "○ Đã tồn tại"
             self.stdout.write(f"  {status}: {contact.get_full_name} ({contact.email})")
 
@@ -237,7 +323,7 @@ class Command(BaseCommand):
 
         for email, group, role in assignments:
             try:
-                contact = Contact.objects.get(email=email)
+                contact = Contact.all_objects.get(email=email)
                 membership, created = ContactGroupMembership.objects.get_or_create(
                     contact=contact, group=group, defaults={"role": role}
                 )
@@ -261,10 +347,9 @@ class Command(BaseCommand):
         self.stdout.write(f"⭐ Contacts yêu thích:   {favorite_contacts}")
         self.stdout.write(f"🔗 Tổng quan hệ:         {total_memberships}")
 
-        self.stdout.write("\n📊 Chi tiết Groups:")
-        for group in ContactGroup.objects.all():
-            member_count = group.contacts.count()
+        self.stdout.write(f"\n📊 Chi tiết Groups (tối đa {SUMMARY_GROUPS} group đông nhất):")
+        for group in ContactGroup.objects.order_by("-member_count", "name")[:SUMMARY_GROUPS]:
             self.stdout.write(
-                f"  • {group.name}: {member_count} thành viên "
+                f"  • {group.name}: {group.member_count} thành viên "
                 f"({group.get_group_type_display()})"
             )
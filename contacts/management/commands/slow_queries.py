@@ -0,0 +1,98 @@
+import json
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Xếp hạng query chậm (ghi bởi contacts/slow_queries.py) theo tổng thời gian, "
+        "gom theo fingerprint SQL; đọc cả các file log đã xoay vòng"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            default=settings.SLOW_QUERY_LOG_FILE,
+            help="File log query chậm (mặc định: SLOW_QUERY_LOG_FILE)",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Số fingerprint hiển thị (mặc định: 20)",
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="In kèm plan EXPLAIN mới nhất của mỗi fingerprint",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["file"])
+        # file.jsonl.5 (cũ nhất) ... file.jsonl (mới nhất) để plan sau cùng là plan mới nhất
+        rotated = [file for file in path.parent.glob(f"{path.name}.*") if file.suffix[1:].isdigit()]
+        files = sorted(rotated, key=lambda file: int(file.suffix[1:]), reverse=True)
+        if path.exists():
+            files.append(path)
+        if not files:
+            raise CommandError(
+                f"Không có file {path}. Bật ghi query chậm bằng SLOW_QUERY_THRESHOLD_MS > 0"
+            )
+
+        stats = {}
+        skipped = 0
+        for file in files:
+            with open(file, encoding="utf-8") as stream:
+                for line in stream:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    self._add(stats, entry)
+
+        ranked = sorted(stats.values(), key=lambda item: item["total_ms"], reverse=True)
+        total_calls = sum(item["calls"] for item in ranked)
+        self.stdout.write(
+            f"{total_calls} query chậm, {len(ranked)} fingerprint từ {len(files)} file"
+            + (f" (bỏ qua {skipped} dòng lỗi)" if skipped else "")
+        )
+        self.stdout.write(
+            f"\n{'#':>3} {'Fingerprint':<12} {'Lần':>6} {'Tổng ms':>10} {'TB ms':>9} "
+            f"{'Max ms':>9}  Nguồn chính"
+        )
+        for rank, item in enumerate(ranked[: options["limit"]], 1):
+            source, _ = item["sources"].most_common(1)[0]
+            self.stdout.write(
+                f"{rank:>3} {item['fingerprint']:<12} {item['calls']:>6} "
+                f"{item['total_ms']:>10.1f} {item['total_ms'] / item['calls']:>9.1f} "
+                f"{item['max_ms']:>9.1f}  {source}"
+            )
+            self.stdout.write(f"    {item['sql'][:200]}")
+            if options["plans"]:
+                plan = item["plan"] or "(chưa có plan - tăng SLOW_QUERY_EXPLAIN_SAMPLE_RATE)"
+                self.stdout.write("\n".join(f"      {row}" for row in plan.splitlines()))
+
+    @staticmethod
+    def _add(stats, entry):
+        item = stats.setdefault(
+            entry["fingerprint"],
+            {
+                "fingerprint": entry["fingerprint"],
+                "sql": entry["sql"],
+                "calls": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "sources": Counter(),
+                "plan": None,
+            },
+        )
+        item["calls"] += 1
+        item["total_ms"] += entry["duration_ms"]
+        item["max_ms"] = max(item["max_ms"], entry["duration_ms"])
+        item["sources"][entry.get("source") or "(ngoài request)"] += 1
+        if entry.get("plan"):
+            item["plan"] = entry["plan"]
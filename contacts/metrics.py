@@ -0,0 +1,235 @@
+"""
+Metrics Prometheus tại /metrics (bật khi METRICS_ENABLED): latency và kích thước response
+theo ViewSet/action, số query mỗi request, thời gian từng query SQL, kết nối DB mở mới hay
+dùng lại (CONN_MAX_AGE), hit/miss của response cache và số dòng các bảng chính.
+
+Chạy nhiều worker gunicorn/uvicorn: đặt PROMETHEUS_MULTIPROC_DIR (thư mục rỗng, dọn sạch mỗi
+lần khởi động server). Mỗi process ghi counter/histogram vào file mmap trong thư mục đó và
+/metrics gộp số liệu của mọi process; worker thoát nên gọi mark_process_dead(pid), ví dụ trong
+hook child_exit của gunicorn.
+"""
+
+import hmac
+import ipaddress
+import os
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from .models import Contact, ContactGroup, ContactGroupMembership
+from .timing import view_action
+
+REQUEST_DURATION = Histogram(
+    "contacts_api_request_duration_seconds",
+    "Thời gian xử lý request",
+    ["view", "action", "method", "status"],
+)
+RESPONSE_SIZE = Histogram(
+    "contacts_api_response_size_bytes",
+    "Kích thước body response",
+    ["view", "action"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+REQUEST_QUERIES = Histogram(
+    "contacts_api_request_queries",
+    "Số query SQL mỗi request",
+    ["view", "action"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+QUERY_DURATION = Histogram(
+    "contacts_db_query_duration_seconds",
+    "Thời gian mỗi query SQL",
+    ["database", "statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CONNECTIONS_OPENED = Counter(
+    "contacts_db_connections_opened",
+    "Số kết nối DB được mở mới",
+    ["database"],
+)
+REQUEST_CONNECTIONS = Counter(
+    "contacts_db_request_connections",
+    "Request có query SQL, theo kết nối mở mới (new) hay dùng lại nhờ CONN_MAX_AGE (reused)",
+    ["connection"],
+)
+CACHE_REQUESTS = Counter(
+    "contacts_api_cache_requests",
+    "Kết quả tra response cache (contacts/caching.py)",
+    ["endpoint", "outcome"],
+)
+
+STATEMENTS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+_request_stats = ContextVar("metrics_request_stats", default=None)
+
+
+class RequestStats:
+    """Đếm query của một request; object dùng chung cho cả thread sync_to_async của request."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.new_connection = False
+
+
+def observe_query(execute, sql, params, many, context):
+    """execute_wrapper gắn vào mọi kết nối DB."""
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        statement = sql.lstrip()[:6].upper()
+        QUERY_DURATION.labels(
+            context["connection"].alias, statement if statement in STATEMENTS else "OTHER"
+        ).observe(perf_counter() - started)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+
+
+def _connection_created(sender, connection, **kwargs):
+    CONNECTIONS_OPENED.labels(connection.alias).inc()
+    if observe_query not in connection.execute_wrappers:
+        # Đứng đầu danh sách: kết nối có thể được mở bên trong connection.execute_wrapper()
+        # (ServerTimingMiddleware, bench_api...), context manager đó pop() phần tử cuối
+        connection.execute_wrappers.insert(0, observe_query)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.new_connection = True
+
+
+def install():
+    """Đo mọi query SQL (gọi trong AppConfig.ready)."""
+    if settings.METRICS_ENABLED:
+        connection_created.connect(_connection_created, dispatch_uid="contacts.metrics")
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self._observe(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self._observe(request, response, stats)
+        return response
+
+    @staticmethod
+    def _observe(request, response, stats):
+        view, action = view_action(request)
+        view = view or "unresolved"
+        REQUEST_DURATION.labels(view, action, request.method, response.status_code).observe(
+            perf_counter() - stats.started
+        )
+        if not response.streaming:
+            RESPONSE_SIZE.labels(view, action).observe(len(response.content))
+        REQUEST_QUERIES.labels(view, action).observe(stats.queries)
+        if stats.queries:
+            REQUEST_CONNECTIONS.labels("new" if stats.new_connection else "reused").inc()
+
+
+class TableRowsCollector:
+    """
+    Số dòng contact/group/membership, tính lúc scrape (không lưu trong process nào).
+    PostgreSQL dùng ước lượng pg_class.reltuples (ANALYZE/autovacuum cập nhật) thay vì
+    COUNT(*) trên hàng triệu membership mỗi lần scrape.
+    """
+
+    models = (Contact, ContactGroup, ContactGroupMembership)
+
+    def collect(self):
+        tables = [model._meta.db_table for model in self.models]
+        estimates = {}
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT relname, reltuples::bigint FROM pg_class "
+                    "WHERE relname = ANY(%s) AND relkind = 'r' AND pg_table_is_visible(oid)",
+                    [tables],
+                )
+                # reltuples = -1: bảng chưa từng được ANALYZE
+                estimates = {table: rows for table, rows in cursor.fetchall() if rows >= 0}
+
+        family = GaugeMetricFamily(
+            "contacts_table_rows", "Số dòng (ước lượng) của bảng", labels=["table"]
+        )
+        for model, table in zip(self.models, tables):
+            rows = estimates.get(table)
+            if rows is None:
+                rows = model._base_manager.count()
+            family.add_metric([table], rows)
+        yield family
+
+
+_table_rows_registry = CollectorRegistry()
+_table_rows_registry.register(TableRowsCollector())
+
+
+def _authorized(request):
+    """Header Authorization: Bearer <METRICS_TOKEN> hoặc IP trong METRICS_ALLOWED_NETWORKS."""
+    token = settings.METRICS_TOKEN
+    scheme, _, sent = request.headers.get("Authorization", "").partition(" ")
+    if token and scheme.lower() == "bearer" and hmac.compare_digest(sent.encode(), token.encode()):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network.strip())
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def metrics_view(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not _authorized(request):
+        # Không để lộ metrics (và không chạy query pg_class) cho người ngoài
+        return HttpResponse("Forbidden\n", status=403, content_type="text/plain")
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    output = generate_latest(registry) + generate_latest(_table_rows_registry)
+    return HttpResponse(output, content_type=CONTENT_TYPE_LATEST)
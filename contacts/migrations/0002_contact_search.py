@@ -0,0 +1,109 @@
+# Generated by Django 6.0 on 2026-10-16 09:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    TrigramExtension,
+    UnaccentExtension,
+)
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+BACKFILL_BATCH_SIZE = 5000
+
+CREATE_SEARCH_TRIGGER = """
+CREATE OR REPLACE FUNCTION contacts_search_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', unaccent(
+            coalesce(NEW.last_name, '') || ' ' || coalesce(NEW.first_name, '')
+        )), 'A')
+        || setweight(to_tsvector('simple', unaccent(coalesce(NEW.email, ''))), 'B')
+        || setweight(to_tsvector('simple', coalesce(NEW.phone, '')), 'C');
+    NEW.search_document := lower(unaccent(
+        concat_ws(' ', NEW.last_name, NEW.first_name, NEW.email, NEW.phone)
+    ));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER contacts_search_update
+    BEFORE INSERT OR UPDATE OF first_name, last_name, email, phone ON contacts
+    FOR EACH ROW EXECUTE FUNCTION contacts_search_update();
+"""
+
+DROP_SEARCH_TRIGGER = """
+DROP TRIGGER IF EXISTS contacts_search_update ON contacts;
+DROP FUNCTION IF EXISTS contacts_search_update();
+"""
+
+
+def backfill_search_columns(apps, schema_editor):
+    """
+    Cập nhật search_vector/search_document cho dữ liệu cũ theo từng lô id.
+    Migration không atomic nên mỗi lô được commit riêng, tránh khóa cả bảng.
+    """
+    Contact = apps.get_model("contacts", "Contact")
+    bounds = Contact.objects.aggregate(low=Min("id"), high=Max("id"))
+    if bounds["low"] is None:
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for start in range(bounds["low"], bounds["high"] + 1, BACKFILL_BATCH_SIZE):
+            # Gán lại first_name để trigger tự tính lại hai cột tìm kiếm
+            cursor.execute(
+                "UPDATE contacts SET first_name = first_name WHERE id >= %s AND id < %s",
+                [start, start + BACKFILL_BATCH_SIZE],
+            )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("contacts", "0001_initial"),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="contact",
+            name="search_document",
+            field=models.TextField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Họ tên, email, SĐT viết thường, đã bỏ dấu (dùng cho trigram index)",
+                verbose_name="Văn bản tìm kiếm",
+            ),
+        ),
+        migrations.AddField(
+            model_name="contact",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False,
+                help_text="tsvector của họ tên, email, SĐT (đã bỏ dấu)",
+                null=True,
+                verbose_name="Chỉ mục tìm kiếm",
+            ),
+        ),
+        migrations.RunSQL(CREATE_SEARCH_TRIGGER, DROP_SEARCH_TRIGGER),
+        migrations.RunPython(backfill_search_columns, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name="contact",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="idx_contact_search"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="contact",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_document"],
+                name="idx_contact_search_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
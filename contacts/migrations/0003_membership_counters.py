@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-16 10:05
+
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+BACKFILL_BATCH_SIZE = 5000
+
+BACKFILL_GROUP_COUNT = """
+UPDATE contacts c
+SET group_count = (
+    SELECT count(*) FROM contact_group_memberships m WHERE m.contact_id = c.id
+)
+WHERE c.id >= %s AND c.id < %s
+"""
+
+BACKFILL_MEMBER_COUNT = """
+UPDATE contact_groups g
+SET member_count = (
+    SELECT count(*) FROM contact_group_memberships m WHERE m.group_id = g.id
+)
+WHERE g.id >= %s AND g.id < %s
+"""
+
+
+def backfill_counters(apps, schema_editor):
+    """Đếm counter cho dữ liệu cũ theo từng lô id, mỗi lô commit riêng."""
+    targets = [
+        (apps.get_model("contacts", "Contact"), BACKFILL_GROUP_COUNT),
+        (apps.get_model("contacts", "ContactGroup"), BACKFILL_MEMBER_COUNT),
+    ]
+
+    with schema_editor.connection.cursor() as cursor:
+        for model, sql in targets:
+            bounds = model.objects.aggregate(low=Min("id"), high=Max("id"))
+            if bounds["low"] is None:
+                continue
+            for start in range(bounds["low"], bounds["high"] + 1, BACKFILL_BATCH_SIZE):
+                cursor.execute(sql, [start, start + BACKFILL_BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("contacts", "0002_contact_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contact",
+            name="group_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Đếm sẵn, do signals cập nhật khi thêm/xóa khỏi nhóm",
+                verbose_name="Số nhóm",
+            ),
+        ),
+        migrations.AddField(
+            model_name="contactgroup",
+            name="member_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Đếm sẵn, do signals cập nhật khi thêm/xóa thành viên",
+                verbose_name="Số thành viên",
+            ),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
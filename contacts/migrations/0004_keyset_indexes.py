@@ -0,0 +1,59 @@
+# Generated by Django 6.0 on 2026-10-16 11:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("contacts", "0003_membership_counters"),
+    ]
+
+    operations = [
+        # Tạo index mới (có id làm tiebreaker cho keyset pagination) trước khi bỏ index cũ.
+        # Index của contact là partial WHERE is_active ngay từ đầu (list chỉ đọc contact đang
+        # hoạt động, xem 0005), không tạo bản đầy đủ rồi lại bỏ
+        AddIndexConcurrently(
+            model_name="contact",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["last_name", "first_name", "id"],
+                name="idx_contact_active_name",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="contact",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-created_at", "-id"],
+                name="idx_contact_active_created",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="contactgroup",
+            index=models.Index(fields=["-created_at", "-id"], name="idx_group_created_id"),
+        ),
+        AddIndexConcurrently(
+            model_name="contactgroupmembership",
+            index=models.Index(fields=["-joined_at", "-id"], name="idx_membership_joined_id"),
+        ),
+        RemoveIndexConcurrently(
+            model_name="contact",
+            name="idx_contact_name",
+        ),
+        RemoveIndexConcurrently(
+            model_name="contact",
+            name="idx_contact_created",
+        ),
+        RemoveIndexConcurrently(
+            model_name="contactgroup",
+            name="idx_group_created",
+        ),
+        RemoveIndexConcurrently(
+            model_name="contactgroupmembership",
+            name="idx_membership_joined",
+        ),
+    ]
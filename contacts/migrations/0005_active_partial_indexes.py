@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-16 13:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("contacts", "0004_keyset_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="contact",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("is_favorite", True)),
+                fields=["last_name", "first_name", "id"],
+                name="idx_contact_active_favorite",
+            ),
+        ),
+        # Index trên cột boolean gần như không chọn lọc được -> bỏ
+        RemoveIndexConcurrently(
+            model_name="contact",
+            name="idx_contact_favorite",
+        ),
+        RemoveIndexConcurrently(
+            model_name="contact",
+            name="idx_contact_active",
+        ),
+        migrations.AlterField(
+            model_name="contact",
+            name="is_active",
+            field=models.BooleanField(
+                default=True, help_text="Soft delete: False = đã xóa", verbose_name="Hoạt động"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="contact",
+            name="is_favorite",
+            field=models.BooleanField(
+                default=False, help_text="Đánh dấu contact quan trọng", verbose_name="Yêu thích"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-16 16:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("contacts", "0005_active_partial_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="contactgroupmembership",
+            index=models.Index(
+                fields=["group", "joined_at", "contact"], name="idx_membership_group_joined"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-17 07:15
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("contacts", "0006_membership_group_joined_index"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="contact",
+            index=models.Index(fields=["updated_at"], name="idx_contact_updated"),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 07:25
+
+import django.db.models.manager
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contacts", "0007_contact_updated_index"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="contact",
+            options={
+                "default_manager_name": "all_objects",
+                "ordering": ["last_name", "first_name"],
+                "verbose_name": "Liên hệ",
+                "verbose_name_plural": "Các liên hệ",
+            },
+        ),
+        migrations.AlterModelManagers(
+            name="contact",
+            managers=[
+                ("all_objects", django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -1,5 +1,10 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import EmailValidator, RegexValidator
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+from django.dispatch import Signal
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -17,6 +22,234 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
+# Gửi sau các thao tác hàng loạt không có post_save/post_delete (update, bulk_*, delete nhanh).
+# sender: model bị thay đổi. Xem contacts/signals.py (invalidate cache).
+queryset_updated = Signal()
+
+
+class NotifyingQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            queryset_updated.send(sender=self.model)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        if created:
+            queryset_updated.send(sender=self.model)
+        return created
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        if rows:
+            queryset_updated.send(sender=self.model)
+        return rows
+
+    def delete(self):
+        deleted, per_model = super().delete()
+        if deleted:
+            queryset_updated.send(sender=self.model)
+        return deleted, per_model
+
+
+def _membership_count(field):
+    """Subquery đếm số membership theo contact/group của dòng ngoài (OuterRef)."""
+    memberships = (
+        ContactGroupMembership.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(memberships), 0)
+
+
+class ContactGroupQuerySet(NotifyingQuerySet):
+    def recount_members(self):
+        """Tính lại member_count từ bảng membership, chỉ ghi các dòng bị lệch."""
+        actual = _membership_count("group")
+        return (
+            self.alias(actual_members=actual)
+            .exclude(member_count=models.F("actual_members"))
+            .update(member_count=actual, updated_at=Now())
+        )
+
+
+# Đổi cờ boolean hàng loạt trong một câu lệnh: chỉ dòng thực sự đổi mới được ghi (và tăng
+# updated_at cho ETag/cache). {contacts} là SQL của queryset Contact (chỉ cột id).
+BULK_SET_FLAG = """
+WITH selected AS (
+    {contacts}
+),
+updated AS (
+    UPDATE contacts c SET {column} = %s, updated_at = now()
+    FROM selected s
+    WHERE c.id = s.id AND c.{column} <> %s
+    RETURNING c.id
+)
+SELECT (SELECT count(*) FROM selected), (SELECT count(*) FROM updated)
+"""
+
+TOGGLE_FAVORITE = """
+UPDATE contacts c SET is_favorite = NOT c.is_favorite, updated_at = now()
+FROM ({contacts}) s
+WHERE c.id = s.id
+RETURNING c.id, c.is_favorite
+"""
+
+
+class ContactQuerySet(NotifyingQuerySet):
+    FLAG_FIELDS = ("is_favorite", "is_active")
+
+    def set_flag(self, field, value):
+        """
+        Đặt is_favorite/is_active = value cho mọi contact trong queryset bằng một câu UPDATE.
+        Trả về (số contact khớp, số contact được cập nhật).
+        """
+        if field not in self.FLAG_FIELDS:
+            raise ValueError(f"Không hỗ trợ field: {field}")
+        column = self.model._meta.get_field(field).column
+        [(matched, changed)] = self._execute(BULK_SET_FLAG, [value, value], column=column)
+        if changed:
+            queryset_updated.send(sender=self.model)
+        return matched, changed
+
+    def favorite(self):
+        return self.set_flag("is_favorite", True)
+
+    def unfavorite(self):
+        return self.set_flag("is_favorite", False)
+
+    def soft_delete(self):
+        return self.set_flag("is_active", False)
+
+    def restore(self):
+        return self.set_flag("is_active", True)
+
+    def toggle_favorite(self):
+        """is_favorite = NOT is_favorite bằng UPDATE ... RETURNING, trả về {id: is_favorite mới}."""
+        toggled = dict(self._execute(TOGGLE_FAVORITE, []))
+        if toggled:
+            queryset_updated.send(sender=self.model)
+        return toggled
+
+    def _execute(self, sql, params, **parts):
+        contacts_sql, contacts_params = self.order_by().values("id").query.sql_with_params()
+        # SQL của queryset luôn đứng trước các tham số còn lại trong câu lệnh. Một câu lệnh
+        # duy nhất đã atomic, không cần transaction.atomic (thêm SAVEPOINT khi lồng)
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql.format(contacts=contacts_sql, **parts), [*contacts_params, *params])
+            return cursor.fetchall()
+
+    def recount_groups(self):
+        """Tính lại group_count từ bảng membership, chỉ ghi các dòng bị lệch."""
+        actual = _membership_count("contact")
+        return (
+            self.alias(actual_groups=actual)
+            .exclude(group_count=models.F("actual_groups"))
+            .update(group_count=actual, updated_at=Now())
+        )
+
+
+class ActiveContactManager(models.Manager.from_queryset(ContactQuerySet)):
+    """
+    Contact.objects: bỏ qua contact đã soft delete (is_active=False), nhờ đó query khớp
+    với các partial index WHERE is_active; API và code ứng dụng dùng manager này.
+    Contact.all_objects (default manager, xem Meta) gồm cả contact đã xóa: kiểm tra unique,
+    admin, restore.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
+
+class ContactGroupMembershipQuerySet(NotifyingQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create không gửi post_save -> đếm lại counter cho các dòng liên quan
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            created = super().bulk_create(objs, *args, **kwargs)
+            self._refresh_counters({obj.contact_id for obj in objs}, {obj.group_id for obj in objs})
+        return created
+
+    def delete(self):
+        """
+        Xóa bằng một câu DELETE duy nhất (không gửi post_delete từng dòng),
+        rồi đếm lại counter cho các contact/group bị ảnh hưởng.
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            affected = list(self.order_by().values_list("contact_id", "group_id"))
+            deleted = self._raw_delete(self.db)
+            self._refresh_counters(
+                {contact_id for contact_id, _ in affected},
+                {group_id for _, group_id in affected},
+            )
+        if deleted:
+            queryset_updated.send(sender=self.model)
+        return deleted, {self.model._meta.label: deleted}
+
+    def _refresh_counters(self, contact_ids, group_ids):
+        if contact_ids:
+            Contact.all_objects.using(self.db).filter(pk__in=contact_ids).recount_groups()
+        if group_ids:
+            ContactGroup.objects.using(self.db).filter(pk__in=group_ids).recount_members()
+
+
+# Thêm/xóa membership hàng loạt trong một câu lệnh; counter được cập nhật ngay trong
+# các CTE (không qua signals). {contacts} là SQL của queryset Contact (chỉ cột id).
+BULK_ADD_MEMBERS = """
+WITH selected AS (
+    {contacts}
+),
+candidates AS (
+    SELECT c.id AS contact_id, coalesce(r.role, %s) AS role
+    FROM selected c
+    LEFT JOIN unnest(%s::bigint[], %s::varchar[]) AS r(contact_id, role) ON r.contact_id = c.id
+),
+inserted AS (
+    INSERT INTO contact_group_memberships (contact_id, group_id, role, joined_at)
+    SELECT contact_id, %s, role, now() FROM candidates
+    ON CONFLICT (contact_id, group_id) DO NOTHING
+    RETURNING contact_id
+),
+contact_counters AS (
+    UPDATE contacts c SET group_count = c.group_count + 1, updated_at = now()
+    FROM inserted i
+    WHERE c.id = i.contact_id
+),
+group_counter AS (
+    UPDATE contact_groups g SET member_count = g.member_count + n.total, updated_at = now()
+    FROM (SELECT count(*) AS total FROM inserted) n
+    WHERE g.id = %s AND n.total > 0
+)
+SELECT (SELECT count(*) FROM candidates), (SELECT count(*) FROM inserted)
+"""
+
+BULK_REMOVE_MEMBERS = """
+WITH candidates AS (
+    SELECT c.id AS contact_id FROM ({contacts}) c
+),
+deleted AS (
+    DELETE FROM contact_group_memberships m
+    USING candidates c
+    WHERE m.group_id = %s AND m.contact_id = c.contact_id
+    RETURNING m.contact_id
+),
+contact_counters AS (
+    UPDATE contacts c SET group_count = c.group_count - 1, updated_at = now()
+    FROM deleted d
+    WHERE c.id = d.contact_id
+),
+group_counter AS (
+    UPDATE contact_groups g SET member_count = g.member_count - n.total, updated_at = now()
+    FROM (SELECT count(*) AS total FROM deleted) n
+    WHERE g.id = %s AND n.total > 0
+)
+SELECT (SELECT count(*) FROM candidates), (SELECT count(*) FROM deleted)
+"""
+
+
 class ContactGroup(TimeStampedModel):
     class GroupType(models.TextChoices):
         FAMILY = "FAMILY", _("Gia đình")
@@ -45,6 +278,15 @@ class ContactGroup(TimeStampedModel):
         blank=True, null=True, verbose_name=_("Mô tả"), help_text=_("Mô tả chi tiết về nhóm này")
     )
 
+    member_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=_("Số thành viên"),
+        help_text=_("Đếm sẵn, do signals cập nhật khi thêm/xóa thành viên"),
+    )
+
+    objects = ContactGroupQuerySet.as_manager()
+
     class Meta:
         db_table = "contact_groups"
         verbose_name = _("Nhóm liên hệ")
@@ -54,7 +296,7 @@ class ContactGroup(TimeStampedModel):
         indexes = [
             models.Index(fields=["name"], name="idx_group_name"),
             models.Index(fields=["group_type"], name="idx_group_type"),
-            models.Index(fields=["-created_at"], name="idx_group_created"),
+            models.Index(fields=["-created_at", "-id"], name="idx_group_created_id"),
         ]
 
     def __str__(self):
@@ -63,10 +305,6 @@ class ContactGroup(TimeStampedModel):
     def __repr__(self):
         return f"<ContactGroup(id={self.id}, name='{self.name}', type='{self.group_type}')>"
 
-    @property
-    def member_count(self):
-        return self.contacts.count()
-
     def add_contact(self, contact, role=None):
         membership, created = ContactGroupMembership.objects.get_or_create(
             contact=contact, group=self, defaults={"role": role}
@@ -76,6 +314,36 @@ class ContactGroup(TimeStampedModel):
     def remove_contact(self, contact):
         ContactGroupMembership.objects.filter(contact=contact, group=self).delete()
 
+    def bulk_add_contacts(self, contacts, role=None, roles=None):
+        """
+        Thêm mọi contact trong queryset vào group bằng một câu INSERT ... SELECT ...
+        ON CONFLICT DO NOTHING. roles: {contact_id: role} cho từng dòng (mặc định: role).
+        Trả về (số contact khớp, số membership được thêm).
+        """
+        roles = roles or {}
+        return self._run_bulk_members(
+            BULK_ADD_MEMBERS,
+            contacts,
+            [role, list(roles), list(roles.values()), self.pk, self.pk],
+        )
+
+    def bulk_remove_contacts(self, contacts):
+        """Xóa membership của các contact trong queryset bằng DELETE ... USING.
+        Trả về (số contact khớp, số membership bị xóa)."""
+        return self._run_bulk_members(BULK_REMOVE_MEMBERS, contacts, [self.pk, self.pk])
+
+    def _run_bulk_members(self, sql, contacts, params):
+        contacts_sql, contacts_params = contacts.order_by().values("id").query.sql_with_params()
+        # SQL của queryset contact luôn đứng đầu câu lệnh -> tham số của nó đứng trước
+        with transaction.atomic(using=contacts.db), connections[contacts.db].cursor() as cursor:
+            cursor.execute(sql.format(contacts=contacts_sql), [*contacts_params, *params])
+            matched, changed = cursor.fetchone()
+
+        if changed:
+            for model in (ContactGroupMembership, Contact, ContactGroup):
+                queryset_updated.send(sender=model)
+        return matched, changed
+
 
 class Contact(TimeStampedModel):
     phone_regex = RegexValidator(
@@ -129,28 +397,77 @@ class Contact(TimeStampedModel):
         default=False,
         verbose_name=_("Yêu thích"),
         help_text=_("Đánh dấu contact quan trọng"),
-        db_index=True,
     )
 
     is_active = models.BooleanField(
         default=True,
         verbose_name=_("Hoạt động"),
         help_text=_("Soft delete: False = đã xóa"),
-        db_index=True,
     )
 
+    # Hai cột dưới đây do trigger contacts_search_update trong DB tự cập nhật
+    # (xem migration 0002), kể cả khi insert/update bằng SQL thô hoặc COPY.
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name=_("Chỉ mục tìm kiếm"),
+        help_text=_("tsvector của họ tên, email, SĐT (đã bỏ dấu)"),
+    )
+
+    search_document = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name=_("Văn bản tìm kiếm"),
+        help_text=_("Họ tên, email, SĐT viết thường, đã bỏ dấu (dùng cho trigram index)"),
+    )
+
+    group_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=_("Số nhóm"),
+        help_text=_("Đếm sẵn, do signals cập nhật khi thêm/xóa khỏi nhóm"),
+    )
+
+    objects = ActiveContactManager()
+    all_objects = ContactQuerySet.as_manager()
+
     class Meta:
         db_table = "contacts"
+        # Kiểm tra unique (DRF UniqueValidator/UniqueTogetherValidator, ModelForm trong admin,
+        # validate_constraints) và quan hệ ngược dùng _default_manager: phải gồm cả contact
+        # đã soft delete, nếu không trùng với dòng đã xóa sẽ thành IntegrityError (500)
+        default_manager_name = "all_objects"
         verbose_name = _("Liên hệ")
         verbose_name_plural = _("Các liên hệ")
         ordering = ["last_name", "first_name"]
 
         indexes = [
-            models.Index(fields=["last_name", "first_name"], name="idx_contact_name"),
+            # Partial index: list/favorites chỉ đọc contact đang hoạt động
+            models.Index(
+                fields=["last_name", "first_name", "id"],
+                name="idx_contact_active_name",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["last_name", "first_name", "id"],
+                name="idx_contact_active_favorite",
+                condition=models.Q(is_active=True, is_favorite=True),
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="idx_contact_active_created",
+                condition=models.Q(is_active=True),
+            ),
+            # max(updated_at) trên cả bảng: fingerprint ETag của list (contacts/conditional.py)
+            models.Index(fields=["updated_at"], name="idx_contact_updated"),
             models.Index(fields=["email"], name="idx_contact_email"),
-            models.Index(fields=["is_favorite"], name="idx_contact_favorite"),
-            models.Index(fields=["is_active"], name="idx_contact_active"),
-            models.Index(fields=["-created_at"], name="idx_contact_created"),
+            GinIndex(fields=["search_vector"], name="idx_contact_search"),
+            GinIndex(
+                fields=["search_document"],
+                name="idx_contact_search_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
         ]
 
         constraints = [
@@ -174,10 +491,6 @@ class Contact(TimeStampedModel):
     def get_full_name(self):
         return f"{self.last_name} {self.first_name}".strip()
 
-    @property
-    def group_count(self):
-        return self.groups.count()
-
     @property
     def is_in_groups(self):
         return self.groups.exists()
@@ -240,6 +553,8 @@ class ContactGroupMembership(models.Model):
         help_text=_("Thời điểm contact được thêm vào nhóm"),
     )
 
+    objects = ContactGroupMembershipQuerySet.as_manager()
+
     class Meta:
         db_table = "contact_group_memberships"
         verbose_name = _("Thành viên nhóm")
@@ -250,12 +565,32 @@ class ContactGroupMembership(models.Model):
 
         indexes = [
             models.Index(fields=["contact", "group"], name="idx_membership_contact_group"),
-            models.Index(fields=["-joined_at"], name="idx_membership_joined"),
+            models.Index(fields=["-joined_at", "-id"], name="idx_membership_joined_id"),
+            # GET /api/groups/{id}/members/: thành viên mới nhất trước, contact_id làm tiebreaker
+            models.Index(
+                fields=["group", "joined_at", "contact"], name="idx_membership_group_joined"
+            ),
         ]
 
     def __str__(self):
         role_str = f" ({self.role})" if self.role else ""
         return f"{self.contact.get_full_name} - {self.group.name}{role_str}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Ghi nhớ contact/group lúc load để signals biết membership bị chuyển sang chỗ khác
+        instance._loaded_keys = (
+            instance.__dict__.get("contact_id"),
+            instance.__dict__.get("group_id"),
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        # post_save cập nhật counter trong cùng transaction với câu INSERT/UPDATE
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._loaded_keys = (self.contact_id, self.group_id)
+
     def __repr__(self):
         return f"<ContactGroupMembership(contact={self.contact_id}, group={self.group_id}, role='{self.role}')>"
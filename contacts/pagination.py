@@ -0,0 +1,247 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _split_ordering(field):
+    """Tách "-joined_at" thành ("joined_at", True)."""
+    return (field[1:], True) if field.startswith("-") else (field, False)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination trên thứ tự hiện tại của queryset, thêm id làm tiebreaker.
+
+    Cursor chứa giá trị các cột sắp xếp của dòng cuối trang, trang kế tiếp lọc bằng
+    (a, b, id) > (x, y, z) nên Postgres đi thẳng vào composite index, không OFFSET
+    và không COUNT -> thời gian lấy trang không phụ thuộc độ sâu.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = "Cursor không hợp lệ"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._set_page(list(self._page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Như paginate_queryset, lấy dòng bằng async ORM (cho view async)."""
+        return self._set_page([row async for row in self._page_queryset(queryset, request, view)])
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset, view)
+
+        self.position, self.reverse = self.decode_cursor(request)
+
+        ordering = self._reverse(self.ordering) if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._after(ordering, self.position))
+        return queryset[: self.page_size + 1]
+
+    def _set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_ordering(self, queryset, view):
+        """
+        Lấy thứ tự đã được OrderingFilter/search áp lên queryset (fallback: view.ordering
+        hoặc Meta.ordering) và thêm id làm tiebreaker nếu chưa có field unique nào.
+        """
+        ordering = list(queryset.query.order_by)
+        if not ordering:
+            ordering = list(getattr(view, "ordering", None) or queryset.model._meta.ordering)
+
+        for field in ordering:
+            if not isinstance(field, str) or "__" in field:
+                raise ImproperlyConfigured(
+                    "KeysetPagination chỉ hỗ trợ sắp xếp theo field/annotation của model, "
+                    f"không hỗ trợ {field!r}"
+                )
+
+        if not any(self._is_unique(queryset.model, field) for field in ordering):
+            _, descending = _split_ordering(ordering[0])
+            ordering.append("-pk" if descending else "pk")
+        return ordering
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            position, reverse = payload["p"], bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, row, reverse):
+        position = [
+            self._serialize(getattr(row, _split_ordering(field)[0])) for field in self.ordering
+        ]
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _after(self, ordering, position):
+        """
+        Điều kiện "đứng sau position" theo thứ tự ordering, dạng
+        a >= x AND (a > x OR (a = x AND (b > y OR (b = y AND id > z))))
+        -- vế đầu giúp Postgres bắt đầu range scan trên index.
+        """
+        condition = None
+        for field, value in reversed(list(zip(ordering, position))):
+            name, descending = _split_ordering(field)
+            strict = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            condition = strict if condition is None else strict | (Q(**{name: value}) & condition)
+
+        name, descending = _split_ordering(ordering[0])
+        return Q(**{f"{name}__{'lte' if descending else 'gte'}": position[0]}) & condition
+
+    @staticmethod
+    def _reverse(ordering):
+        return [field[1:] if field.startswith("-") else f"-{field}" for field in ordering]
+
+    @staticmethod
+    def _is_unique(model, field):
+        name, _ = _split_ordering(field)
+        if name == "pk":
+            return True
+        try:
+            return model._meta.get_field(name).unique
+        except FieldDoesNotExist:
+            return False
+
+    @staticmethod
+    def _serialize(value):
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        return value
+
+
+class ContactBookPagination(PageNumberPagination):
+    """
+    Mặc định vẫn là ?page=N như trước (có count).
+    Thêm ?pagination=cursor (hoặc đang đi theo link ?cursor=...) để dùng KeysetPagination.
+    """
+
+    mode_query_param = "pagination"
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Bản async cho view async: COUNT bằng acount() và lấy trang bằng async for,
+        phần còn lại (số trang, link next/previous, lỗi trang) dùng chung với bản sync.
+        """
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # count là cached_property: gán trước để paginator.page() không gọi count() sync
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            )
+        self.page.object_list = [row async for row in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def get_next_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_next_link()
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_previous_link()
+        return super().get_previous_link()
@@ -0,0 +1,24 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+
+from .renderers import FastJSONRenderer, orjson
+
+UTF8_ENCODINGS = {"utf-8", "utf8"}
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser dùng orjson (nếu đã cài) cho body UTF-8. orjson luôn từ chối NaN/Infinity
+    nên chỉ dùng khi STRICT_JSON; trường hợp khác quay về JSONParser của DRF.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = get_encoding(parser_context or {})
+        if orjson is None or not self.strict or encoding.lower() not in UTF8_ENCODINGS:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
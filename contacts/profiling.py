@@ -0,0 +1,265 @@
+"""
+Profile theo yêu cầu cho request (ProfilingMiddleware) và management command
+(profile_endpoint, profile_command). Các chế độ, dùng riêng hoặc kết hợp ("cpu,memory"):
+
+- cpu: cProfile của thread gọi -> file .prof (pstats/snakeviz) + top hàm theo cumulative
+- stacks: lấy mẫu stack mọi thread theo chu kỳ -> collapsed stack (.folded) cho
+  flamegraph.pl / speedscope, mỗi stack bắt đầu bằng tên thread
+- memory: tracemalloc -> peak và top vị trí cấp phát còn giữ lúc kết thúc (chậm 2-3 lần,
+  không nên kết hợp khi cần số liệu thời gian)
+
+Với request: header "X-Profile: cpu" hoặc ?_profile=cpu, chỉ khi PROFILING_ENABLED và người
+gọi là staff hoặc gửi header X-Profile-Token khớp PROFILING_TOKEN. Kết quả lưu trong
+PROFILING_DIR (tên file ở header X-Profile-Files); thêm ?_profile_output=inline để nhận báo
+cáo text thay cho response. Response cache (HIT) bỏ qua view -> gửi kèm Cache-Control: no-cache.
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from functools import cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.text import slugify
+
+MODES = ("cpu", "stacks", "memory")
+TRACEMALLOC_FRAMES = 10
+TOP = 25
+
+
+def parse_modes(raw):
+    modes = [mode.strip() for mode in raw.split(",") if mode.strip()]
+    unknown = sorted(set(modes) - set(MODES))
+    if not modes or unknown:
+        raise ValueError(
+            f"Chế độ profile không hợp lệ: {', '.join(unknown) or raw} "
+            f"(chọn trong {', '.join(MODES)})"
+        )
+    return modes
+
+
+@cache
+def _short_path(filename):
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1 :]
+    return filename
+
+
+class StackSampler(threading.Thread):
+    """Đếm stack của mọi thread (trừ chính nó) mỗi interval giây."""
+
+    def __init__(self, interval):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        names = {}
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(
+                        f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfilerBusy(RuntimeError):
+    """Đang có Profiler khác chạy trong process."""
+
+
+# tracemalloc và cProfile là trạng thái chung của cả process (Python 3.12+ chỉ cho một
+# profiler hoạt động): mỗi lúc chỉ một Profiler chạy, Profiler thứ hai nhận ProfilerBusy
+_active = threading.Lock()
+
+
+class Profiler:
+    """
+    Context manager chạy các chế độ đã chọn quanh một đoạn code:
+
+        with Profiler(["cpu", "memory"]) as profiler:
+            ...
+        profiler.save(directory, name)
+
+    Raise ProfilerBusy nếu một Profiler khác đang chạy (ví dụ request đồng thời).
+    """
+
+    def __init__(self, modes, interval=0.005):
+        self.modes = modes
+        self.interval = interval
+        self.profile = None
+        self.sampler = None
+        self.snapshot = None
+        self.peak = 0
+
+    def __enter__(self):
+        if not _active.acquire(blocking=False):
+            raise ProfilerBusy("Đang có request/lệnh khác được profile, hãy thử lại sau")
+        try:
+            if "memory" in self.modes:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            if "stacks" in self.modes:
+                self.sampler = StackSampler(self.interval)
+                self.sampler.start()
+            if "cpu" in self.modes:
+                self.profile = cProfile.Profile()
+                self.profile.enable()
+        except BaseException:
+            self.__exit__(*sys.exc_info())
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self._stop()
+        finally:
+            _active.release()
+
+    def _stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+        if "memory" in self.modes and tracemalloc.is_tracing():
+            self.peak = tracemalloc.get_traced_memory()[1]
+            self.snapshot = tracemalloc.take_snapshot().filter_traces(
+                [
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, __file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                    tracemalloc.Filter(False, "<unknown>"),
+                ]
+            )
+            tracemalloc.stop()
+
+    def cpu_report(self):
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats("cumulative").print_stats(TOP)
+        return stream.getvalue()
+
+    def memory_report(self):
+        lines = [f"Peak: {self.peak / 1024:.1f} KiB", f"Top {TOP} vị trí cấp phát còn giữ:"]
+        for stat in self.snapshot.statistics("lineno")[:TOP]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} block  "
+                f"{_short_path(frame.filename)}:{frame.lineno}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def stacks_report(self):
+        total = sum(self.sampler.stacks.values())
+        leaves = Counter()
+        for stack, count in self.sampler.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        lines = [f"{total} mẫu (mỗi {self.interval * 1000:g} ms), top hàm đang chạy:"]
+        lines += [
+            f"{count / total * 100:>6.1f}%  {leaf}" for leaf, count in leaves.most_common(TOP)
+        ]
+        return "\n".join(lines) + "\n"
+
+    def report(self):
+        """Báo cáo text gộp các chế độ."""
+        sections = []
+        if self.profile is not None:
+            sections.append(f"== cpu ==\n{self.cpu_report()}")
+        if self.sampler is not None and self.sampler.stacks:
+            sections.append(f"== stacks ==\n{self.stacks_report()}")
+        if self.snapshot is not None:
+            sections.append(f"== memory ==\n{self.memory_report()}")
+        return "\n".join(sections)
+
+    def save(self, directory, name):
+        """Ghi kết quả vào directory, trả về danh sách file."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = []
+        if self.profile is not None:
+            path = directory / f"{name}.prof"
+            self.profile.dump_stats(path)
+            paths.append(path)
+        if self.sampler is not None:
+            path = directory / f"{name}.folded"
+            path.write_text(self.sampler.collapsed(), encoding="utf-8")
+            paths.append(path)
+        if self.snapshot is not None:
+            path = directory / f"{name}-memory.txt"
+            path.write_text(self.memory_report(), encoding="utf-8")
+            paths.append(path)
+        return paths
+
+
+def profile_name(*parts):
+    """Tên file kết quả: thời điểm + các phần đã slugify."""
+    slug = "-".join(filter(None, (slugify(part) for part in parts)))
+    return f"{timezone.localtime():%Y%m%d-%H%M%S}-{slug or 'profile'}"
+
+
+class ProfilingMiddleware:
+    """Đặt cuối MIDDLEWARE (sau AuthenticationMiddleware) để biết request.user."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        raw = request.headers.get("X-Profile") or request.GET.get("_profile")
+        if not raw or not self._authorized(request):
+            return self.get_response(request)
+        try:
+            modes = parse_modes(raw)
+        except ValueError as exc:
+            return JsonResponse(
+                {"detail": str(exc)}, status=400, json_dumps_params={"ensure_ascii": False}
+            )
+
+        try:
+            with Profiler(modes, settings.PROFILING_SAMPLE_INTERVAL) as profiler:
+                response = self.get_response(request)
+        except ProfilerBusy as exc:
+            return JsonResponse(
+                {"detail": str(exc)}, status=409, json_dumps_params={"ensure_ascii": False}
+            )
+        paths = profiler.save(settings.PROFILING_DIR, profile_name(request.method, request.path))
+
+        if request.GET.get("_profile_output") == "inline":
+            return HttpResponse(profiler.report(), content_type="text/plain; charset=utf-8")
+        response["X-Profile-Files"] = ", ".join(path.name for path in paths)
+        return response
+
+    @staticmethod
+    def _authorized(request):
+        token = settings.PROFILING_TOKEN
+        sent = request.headers.get("X-Profile-Token")
+        if token and sent and hmac.compare_digest(sent.encode(), token.encode()):
+            return True
+        user = getattr(request, "user", None)
+        return bool(user is not None and user.is_staff)
@@ -0,0 +1,37 @@
+"""
+JSON renderer nhanh cho API: dùng orjson nếu đã cài, không thì dùng nguyên JSONRenderer
+của DRF (json stdlib). Kết quả giống byte với JSONRenderer ở cấu hình mặc định
+(UNICODE_JSON, COMPACT_JSON); các cấu hình/định dạng orjson không hỗ trợ (indent khác 2,
+ensure_ascii...) cũng quay về JSONRenderer.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - chạy được, chỉ chậm hơn
+    orjson = None
+
+# orjson tự xử lý datetime/date/time/UUID (cùng định dạng isoformat, UTC -> "Z" như encoder
+# của DRF) và lớp con của dict/list (ReturnDict...). Kiểu còn lại - Decimal, chuỗi dịch
+# lazy, timedelta, QuerySet, generator... - đi qua encoder của DRF
+_drf_default = JSONEncoder().default
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            # Pretty-print (Browsable API, ?indent=): không nằm trên đường nóng
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_drf_default, option=ORJSON_OPTIONS)
+        # Giống DRF: escape U+2028/U+2029 để JSON vẫn là tập con hợp lệ của JavaScript
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
@@ -4,8 +4,6 @@ from .models import Contact, ContactGroup, ContactGroupMembership
 
 
 class ContactGroupSerializer(serializers.ModelSerializer):
-    member_count = serializers.IntegerField(source="total_members", read_only=True)
-
     class Meta:
         model = ContactGroup
         fields = [
@@ -17,7 +15,7 @@ class ContactGroupSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["created_at", "updated_at"]
+        read_only_fields = ["member_count", "created_at", "updated_at"]
 
     def validate_name(self, value):
         if not value.replace(" ", "").isalnum():
@@ -26,8 +24,6 @@ class ContactGroupSerializer(serializers.ModelSerializer):
 
 
 class ContactListSerializer(serializers.ModelSerializer):
-    group_count = serializers.IntegerField(source="total_groups", read_only=True)
-
     class Meta:
         model = Contact
         fields = [
@@ -41,6 +37,7 @@ class ContactListSerializer(serializers.ModelSerializer):
             "group_count",
             "created_at",
         ]
+        read_only_fields = ["group_count", "created_at"]
 
 
 class ContactDetailSerializer(serializers.ModelSerializer):
@@ -67,15 +64,6 @@ class ContactDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["created_at", "updated_at"]
 
-    def validate_email(self, value):
-        if self.instance is None:
-            if Contact.objects.filter(email=value).exists():
-                raise serializers.ValidationError("Email này đã được sử dụng")
-        else:
-            if Contact.objects.filter(email=value).exclude(pk=self.instance.pk).exists():
-                raise serializers.ValidationError("Email này đã được sử dụng")
-        return value
-
     def validate(self, attrs):
         if attrs.get("is_favorite") and not attrs.get("phone"):
             raise serializers.ValidationError(
@@ -100,6 +88,9 @@ class ContactGroupMembershipSerializer(serializers.ModelSerializer):
             "joined_at",
         ]
         read_only_fields = ["joined_at"]
+        # Default manager của Contact gồm cả contact đã soft delete: chỉ contact đang hoạt
+        # động mới được thêm vào group
+        extra_kwargs = {"contact": {"queryset": Contact.objects.all()}}
 
     def validate(self, attrs):
         contact = attrs.get("contact")
@@ -110,3 +101,79 @@ class ContactGroupMembershipSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Contact này đã có trong group rồi")
 
         return attrs
+
+
+class BulkMemberSerializer(serializers.Serializer):
+    contact_id = serializers.IntegerField(min_value=1)
+    role = serializers.CharField(max_length=50, required=False, allow_blank=True, allow_null=True)
+
+
+class BulkMembershipSerializer(serializers.Serializer):
+    """
+    Body của bulk_add_members / bulk_remove_members, chọn đúng một trong:
+    - contact_ids: [1, 2, 3]
+    - members: [{"contact_id": 1, "role": "Admin"}, ...]  (role riêng từng dòng)
+    - filters: {"search": "nguyen", "is_favorite": "true"}  (như query params của /api/contacts/)
+    """
+
+    MAX_CONTACTS = 50000
+
+    contact_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, max_length=MAX_CONTACTS
+    )
+    members = BulkMemberSerializer(many=True, required=False, max_length=MAX_CONTACTS)
+    filters = serializers.DictField(child=serializers.CharField(allow_blank=True), required=False)
+    role = serializers.CharField(max_length=50, required=False, default="Member")
+
+    def validate(self, attrs):
+        sources = [name for name in ("contact_ids", "members", "filters") if name in attrs]
+        if len(sources) != 1:
+            raise serializers.ValidationError(
+                "Cần đúng một trong các trường: contact_ids, members, filters"
+            )
+        if "filters" in attrs and not attrs["filters"]:
+            raise serializers.ValidationError({"filters": "Cần ít nhất một điều kiện lọc"})
+        return attrs
+
+
+class BulkContactSerializer(serializers.Serializer):
+    """
+    Body của bulk_favorite / bulk_unfavorite / bulk_soft_delete / bulk_restore, chọn đúng một:
+    - contact_ids: [1, 2, 3]
+    - filters: {"search": "nguyen", "is_favorite": "true"}  (như query params của /api/contacts/)
+    """
+
+    MAX_CONTACTS = BulkMembershipSerializer.MAX_CONTACTS
+
+    contact_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, max_length=MAX_CONTACTS
+    )
+    filters = serializers.DictField(child=serializers.CharField(allow_blank=True), required=False)
+
+    def validate(self, attrs):
+        sources = [name for name in ("contact_ids", "filters") if name in attrs]
+        if len(sources) != 1:
+            raise serializers.ValidationError("Cần đúng một trong các trường: contact_ids, filters")
+        if "filters" in attrs and not attrs["filters"]:
+            raise serializers.ValidationError({"filters": "Cần ít nhất một điều kiện lọc"})
+        return attrs
+
+
+class ContactBatchSerializer(serializers.Serializer):
+    """ids của GET /api/contacts/batch/?ids=1,2,3 hoặc POST {"ids": [1, 2, 3]}"""
+
+    MAX_IDS = 1000
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_IDS
+    )
+
+
+class GroupMemberSerializer(ContactListSerializer):
+    """Contact trong group kèm role/joined_at của membership (annotate sẵn trong queryset)."""
+
+    role = serializers.CharField(read_only=True)
+    joined_at = serializers.DateTimeField(read_only=True)
+
+    class Meta(ContactListSerializer.Meta):
+        fields = ContactListSerializer.Meta.fields + ["role", "joined_at"]
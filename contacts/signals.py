@@ -0,0 +1,63 @@
+from django.db.models import F
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import bump_generation
+from .models import Contact, ContactGroup, ContactGroupMembership, queryset_updated
+
+
+def _shift_group_count(contact_id, delta):
+    Contact.all_objects.filter(pk=contact_id).update(
+        group_count=F("group_count") + delta, updated_at=Now()
+    )
+
+
+def _shift_member_count(group_id, delta):
+    ContactGroup.objects.filter(pk=group_id).update(
+        member_count=F("member_count") + delta, updated_at=Now()
+    )
+
+
+@receiver(post_save, sender=ContactGroupMembership)
+def membership_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Cập nhật Contact.group_count / ContactGroup.member_count khi thêm membership,
+    hoặc khi membership bị chuyển sang contact/group khác.
+    Đường bulk (bulk_create, queryset.delete) do ContactGroupMembershipQuerySet xử lý.
+    """
+    if raw:
+        return
+
+    if created:
+        _shift_group_count(instance.contact_id, 1)
+        _shift_member_count(instance.group_id, 1)
+        return
+
+    previous_contact_id, previous_group_id = getattr(
+        instance, "_loaded_keys", (instance.contact_id, instance.group_id)
+    )
+    if previous_contact_id != instance.contact_id:
+        _shift_group_count(previous_contact_id, -1)
+        _shift_group_count(instance.contact_id, 1)
+    if previous_group_id != instance.group_id:
+        _shift_member_count(previous_group_id, -1)
+        _shift_member_count(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=ContactGroupMembership)
+def membership_deleted(sender, instance, **kwargs):
+    # Chạy trong transaction của Collector (kể cả khi cascade từ Contact/ContactGroup)
+    _shift_group_count(instance.contact_id, -1)
+    _shift_member_count(instance.group_id, -1)
+
+
+def invalidate_response_cache(sender, **kwargs):
+    """Mọi thay đổi của model (kể cả update()/bulk/admin action) làm mới cache API liên quan."""
+    bump_generation(sender)
+
+
+for model in (Contact, ContactGroup, ContactGroupMembership):
+    post_save.connect(invalidate_response_cache, sender=model)
+    post_delete.connect(invalidate_response_cache, sender=model)
+    queryset_updated.connect(invalidate_response_cache, sender=model)
@@ -0,0 +1,180 @@
+"""
+Ghi lại query chậm (bật khi SLOW_QUERY_THRESHOLD_MS > 0).
+
+Mọi kết nối DB được gắn một execute_wrapper; query chạy lâu hơn ngưỡng được ghi một dòng
+JSON vào logger contacts.slow_queries (RotatingFileHandler trong LOGGING) gồm fingerprint
+của SQL đã chuẩn hóa, view/action đã gửi query và - với một phần mẫu
+(SLOW_QUERY_EXPLAIN_SAMPLE_RATE) - plan EXPLAIN (ANALYZE, BUFFERS).
+Xếp hạng theo tổng thời gian: python manage.py slow_queries
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+from contextvars import ContextVar
+from pathlib import Path
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from .timing import view_action
+
+logger = logging.getLogger(__name__)
+
+_current_request = ContextVar("slow_query_request", default=None)
+# Đang chạy EXPLAIN: bỏ qua wrapper để không ghi/EXPLAIN đệ quy
+_explaining = ContextVar("slow_query_explaining", default=False)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\$\d+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_REPEATED_TUPLES = re.compile(r"(\((?:\?|\.\.\.)(?:, \?)*\))(?:, \1)+")
+_WHITESPACE = re.compile(r"\s+")
+# Plan in nguyên văn danh sách IN/ANY (có thể hàng chục nghìn id) -> cắt từng dòng
+PLAN_LINE_LIMIT = 500
+
+
+def normalize_sql(sql):
+    """
+    Bỏ giá trị cụ thể khỏi SQL để các lần chạy cùng "dạng" query gom về một fingerprint:
+    literal/placeholder -> ?, IN (?, ?, ?) -> IN (...), VALUES (...), (...) -> một bộ.
+    """
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _REPEATED_TUPLES.sub(r"\1, ...", sql)
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode("utf-8")).hexdigest()[:12]
+
+
+def describe_request(request):
+    """ "GET ContactViewSet.favorites"; đường dẫn nếu URL chưa resolve."""
+    if request is None:
+        return None
+    view, action = view_action(request)
+    if view is None:
+        return f"{request.method} {request.path}"
+    return f"{request.method} {view}.{action}"
+
+
+class SlowQueryRecorder:
+    """execute_wrapper ghi query chậm; một instance dùng chung cho mọi kết nối."""
+
+    def __init__(self, threshold_ms, explain_sample_rate):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+
+    def __call__(self, execute, sql, params, many, context):
+        if _explaining.get():
+            return execute(sql, params, many, context)
+
+        started = perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (perf_counter() - started) * 1000
+        if duration_ms >= self.threshold_ms:
+            try:
+                self.record(sql, params, many, context["connection"], duration_ms)
+            except Exception:
+                logger.debug("Không ghi được slow query", exc_info=True)
+        return result
+
+    def record(self, sql, params, many, connection, duration_ms):
+        normalized = normalize_sql(sql)
+        plan = None
+        if not many and self._is_explainable(sql) and self._sampled():
+            plan = self.explain(connection, sql, params)
+
+        entry = {
+            "at": timezone.now().isoformat(),
+            "fingerprint": fingerprint(normalized),
+            "duration_ms": round(duration_ms, 2),
+            "source": describe_request(_current_request.get()),
+            "database": connection.alias,
+            "sql": normalized,
+            "plan": plan,
+        }
+        logger.info(json.dumps(entry, ensure_ascii=False))
+
+    def explain(self, connection, sql, params):
+        """
+        EXPLAIN ANALYZE chạy lại query -> chỉ dùng cho SELECT. Chạy trong savepoint (hoặc
+        transaction riêng) để lỗi EXPLAIN không làm hỏng transaction đang dở của request.
+        """
+        token = _explaining.set(True)
+        try:
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+                return "\n".join(
+                    row if len(row) <= PLAN_LINE_LIMIT else f"{row[:PLAN_LINE_LIMIT]}…"
+                    for (row,) in cursor.fetchall()
+                )
+        except Exception as exc:
+            return f"EXPLAIN lỗi: {exc}"
+        finally:
+            _explaining.reset(token)
+
+    @staticmethod
+    def _is_explainable(sql):
+        return sql.lstrip()[:6].upper() == "SELECT"
+
+    def _sampled(self):
+        rate = self.explain_sample_rate
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def install():
+    """Gắn SlowQueryRecorder vào mọi kết nối DB mới (gọi trong AppConfig.ready)."""
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if not threshold:
+        return
+
+    Path(settings.SLOW_QUERY_LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+    recorder = SlowQueryRecorder(threshold, settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE)
+
+    def attach(sender, connection, **kwargs):
+        if recorder not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, recorder)
+
+    connection_created.connect(attach, weak=False, dispatch_uid="contacts.slow_queries")
+
+
+class SlowQuerySourceMiddleware:
+    """Ghi nhớ request hiện tại để slow query biết view/action nào đã gửi nó."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_THRESHOLD_MS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = _current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_request.reset(token)
@@ -0,0 +1,269 @@
+import io
+import itertools
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .filters import fold_accents
+from .importers import copy_from
+from .models import Contact, ContactGroup, ContactGroupMembership, queryset_updated
+
+# Họ phổ biến kèm tỉ lệ (%) xấp xỉ trong dân số
+FAMILY_NAMES = [
+    ("Nguyễn", 38),
+    ("Trần", 11),
+    ("Lê", 9.5),
+    ("Phạm", 7),
+    ("Hoàng", 5),
+    ("Huỳnh", 4),
+    ("Phan", 4.5),
+    ("Vũ", 3.9),
+    ("Võ", 3.5),
+    ("Đặng", 2.1),
+    ("Bùi", 2),
+    ("Đỗ", 1.4),
+    ("Hồ", 1.3),
+    ("Ngô", 1.3),
+    ("Dương", 1),
+    ("Lý", 0.5),
+]
+MALE_MIDDLE_NAMES = ["Văn", "Đức", "Minh", "Quốc", "Hữu", "Thanh", "Gia", "Hoàng", "Công", "Anh"]
+FEMALE_MIDDLE_NAMES = ["Thị", "Ngọc", "Thu", "Thanh", "Minh", "Mỹ", "Bảo", "Phương", "Kim", "Hải"]
+MALE_GIVEN_NAMES = [
+    "An", "Bảo", "Bình", "Cường", "Dũng", "Duy", "Đạt", "Hải", "Hiếu", "Hoàng", "Hùng",
+    "Huy", "Khang", "Khoa", "Kiên", "Long", "Lộc", "Minh", "Nam", "Nghĩa", "Phong", "Phúc",
+    "Quân", "Quang", "Sơn", "Tài", "Thắng", "Thành", "Thịnh", "Trung", "Tuấn", "Việt", "Vinh",
+]  # fmt: skip
+FEMALE_GIVEN_NAMES = [
+    "Anh", "Châu", "Chi", "Diễm", "Dung", "Giang", "Hà", "Hạnh", "Hằng", "Hoa", "Hương",
+    "Huyền", "Lan", "Liên", "Linh", "Loan", "Mai", "My", "Nga", "Ngân", "Nhung", "Oanh",
+    "Phương", "Quỳnh", "Tâm", "Thảo", "Thủy", "Trang", "Trâm", "Uyên", "Vân", "Vy", "Yến",
+]  # fmt: skip
+STREETS = [
+    "Lê Lợi", "Nguyễn Huệ", "Trần Hưng Đạo", "Hai Bà Trưng", "Lý Thường Kiệt", "Điện Biên Phủ",
+    "Võ Văn Tần", "Nguyễn Thị Minh Khai", "Cách Mạng Tháng Tám", "Phan Đình Phùng",
+]  # fmt: skip
+CITIES = ["Q1, TP.HCM", "Q3, TP.HCM", "Bình Thạnh, TP.HCM", "Ba Đình, Hà Nội", "Hải Châu, Đà Nẵng"]
+# Đầu số di động (sau +84), mỗi đầu số chứa được 10 triệu số
+PHONE_PREFIXES = ["90", "91", "93", "94", "96", "97", "98", "86", "88", "89", "32", "33", "35"]
+
+GROUP_TYPES = [choice for choice, _ in ContactGroup.GroupType.choices]
+
+# Số mốc thời gian dựng sẵn cho mỗi lô: format timestamp từng dòng tốn hơn sinh cả dòng
+TIMESTAMP_POOL_SIZE = 4096
+HISTORY_DAYS = 3 * 365
+
+CONTACT_COLUMNS = [
+    "id",
+    "created_at",
+    "updated_at",
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "address",
+    "is_favorite",
+    "is_active",
+    "group_count",
+]
+MEMBERSHIP_COLUMNS = ["contact_id", "group_id", "role", "joined_at"]
+
+
+def zipf_cum_weights(count, exponent=1.0):
+    """Trọng số cộng dồn 1/rank^exponent: vài group rất lớn, đuôi dài group nhỏ."""
+    return list(itertools.accumulate(1 / rank**exponent for rank in range(1, count + 1)))
+
+
+class SyntheticDataset:
+    """
+    Sinh contact/group/membership giả lập nhưng giống thật, tất định theo (seed, batch_size):
+    mỗi lô có random.Random riêng nên kết quả không phụ thuộc số worker hay thứ tự chạy.
+
+    Nạp bằng COPY (định dạng text) theo lô batch_size contact, mỗi lô một transaction gồm
+    cả contact lẫn membership của chúng; workers > 1 thì chia lô cho nhiều process.
+    Số membership mỗi group theo phân phối Zipf (zipf_exponent).
+    """
+
+    def __init__(
+        self,
+        contacts,
+        groups,
+        memberships_per_contact,
+        seed=42,
+        zipf_exponent=1.0,
+        batch_size=10000,
+        workers=1,
+    ):
+        if memberships_per_contact > groups:
+            raise ValueError("Số group mỗi contact không được lớn hơn số group")
+        self.contacts = contacts
+        self.groups = groups
+        self.memberships_per_contact = memberships_per_contact
+        self.seed = seed
+        self.zipf_exponent = zipf_exponent
+        self.batch_size = batch_size
+        self.workers = workers
+        self.now = timezone.now()
+
+    def load(self, progress=None):
+        """
+        Nạp toàn bộ dataset, trả về {"groups": n, "contacts": n, "memberships": n}.
+        progress(số contact đã nạp, số membership đã nạp) được gọi sau mỗi lô.
+        """
+        group_ids = self._create_groups()
+
+        # id contact được cấp trước (tiếp sau id lớn nhất) để lô nào cũng tự biết id của mình
+        first_id = (Contact.all_objects.aggregate(last=Max("id"))["last"] or 0) + 1
+        batches = [
+            (index, first_id + start, min(self.batch_size, self.contacts - start))
+            for index, start in enumerate(range(0, self.contacts, self.batch_size))
+        ]
+
+        contacts = memberships = 0
+        for (_, _, count), loaded in zip(batches, self._run_batches(group_ids, batches)):
+            contacts += count
+            memberships += loaded
+            if progress:
+                progress(contacts, memberships)
+
+        with connection.cursor() as cursor:
+            # COPY với id tường minh không đẩy identity sequence -> đồng bộ lại
+            table = Contact._meta.db_table
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {connection.ops.quote_name(table)}))",
+                [table],
+            )
+            for model in (ContactGroup, Contact, ContactGroupMembership):
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+        ContactGroup.objects.filter(pk__in=group_ids).recount_members()
+        # COPY không gửi signal -> báo cho response cache
+        for model in (ContactGroup, Contact, ContactGroupMembership):
+            queryset_updated.send(sender=model)
+
+        return {"groups": len(group_ids), "contacts": self.contacts, "memberships": memberships}
+
+    def _create_groups(self):
+        rng = random.Random(self.seed)
+        first_number = (ContactGroup.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+        groups = ContactGroup.objects.bulk_create(
+            ContactGroup(
+                name=f"Nhóm {number}",
+                group_type=rng.choice(GROUP_TYPES),
+                description=f"Nhóm dữ liệu mẫu số {number}",
+            )
+            for number in range(first_number, first_number + self.groups)
+        )
+        return [group.pk for group in groups]
+
+    def _run_batches(self, group_ids, batches):
+        if self.workers <= 1:
+            for batch in batches:
+                yield self.load_batch(group_ids, *batch)
+            return
+
+        # Process con (fork) không được dùng chung kết nối DB với process cha
+        connections.close_all()
+        # forkserver/spawn (mặc định trên Linux từ Python 3.14) khởi động process mới chưa nạp
+        # Django: django.setup() trước khi nhận lô đầu tiên (import contacts.models). Không dùng
+        # hàm của module này làm initializer: unpickle nó đã import contacts.models
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=django.setup) as executor:
+            futures = [
+                executor.submit(_load_batch_in_worker, self, group_ids, *batch) for batch in batches
+            ]
+            for future in futures:
+                yield future.result()
+
+    def load_batch(self, group_ids, index, first_id, count):
+        """Sinh và COPY một lô contact (id first_id ... first_id + count - 1) cùng membership."""
+        rng = random.Random(self.seed * 1_000_003 + index)
+        contacts, memberships = io.StringIO(), io.StringIO()
+        family_names, family_weights = zip(*FAMILY_NAMES)
+        family_cum_weights = list(itertools.accumulate(family_weights))
+        group_cum_weights = zipf_cum_weights(len(group_ids), self.zipf_exponent)
+        timestamps = [
+            (self.now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))).isoformat()
+            for _ in range(TIMESTAMP_POOL_SIZE)
+        ]
+        folded = {}
+
+        written = 0
+        for contact_id in range(first_id, first_id + count):
+            female = rng.random() < 0.5
+            family = rng.choices(family_names, cum_weights=family_cum_weights)[0]
+            middle = rng.choice(FEMALE_MIDDLE_NAMES if female else MALE_MIDDLE_NAMES)
+            given = rng.choice(FEMALE_GIVEN_NAMES if female else MALE_GIVEN_NAMES)
+            for name in (given, family):
+                if name not in folded:
+                    folded[name] = fold_accents(name)
+            prefix, number = divmod(contact_id, 10**7)
+            created_at = rng.choice(timestamps)
+            contacts.write(
+                "\t".join(
+                    [
+                        str(contact_id),
+                        created_at,
+                        created_at,
+                        given,
+                        f"{family} {middle}",
+                        f"{folded[given]}.{folded[family]}{contact_id}@example.vn",
+                        f"+84{PHONE_PREFIXES[prefix % len(PHONE_PREFIXES)]}{number:07d}",
+                        f"{rng.randint(1, 999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+                        "t" if rng.random() < 0.1 else "f",
+                        "t",
+                        str(self.memberships_per_contact),
+                    ]
+                )
+                + "\n"
+            )
+
+            chosen = set()
+            while len(chosen) < self.memberships_per_contact:
+                chosen.update(
+                    rng.choices(
+                        group_ids,
+                        cum_weights=group_cum_weights,
+                        k=self.memberships_per_contact - len(chosen),
+                    )
+                )
+            for group_id in chosen:
+                role = "Admin" if rng.random() < 0.02 else "Member"
+                memberships.write(f"{contact_id}\t{group_id}\t{role}\t{rng.choice(timestamps)}\n")
+            written += len(chosen)
+
+        contacts.seek(0)
+        memberships.seek(0)
+        with transaction.atomic(), connection.cursor() as cursor:
+            copy_from(cursor, _copy_sql(Contact, CONTACT_COLUMNS), contacts)
+            copy_from(cursor, _copy_sql(ContactGroupMembership, MEMBERSHIP_COLUMNS), memberships)
+        return written
+
+
+def _copy_sql(model, columns):
+    table = connection.ops.quote_name(model._meta.db_table)
+    return f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+
+
+def _load_batch_in_worker(dataset, group_ids, *batch):
+    try:
+        return dataset.load_batch(group_ids, *batch)
+    finally:
+        connections.close_all()
+
+
+def truncate_contact_data():
+    """Xóa sạch contact/group/membership bằng một câu TRUNCATE (không qua cascade collector)."""
+    tables = ", ".join(
+        connection.ops.quote_name(model._meta.db_table)
+        for model in (ContactGroupMembership, Contact, ContactGroup)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"TRUNCATE {tables} RESTART IDENTITY")
+    for model in (ContactGroup, Contact, ContactGroupMembership):
+        queryset_updated.send(sender=model)
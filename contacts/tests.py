@@ -1,3 +1,1226 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import decimal
+import gzip
+import io
+import json
+import tempfile
+import threading
+import uuid
+import zoneinfo
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from . import caching, metrics, slow_queries
+from .compiled import compile_serializer
+from .fieldsets import trim_serializer
+from .importers import ContactImporter, iter_vcard
+from .models import Contact, ContactGroup, ContactGroupMembership
+from .pagination import KeysetPagination
+from .profiling import ProfilingMiddleware
+from .renderers import FastJSONRenderer
+from .serializers import (
+    ContactBatchSerializer,
+    ContactDetailSerializer,
+    ContactGroupSerializer,
+    ContactListSerializer,
+    GroupMemberSerializer,
+)
+
+# Số query tối đa cho mỗi action; số query cũng không được tăng theo số dòng dữ liệu
+QUERY_BUDGETS = {
+    "contacts.list": 3,  # fingerprint ETag + COUNT + trang
+    "contacts.list_expand": 5,  # + prefetch groups + prefetch memberships (JOIN group)
+    "contacts.retrieve": 2,  # contact + prefetch groups
+    "contacts.retrieve_sparse": 1,  # ?fields= không có groups/group_ids -> không prefetch
+    "contacts.groups": 2,
+    "contacts.batch": 2,  # id = ANY(...) + prefetch groups
+    "contacts.favorites": 2,  # contacts + prefetch groups
+    "contacts.restore": 2,
+    "contacts.toggle_favorite": 1,  # UPDATE ... RETURNING
+    "contacts.bulk_favorite": 1,  # một UPDATE cho cả danh sách
+    "groups.list": 2,
+    "groups.retrieve": 1,
+    "groups.members": 2,
+    # group, contact, get_or_create (2 savepoint lồng nhau + INSERT), cập nhật 2 counter
+    "groups.add_member": 10,
+    "memberships.list": 2,
+    "memberships.list_expand": 2,  # contact/group JOIN trong query trang
+}
+
+
+def make_groups(rows, prefix="Nhóm"):
+    return ContactGroup.objects.bulk_create(
+        ContactGroup(name=f"{prefix} {number}") for number in range(rows)
+    )
+
+
+def make_contacts(rows, groups=(), **fields):
+    """rows contact, mỗi contact thuộc mọi group trong groups."""
+    contacts = Contact.objects.bulk_create(
+        Contact(
+            first_name=f"Tên{number}",
+            last_name="Nguyễn Văn",
+            email=f"user{number}@example.vn",
+            phone=f"+8490{number:07d}",
+            **fields,
+        )
+        for number in range(rows)
+    )
+    ContactGroupMembership.objects.bulk_create(
+        ContactGroupMembership(contact=contact, group=group, role="Member")
+        for contact in contacts
+        for group in groups
+    )
+    return contacts
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class QueryBudgetTestCase(TestCase):
+    """
+    assertQueryBudget chạy cùng một request trên dữ liệu nhỏ và lớn (row_counts), mỗi cỡ
+    trong một savepoint riêng. Fail nếu vượt budget hoặc số query tăng theo số dòng
+    (dấu hiệu N+1), kèm danh sách SQL đã chạy.
+    """
+
+    row_counts = (10, 1000)
+
+    def assertQueryBudget(self, action, setup, request, status_code=200):
+        budget = QUERY_BUDGETS[action]
+        captured = {}
+        for rows in self.row_counts:
+            savepoint = transaction.savepoint()
+            try:
+                data = setup(rows)
+                with CaptureQueriesContext(connection) as queries:
+                    response = request(data)
+                self.assertEqual(response.status_code, status_code, response.content[:500])
+                captured[rows] = [query["sql"] for query in queries.captured_queries]
+            finally:
+                transaction.savepoint_rollback(savepoint)
+
+        counts = {rows: len(sqls) for rows, sqls in captured.items()}
+        problems = []
+        if max(counts.values()) > budget:
+            problems.append(f"vượt budget {budget}")
+        if len(set(counts.values())) > 1:
+            problems.append("số query tăng theo số dòng")
+        if problems:
+            details = "\n".join(
+                f"\n-- {rows} dòng: {len(sqls)} query\n"
+                + "\n".join(f"{index}. {sql}" for index, sql in enumerate(sqls, 1))
+                for rows, sqls in captured.items()
+            )
+            self.fail(f"{action}: {', '.join(problems)} ({counts})\n{details}")
+
+
+class ContactQueryBudgetTests(QueryBudgetTestCase):
+    def test_list(self):
+        self.assertQueryBudget(
+            "contacts.list",
+            lambda rows: make_contacts(rows, make_groups(2)),
+            lambda _: self.client.get("/api/contacts/"),
+        )
+
+    def test_list_expand(self):
+        self.assertQueryBudget(
+            "contacts.list_expand",
+            lambda rows: make_contacts(rows, make_groups(2)),
+            lambda _: self.client.get("/api/contacts/?expand=groups,memberships.group"),
+        )
+
+    def test_retrieve(self):
+        self.assertQueryBudget(
+            "contacts.retrieve",
+            lambda rows: make_contacts(1, make_groups(rows))[0],
+            lambda contact: self.client.get(f"/api/contacts/{contact.pk}/"),
+        )
+
+    def test_retrieve_sparse(self):
+        self.assertQueryBudget(
+            "contacts.retrieve_sparse",
+            lambda rows: make_contacts(1, make_groups(rows))[0],
+            lambda contact: self.client.get(f"/api/contacts/{contact.pk}/?fields=id,phone"),
+        )
+
+    def test_batch(self):
+        self.assertQueryBudget(
+            "contacts.batch",
+            lambda rows: make_contacts(rows, make_groups(2)),
+            lambda contacts: self.client.post(
+                "/api/contacts/batch/",
+                {"ids": [contact.pk for contact in contacts]},
+                content_type="application/json",
+            ),
+        )
+
+    def test_groups(self):
+        self.assertQueryBudget(
+            "contacts.groups",
+            lambda rows: make_contacts(1, make_groups(rows))[0],
+            lambda contact: self.client.get(f"/api/contacts/{contact.pk}/groups/"),
+        )
+
+    def test_favorites(self):
+        self.assertQueryBudget(
+            "contacts.favorites",
+            lambda rows: make_contacts(rows, make_groups(2), is_favorite=True),
+            lambda _: self.client.get("/api/contacts/favorites/"),
+        )
+
+    def test_restore(self):
+        self.assertQueryBudget(
+            "contacts.restore",
+            lambda rows: make_contacts(1, make_groups(rows), is_active=False)[0],
+            lambda contact: self.client.post(f"/api/contacts/{contact.pk}/restore/"),
+        )
+
+    def test_toggle_favorite(self):
+        self.assertQueryBudget(
+            "contacts.toggle_favorite",
+            lambda rows: make_contacts(1, make_groups(rows))[0],
+            lambda contact: self.client.post(f"/api/contacts/{contact.pk}/toggle_favorite/"),
+        )
+
+    def test_bulk_favorite(self):
+        self.assertQueryBudget(
+            "contacts.bulk_favorite",
+            lambda rows: make_contacts(rows, make_groups(1)),
+            lambda contacts: self.client.post(
+                "/api/contacts/bulk_favorite/",
+                {"contact_ids": [contact.pk for contact in contacts]},
+                content_type="application/json",
+            ),
+        )
+
+
+class GroupQueryBudgetTests(QueryBudgetTestCase):
+    def test_list(self):
+        self.assertQueryBudget(
+            "groups.list",
+            make_groups,
+            lambda _: self.client.get("/api/groups/"),
+        )
+
+    def test_retrieve(self):
+        self.assertQueryBudget(
+            "groups.retrieve",
+            lambda rows: make_contacts(rows, make_groups(1)) and ContactGroup.objects.get(),
+            lambda group: self.client.get(f"/api/groups/{group.pk}/"),
+        )
+
+    def test_members(self):
+        self.assertQueryBudget(
+            "groups.members",
+            lambda rows: make_contacts(rows, make_groups(1)) and ContactGroup.objects.get(),
+            lambda group: self.client.get(f"/api/groups/{group.pk}/members/?include=membership"),
+        )
+
+    def test_add_member(self):
+        def setup(rows):
+            group = make_groups(1)[0]
+            *members, newcomer = make_contacts(rows + 1)
+            ContactGroupMembership.objects.bulk_create(
+                ContactGroupMembership(contact=contact, group=group) for contact in members
+            )
+            return group, newcomer
+
+        self.assertQueryBudget(
+            "groups.add_member",
+            setup,
+            lambda data: self.client.post(
+                f"/api/groups/{data[0].pk}/add_member/",
+                {"contact_id": data[1].pk, "role": "Admin"},
+                content_type="application/json",
+            ),
+            status_code=201,
+        )
+
+
+class MembershipQueryBudgetTests(QueryBudgetTestCase):
+    def test_list(self):
+        self.assertQueryBudget(
+            "memberships.list",
+            lambda rows: make_contacts(rows, make_groups(1)),
+            lambda _: self.client.get("/api/memberships/"),
+        )
+
+    def test_list_expand(self):
+        self.assertQueryBudget(
+            "memberships.list_expand",
+            lambda rows: make_contacts(rows, make_groups(1)),
+            lambda _: self.client.get("/api/memberships/?expand=contact,group"),
+        )
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class ListValidatorTests(TestCase):
+    def test_list_has_no_last_modified(self):
+        make_contacts(3)
+        response = self.client.get("/api/contacts/")
+        self.assertNotIn("Last-Modified", response)
+        response = self.client.get(
+            "/api/contacts/", HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete_and_insert_change_list_etag(self):
+        first, *_ = make_contacts(3)
+        etag = self.client.get("/api/contacts/")["ETag"]
+
+        first.soft_delete()
+        Contact.objects.create(first_name="Mới", last_name="Trần", email="moi@example.vn")
+        response = self.client.get("/api/contacts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 3)
+
+
+@override_settings(
+    API_CACHE_ENABLED=True,
+    SERVER_TIMING_SAMPLE_RATE=0,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class ExpandedListInvalidationTests(TestCase):
+    def test_group_rename_changes_expanded_list(self):
+        group = make_groups(1)[0]
+        make_contacts(2, [group])
+        url = "/api/contacts/?expand=groups,memberships.group"
+        response = self.client.get(url)
+        self.assertEqual(response.json()["results"][0]["groups"][0]["name"], group.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            group.name = "Đổi tên"
+            group.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        contact = response.json()["results"][0]
+        self.assertEqual(contact["groups"][0]["name"], "Đổi tên")
+        self.assertEqual(contact["memberships"][0]["group"]["name"], "Đổi tên")
+
+
+class ProfilingMiddlewareTests(SimpleTestCase):
+    def test_overlapping_profiled_requests(self):
+        started, release = threading.Event(), threading.Event()
+
+        def get_response(request):
+            if request.path == "/slow/":
+                started.set()
+                release.wait(5)
+            return HttpResponse("ok")
+
+        factory = RequestFactory(headers={"X-Profile": "cpu,memory", "X-Profile-Token": "t"})
+        responses = {}
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            override_settings(PROFILING_ENABLED=True, PROFILING_TOKEN="t", PROFILING_DIR=directory),
+        ):
+            middleware = ProfilingMiddleware(get_response)
+            slow = threading.Thread(
+                target=lambda: responses.update(slow=middleware(factory.get("/slow/")))
+            )
+            slow.start()
+            started.wait(5)
+            try:
+                busy = middleware(factory.get("/fast/"))
+            finally:
+                release.set()
+                slow.join()
+            after = middleware(factory.get("/fast/"))
+
+        self.assertEqual(busy.status_code, 409)
+        self.assertEqual(responses["slow"].status_code, 200)
+        self.assertIn("X-Profile-Files", responses["slow"])
+        self.assertEqual(after.status_code, 200)
+        self.assertIn("X-Profile-Files", after)
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class SoftDeletedUniqueTests(TestCase):
+    """Trùng với contact đã soft delete -> lỗi validate (400/form), không IntegrityError."""
+
+    def setUp(self):
+        self.deleted = Contact.objects.create(
+            first_name="An", last_name="Nguyễn", email="an@example.vn", phone="+84901234567"
+        )
+        self.deleted.soft_delete()
+
+    def test_api_create_matching_name_phone(self):
+        response = self.client.post(
+            "/api/contacts/",
+            {
+                "first_name": "An",
+                "last_name": "Nguyễn",
+                "email": "an.moi@example.vn",
+                "phone": "+84901234567",
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400, response.content)
+
+    def test_api_create_matching_email(self):
+        response = self.client.post(
+            "/api/contacts/",
+            {"first_name": "Bình", "last_name": "Trần", "email": "an@example.vn"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn("email", response.json())
+
+    def test_admin_add_matching_email(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.vn", "matkhau")
+        )
+        response = self.client.post(
+            "/admin/contacts/contact/add/",
+            {
+                "first_name": "Bình",
+                "last_name": "Trần",
+                "email": "an@example.vn",
+                "is_active": "on",
+                "memberships-TOTAL_FORMS": "0",
+                "memberships-INITIAL_FORMS": "0",
+            },
+        )
+        self.assertEqual(response.status_code, 200)  # form hiện lại kèm lỗi, không redirect
+        self.assertIn("email", response.context["adminform"].form.errors)
+        self.assertEqual(Contact.all_objects.filter(email="an@example.vn").count(), 1)
+
+
+class MetricsConnectionTests(SimpleTestCase):
+    def test_observe_query_survives_enclosing_execute_wrapper(self):
+        def request_wrapper(execute, sql, params, many, context):
+            return execute(sql, params, many, context)
+
+        saved = list(connection.execute_wrappers)
+        connection.execute_wrappers[:] = [
+            wrapper for wrapper in saved if wrapper is not metrics.observe_query
+        ]
+        try:
+            # Kết nối mới mở khi đang trong execute_wrapper của một request
+            with connection.execute_wrapper(request_wrapper):
+                metrics._connection_created(None, connection=connection)
+            self.assertIn(metrics.observe_query, connection.execute_wrappers)
+            self.assertNotIn(request_wrapper, connection.execute_wrappers)
+        finally:
+            connection.execute_wrappers[:] = saved
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class ImportTests(TestCase):
+    def test_non_utf8_upload(self):
+        content = "first_name,last_name,email\nÁnh,Lê,anh@example.vn\n".encode("cp1258")
+        response = self.client.post(
+            "/api/contacts/import/", {"file": SimpleUploadedFile("contacts.csv", content)}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Contact.all_objects.exists())
+
+    def test_command_non_utf8_file(self):
+        with tempfile.NamedTemporaryFile(suffix=".csv") as file:
+            file.write("first_name,last_name,email\nÁnh,Lê,anh@example.vn\n".encode("cp1258"))
+            file.flush()
+            with self.assertRaisesMessage(CommandError, "UTF-8"):
+                call_command("import_contacts", file.name, stdout=io.StringIO())
+
+    def upload(self, name, content):
+        response = self.client.post(
+            "/api/contacts/import/", {"file": SimpleUploadedFile(name, content.encode())}
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_csv(self):
+        result = self.upload(
+            "contacts.csv",
+            "First_Name,Last_Name,Email,Phone,Is_Favorite\n"
+            "An,Nguyễn Văn,an@example.vn,090 123 4567,yes\n"
+            "Bình,Trần Thị,binh@example.vn,,\n",
+        )
+        self.assertEqual((result["created"], result["updated"], result["skipped"]), (2, 0, 0))
+        an = Contact.objects.get(email="an@example.vn")
+        self.assertEqual((an.first_name, an.phone, an.is_favorite), ("An", "0901234567", True))
+
+    def test_jsonl(self):
+        result = self.upload(
+            "contacts.jsonl",
+            '{"first_name": "An", "last_name": "Nguyễn", "email": "an@example.vn"}\n'
+            "\n"
+            "không phải json\n"
+            '["không", "phải", "object"]\n',
+        )
+        self.assertEqual((result["total_rows"], result["created"], result["skipped"]), (3, 1, 2))
+        self.assertEqual([error["row"] for error in result["errors"]], [2, 3])
+
+    def test_vcard(self):
+        result = self.upload(
+            "contacts.vcf",
+            "BEGIN:VCARD\r\nVERSION:3.0\r\nN:Nguyễn Văn;An;;;\r\n"
+            "EMAIL:an@example.vn\r\nTEL:+84901234567\r\n"
+            "NOTE:dòng một\\ndòng hai rất dài được gập\r\n  sang dòng sau\r\nEND:VCARD\r\n"
+            "BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Trần Thị Bình\r\nEMAIL:binh@example.vn\r\n"
+            "END:VCARD\r\n",
+        )
+        self.assertEqual(result["created"], 2)
+        an = Contact.objects.get(email="an@example.vn")
+        self.assertEqual((an.last_name, an.first_name), ("Nguyễn Văn", "An"))
+        self.assertEqual(an.notes, "dòng một\ndòng hai rất dài được gập sang dòng sau")
+        binh = Contact.objects.get(email="binh@example.vn")
+        self.assertEqual((binh.last_name, binh.first_name), ("Trần Thị", "Bình"))
+
+    def test_error_cap(self):
+        rows = "".join(f"Tên{number},Họ,không-phải-email\n" for number in range(5))
+        result = ContactImporter("csv", max_errors=2).run(
+            io.StringIO("first_name,last_name,email\n" + rows)
+        )
+        data = result.as_dict()
+        self.assertEqual(data["skipped"], 5)
+        self.assertEqual(len(data["errors"]), 2)
+        self.assertTrue(data["errors_truncated"])
+
+    def test_partial_columns_keep_existing_values(self):
+        Contact.objects.create(
+            first_name="An",
+            last_name="Nguyễn",
+            email="an@example.vn",
+            phone="+84901234567",
+            notes="ghi chú cũ",
+            is_favorite=True,
+        )
+        result = self.upload("contacts.csv", "first_name,last_name,email\nAn,Lê,an@example.vn\n")
+        self.assertEqual((result["created"], result["updated"]), (0, 1))
+        an = Contact.objects.get(email="an@example.vn")
+        self.assertEqual(an.last_name, "Lê")
+        self.assertEqual((an.phone, an.notes, an.is_favorite), ("+84901234567", "ghi chú cũ", True))
+
+    def test_conflict_report(self):
+        existing = Contact.objects.create(
+            first_name="Bình", last_name="Trần", email="binh@example.vn", phone="+84907654321"
+        )
+        result = self.upload(
+            "contacts.csv",
+            "first_name,last_name,email,phone\n"
+            "An,Nguyễn,an@example.vn,\n"
+            "An,Lê,an@example.vn,\n"
+            "Bình,Trần,binh.khac@example.vn,+84907654321\n",
+        )
+        self.assertEqual((result["created"], result["skipped"]), (1, 2))
+        self.assertEqual(
+            result["errors"],
+            [
+                {"row": 2, "errors": {"email": ["Email trùng với dòng 1 trong file"]}},
+                {
+                    "row": 3,
+                    "errors": {"phone": [f"Trùng họ tên + SĐT với contact #{existing.pk} đã có"]},
+                },
+            ],
+        )
+
+    def test_reimport_restores_soft_deleted_contact(self):
+        contact = Contact.objects.create(first_name="An", last_name="Nguyễn", email="an@example.vn")
+        contact.soft_delete()
+        result = self.upload("contacts.csv", "first_name,last_name,email\nAn,Lê,an@example.vn\n")
+        self.assertEqual(result["updated"], 1)
+        self.assertEqual(Contact.objects.get(pk=contact.pk).last_name, "Lê")
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class ExportTests(TestCase):
+    def setUp(self):
+        group = make_groups(1, prefix="Bạn bè")[0]
+        self.contact = Contact.objects.create(
+            first_name="An",
+            last_name="Nguyễn Văn",
+            email="an@example.vn",
+            phone="+84901234567",
+            notes="Ghi chú, có dấu phẩy; chấm phẩy và tiếng Việt " * 4,
+            is_favorite=True,
+        )
+        ContactGroupMembership.objects.create(contact=self.contact, group=group)
+
+    def export(self, query):
+        response = self.client.get(f"/api/contacts/export/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv(self):
+        response, body = self.export("format=csv")
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["email"], "an@example.vn")
+        self.assertEqual(rows[0]["notes"], self.contact.notes)
+        self.assertEqual((rows[0]["is_favorite"], rows[0]["groups"]), ("true", "Bạn bè 0"))
+
+    def test_ndjson(self):
+        _, body = self.export("format=ndjson")
+        lines = body.decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual((row["id"], row["groups"]), (self.contact.pk, ["Bạn bè 0"]))
+
+    def test_vcard_line_folding(self):
+        _, body = self.export("format=vcf")
+        text = body.decode()
+        lines = text.split("\r\n")
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertTrue(any(line.startswith(" ") for line in lines))
+        # Đọc lại bằng importer: gập/escape giữ nguyên nội dung
+        (_, card, _), *_ = iter_vcard(io.StringIO(text))
+        self.assertEqual(card["notes"], self.contact.notes)
+        self.assertEqual((card["last_name"], card["first_name"]), ("Nguyễn Văn", "An"))
+
+    def test_gzip_stream(self):
+        _, plain = self.export("format=ndjson")
+        response, body = self.export("format=ndjson&gzip=1")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(body), plain)
+
+
+@override_settings(
+    METRICS_ENABLED=True, METRICS_TOKEN="bi-mat", METRICS_ALLOWED_NETWORKS=["10.0.0.0/8"]
+)
+class MetricsEndpointTests(TestCase):
+    def test_requires_allowed_network_or_token(self):
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="203.0.113.5").status_code, 403)
+        self.assertEqual(
+            self.client.get(
+                "/metrics", REMOTE_ADDR="203.0.113.5", HTTP_AUTHORIZATION="Bearer sai"
+            ).status_code,
+            403,
+        )
+
+        response = self.client.get("/metrics", REMOTE_ADDR="10.1.2.3")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"contacts_table_rows", response.content)
+        response = self.client.get(
+            "/metrics", REMOTE_ADDR="203.0.113.5", HTTP_AUTHORIZATION="Bearer bi-mat"
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class KeysetPaginationTests(TestCase):
+    def walk(self, url, link):
+        """Đi theo link next/previous tới hết, trả về id theo từng trang."""
+        pages = []
+        while url:
+            body = self.client.get(url).json()
+            pages.append([contact["id"] for contact in body["results"]])
+            url = body[link]
+        return pages
+
+    def test_round_trip_with_ties(self):
+        # Cùng họ tên -> chỉ id phân biệt thứ tự (tiebreaker)
+        Contact.objects.bulk_create(
+            Contact(first_name="An", last_name="Lê", email=f"an{number}@example.vn")
+            for number in range(12)
+        )
+        make_contacts(13)
+        expected = list(
+            Contact.objects.order_by("last_name", "first_name", "pk").values_list("pk", flat=True)
+        )
+
+        pages = self.walk("/api/contacts/?pagination=cursor", "next")
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), expected)
+
+        # Từ trang cuối đi ngược lại bằng previous
+        last = self.client.get("/api/contacts/?pagination=cursor").json()["next"]
+        last = self.client.get(last).json()["next"]
+        body = self.client.get(last).json()
+        self.assertIsNone(body["next"])
+        self.assertEqual(self.walk(body["previous"], "previous"), pages[1::-1])
+
+    def test_invalid_cursor(self):
+        make_contacts(3)
+        wrong_length = base64.urlsafe_b64encode(b'{"p": ["Nguyen"]}').decode("ascii")
+        for cursor in ("khong-hop-le", "e30=", wrong_length):
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/api/contacts/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json()["detail"], "Cursor không hợp lệ")
+
+    def test_related_ordering_is_rejected(self):
+        # Không dùng assert: vẫn báo lỗi khi chạy python -O
+        with self.assertRaises(ImproperlyConfigured):
+            KeysetPagination().get_ordering(Contact.objects.order_by("groups__name"), None)
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class ContactSearchTests(TestCase):
+    def search(self, term):
+        response = self.client.get("/api/contacts/", {"search": term})
+        return [contact["email"] for contact in response.json()["results"]]
+
+    def test_prefix_and_accent_insensitive(self):
+        Contact.objects.create(first_name="Đức Anh", last_name="Nguyễn", email="ducanh@example.vn")
+        Contact.objects.create(first_name="Bình", last_name="Trần", email="binh@example.vn")
+
+        for term in ("nguyen duc", "Nguyễn Đức", "ngu an", "NGUYEN"):
+            with self.subTest(term=term):
+                self.assertEqual(self.search(term), ["ducanh@example.vn"])
+        self.assertEqual(self.search("nguyen binh"), [])  # mọi term đều phải khớp
+
+    def test_substring_of_email_and_phone(self):
+        Contact.objects.create(
+            first_name="An", last_name="Lê", email="le.an@congty.vn", phone="+84901234567"
+        )
+        self.assertEqual(self.search("congty"), ["le.an@congty.vn"])
+        self.assertEqual(self.search("1234"), ["le.an@congty.vn"])
+
+    def test_trigger_keeps_search_columns_in_sync(self):
+        contact = Contact.objects.create(first_name="An", last_name="Lê", email="an@congty.vn")
+        contact.last_name = "Phạm"
+        contact.save()
+        self.assertEqual(self.search("pham"), ["an@congty.vn"])
+        self.assertEqual(self.search("le"), [])
+
+        # UPDATE trực tiếp (không qua save()) cũng chạy trigger
+        Contact.objects.filter(pk=contact.pk).update(first_name="Hòa")
+        self.assertEqual(self.search("hoa pham"), ["an@congty.vn"])
+
+
+@override_settings(
+    API_CACHE_ENABLED=True,
+    SERVER_TIMING_SAMPLE_RATE=0,
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "response-cache-tests",
+        }
+    },
+)
+class ResponseCacheTests(TestCase):
+    url = "/api/contacts/"
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hit_miss_bypass(self):
+        make_contacts(3)
+        outcomes = [
+            self.client.get(self.url)["X-Cache"],
+            self.client.get(self.url)["X-Cache"],
+            self.client.get(self.url, HTTP_CACHE_CONTROL="no-cache")["X-Cache"],
+            self.client.get(f"{self.url}?page=1")["X-Cache"],  # query khác -> key khác
+        ]
+        self.assertEqual(outcomes, ["MISS", "HIT", "BYPASS", "MISS"])
+
+        stats = caching.get_stats()["ContactViewSet.list"]
+        self.assertEqual(stats, {"hit": 1, "miss": 2, "bypass": 1})
+
+    def test_queryset_update_invalidates(self):
+        contact, *_ = make_contacts(3)
+        self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "HIT")
+
+        # update() không gửi post_save: generation được tăng qua queryset_updated
+        with self.captureOnCommitCallbacks(execute=True):
+            Contact.objects.filter(pk=contact.pk).update(first_name="Đã sửa")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        names = [row["first_name"] for row in response.json()["results"]]
+        self.assertIn("Đã sửa", names)
+
+    def test_bump_waits_for_commit(self):
+        make_contacts(1)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Contact.objects.update(is_favorite=True)
+        # Chưa commit: response cũ vẫn được phục vụ
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "HIT")
+        self.assertEqual(len(callbacks), 1)
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class BulkMembersTests(TestCase):
+    def setUp(self):
+        self.group = make_groups(1)[0]
+        self.contacts = make_contacts(4)
+        self.ids = [contact.pk for contact in self.contacts]
+
+    def post(self, action, body):
+        return self.client.post(
+            f"/api/groups/{self.group.pk}/{action}/", body, content_type="application/json"
+        )
+
+    def assertCounters(self, member_count, group_counts):
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.member_count, member_count)
+        self.assertEqual(
+            list(Contact.objects.order_by("pk").values_list("group_count", flat=True)),
+            group_counts,
+        )
+
+    def test_add_is_idempotent(self):
+        self.contacts[3].soft_delete()
+        body = {"contact_ids": [*self.ids[:3], self.ids[3], 999999], "role": "Member"}
+
+        response = self.post("bulk_add_members", body)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            response.json(), {"matched": 3, "inserted": 3, "skipped": 0, "not_found": 2}
+        )
+        self.assertCounters(3, [1, 1, 1])
+
+        response = self.post("bulk_add_members", body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), {"matched": 3, "inserted": 0, "skipped": 3, "not_found": 2}
+        )
+        self.assertCounters(3, [1, 1, 1])
+
+    def test_add_members_with_roles_and_filters(self):
+        body = {"members": [{"contact_id": self.ids[0], "role": "Admin"}], "role": "Member"}
+        self.assertEqual(self.post("bulk_add_members", body).json()["inserted"], 1)
+
+        body = {"filters": {"search": "nguyen"}, "role": "Member"}
+        response = self.post("bulk_add_members", body)
+        self.assertEqual(response.json(), {"matched": 4, "inserted": 3, "skipped": 1})
+        roles = dict(
+            ContactGroupMembership.objects.filter(group=self.group).values_list(
+                "contact_id", "role"
+            )
+        )
+        self.assertEqual(roles, {self.ids[0]: "Admin", **dict.fromkeys(self.ids[1:], "Member")})
+        self.assertCounters(4, [1, 1, 1, 1])
+
+    def test_remove_is_idempotent(self):
+        self.post("bulk_add_members", {"contact_ids": self.ids[:3]})
+        body = {"contact_ids": [self.ids[0], self.ids[1], self.ids[3]]}
+
+        response = self.post("bulk_remove_members", body)
+        self.assertEqual(
+            response.json(), {"matched": 3, "removed": 2, "skipped": 1, "not_found": 0}
+        )
+        self.assertCounters(1, [0, 0, 1, 0])
+
+        response = self.post("bulk_remove_members", body)
+        self.assertEqual(
+            response.json(), {"matched": 3, "removed": 0, "skipped": 3, "not_found": 0}
+        )
+        self.assertCounters(1, [0, 0, 1, 0])
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        self.contact = make_contacts(1)[0]
+        self.url = f"/api/contacts/{self.contact.pk}/"
+
+    def patch(self, etag, **data):
+        return self.client.patch(
+            self.url, data, content_type="application/json", HTTP_IF_MATCH=etag
+        )
+
+    def test_retrieve_not_modified(self):
+        response = self.client.get(self.url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        self.contact.first_name = "Đã sửa"
+        self.contact.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_not_modified(self):
+        etag = self.client.get("/api/contacts/")["ETag"]
+        response = self.client.get("/api/contacts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Query params khác -> ETag khác
+        response = self.client.get("/api/contacts/?ordering=created_at", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_match(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.patch('"khong-khop"', first_name="Mới")
+        self.assertEqual(response.status_code, 412)
+        self.contact.refresh_from_db()
+        self.assertEqual(self.contact.first_name, "Tên0")
+
+        self.assertEqual(self.patch(etag, first_name="Mới").status_code, 200)
+
+        # ETag cũ sau khi đã có người ghi -> 412, không ghi đè
+        self.assertEqual(self.patch(etag, first_name="Ghi đè").status_code, 412)
+        response = self.client.delete(self.url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.contact.refresh_from_db()
+        self.assertEqual((self.contact.first_name, self.contact.is_active), ("Mới", True))
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class AsyncViewParityTests(TestCase):
+    def assertSameAsSync(self, path):
+        sync = self.client.get(f"/api/{path}")
+        response = self.client.get(f"/api/async/{path}")
+        self.assertEqual(response.status_code, sync.status_code)
+        # Link next/previous trỏ về chính endpoint async
+        body = response.content.decode().replace("/api/async/", "/api/")
+        self.assertEqual(json.loads(body), sync.json())
+        return response
+
+    def test_contacts(self):
+        groups = make_groups(2)
+        contacts = make_contacts(15, groups, is_favorite=True)
+        contacts[0].soft_delete()
+        paths = [
+            "contacts/",
+            "contacts/?page=2",
+            "contacts/?search=ten1&ordering=-created_at",
+            "contacts/?is_active=false",
+            "contacts/?pagination=cursor&fields=id,first_name",
+            "contacts/favorites/",
+            f"contacts/{contacts[1].pk}/",
+            f"contacts/{contacts[0].pk}/",  # 404
+            "groups/",
+            f"groups/{groups[0].pk}/members/?include=membership",
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                self.assertSameAsSync(path)
+
+    def test_cursor_and_errors(self):
+        group = make_groups(1)[0]
+        make_contacts(15, [group])
+        path = f"groups/{group.pk}/members/"
+        first = self.assertSameAsSync(path).json()
+        self.assertSameAsSync(first["next"].split("/api/async/")[1])
+        self.assertSameAsSync("contacts/?cursor=khong-hop-le")
+        self.assertSameAsSync("contacts/?page=99")
+
+    def test_detail_not_modified(self):
+        contact = make_contacts(1)[0]
+        etag = self.client.get(f"/api/contacts/{contact.pk}/")["ETag"]
+        response = self.client.get(f"/api/async/contacts/{contact.pk}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class SlowQueryNormalizationTests(SimpleTestCase):
+    def test_normalize_sql(self):
+        cases = [
+            # Literal -> ?, tên cột/alias có số giữ nguyên, gộp khoảng trắng
+            (
+                "SELECT \"t1\".\"col2\" FROM contacts t1\n  WHERE id = 42 AND email = 'a''b@x.vn'",
+                'SELECT "t1"."col2" FROM contacts t1 WHERE id = ? AND email = ?',
+            ),
+            ("SELECT 1 WHERE score > -1.5", "SELECT ? WHERE score > ?"),
+            (
+                "SELECT * FROM contacts WHERE id IN (%s, %s, %s)",
+                "SELECT * FROM contacts WHERE id IN (...)",
+            ),
+            (
+                "SELECT * FROM contacts WHERE id = ANY($1)",
+                "SELECT * FROM contacts WHERE id = ANY(?)",
+            ),
+            (
+                "INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)",
+                "INSERT INTO t (a, b) VALUES (...), ...",
+            ),
+        ]
+        for sql, expected in cases:
+            with self.subTest(sql=sql):
+                self.assertEqual(slow_queries.normalize_sql(sql), expected)
+
+    def test_fingerprint_groups_same_shape(self):
+        def key(sql):
+            return slow_queries.fingerprint(slow_queries.normalize_sql(sql))
+
+        self.assertEqual(
+            key("SELECT * FROM contacts WHERE id IN (1, 2) AND email = 'a@x.vn'"),
+            key("SELECT * FROM contacts  WHERE id IN (7, 8, 9) AND email = 'b@y.vn'"),
+        )
+        self.assertNotEqual(
+            key("SELECT * FROM contacts WHERE id = 1"),
+            key("SELECT * FROM contact_groups WHERE id = 1"),
+        )
+        self.assertRegex(key("SELECT 1"), r"^[0-9a-f]{12}$")
+
+
+class SlowQueryRecorderTests(TestCase):
+    def test_records_normalized_query_with_plan(self):
+        make_contacts(2)
+        recorder = slow_queries.SlowQueryRecorder(threshold_ms=0, explain_sample_rate=1)
+        with (
+            self.assertLogs("contacts.slow_queries", "INFO") as logs,
+            connection.execute_wrapper(recorder),
+        ):
+            list(Contact.objects.filter(email="user1@example.vn"))
+
+        self.assertEqual(len(logs.records), 1)  # EXPLAIN không bị ghi lại
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertIn('WHERE ("contacts"."is_active" AND "contacts"."email" = ?)', entry["sql"])
+        self.assertEqual(entry["fingerprint"], slow_queries.fingerprint(entry["sql"]))
+        self.assertIsNone(entry["source"])
+        self.assertIn("actual time", entry["plan"])
+
+    def test_below_threshold_is_ignored(self):
+        recorder = slow_queries.SlowQueryRecorder(threshold_ms=60_000, explain_sample_rate=1)
+        with self.assertNoLogs("contacts.slow_queries"), connection.execute_wrapper(recorder):
+            Contact.objects.count()
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def assertSameAsDRF(self, data, renderer_context=None):
+        expected = JSONRenderer().render(data, "application/json", renderer_context)
+        rendered = FastJSONRenderer().render(data, "application/json", renderer_context)
+        self.assertEqual(rendered, expected)
+
+    def test_identical_to_json_renderer(self):
+        saigon = zoneinfo.ZoneInfo("Asia/Ho_Chi_Minh")
+        data = ReturnDict(
+            {
+                "text": 'Nguyễn \u2028 \u2029 "quote" </script>',  # DRF escape U+2028/2029
+                "utc": datetime.datetime(2026, 10, 17, 7, 30, 1, 123456, tzinfo=datetime.UTC),
+                "local": datetime.datetime(2026, 10, 17, 14, 30, tzinfo=saigon),
+                "naive": datetime.datetime(2026, 10, 17, 7, 30),
+                "date": datetime.date(2026, 10, 17),
+                "time": datetime.time(7, 30, 15),
+                "decimal": decimal.Decimal("12.50"),
+                "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+                "lazy": gettext_lazy("Tên"),
+                "duration": datetime.timedelta(hours=1, seconds=5),
+                "numbers": [1, -2.5, 10**15, True, None],
+                1: "khóa số",
+                "nested": [ReturnList([{"a": set()}], serializer=None)],
+            },
+            serializer=None,
+        )
+        self.assertSameAsDRF(data)
+        self.assertSameAsDRF([])
+        self.assertSameAsDRF(None)
+        # indent (Browsable API, ?indent=) đi đường JSONRenderer
+        self.assertSameAsDRF(data, {"indent": 2})
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class CompiledSerializerTests(TestCase):
+    def assertSameAsDRF(self, serializer_class, queryset, fieldset=None):
+        compiled = compile_serializer(serializer_class, fieldset)
+        self.assertIsNotNone(compiled)
+        serializer = serializer_class(queryset, many=True)
+        expected = (
+            serializer.data if fieldset is None else trim_serializer(serializer, fieldset).data
+        )
+        self.assertEqual(compiled.to_representation(compiled.fetch(queryset)), expected)
+
+    def test_identical_to_serializer(self):
+        group = make_groups(1)[0]
+        group.description = None
+        group.save()
+        make_contacts(3, [group])
+        Contact.objects.create(first_name="Không", last_name="SĐT", email="no@example.vn")
+        contacts = Contact.objects.order_by("pk")
+        members = contacts.filter(memberships__group=group).annotate(
+            role=F("memberships__role"), joined_at=F("memberships__joined_at")
+        )
+
+        for tz in ("UTC", "Asia/Ho_Chi_Minh"):
+            with self.subTest(timezone=tz), timezone.override(tz):
+                self.assertSameAsDRF(ContactListSerializer, contacts)
+                self.assertSameAsDRF(ContactGroupSerializer, ContactGroup.objects.all())
+                self.assertSameAsDRF(GroupMemberSerializer, members)
+                self.assertSameAsDRF(ContactListSerializer, contacts, ("id", "phone", "created_at"))
+
+    def test_nested_serializer_is_not_compiled(self):
+        self.assertIsNone(compile_serializer(ContactDetailSerializer))
+
+    def test_api_response_unchanged(self):
+        group = make_groups(1)[0]
+        make_contacts(12, [group])
+        urls = [
+            "/api/contacts/",
+            "/api/contacts/?pagination=cursor&fields=id,created_at",
+            "/api/groups/",
+            f"/api/groups/{group.pk}/members/?include=membership",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                compiled = self.client.get(url).content
+                with self.settings(COMPILED_SERIALIZERS=False):
+                    self.assertEqual(compiled, self.client.get(url).content)
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.group = make_groups(1)[0]
+        self.contact = make_contacts(2, [self.group], address="Hà Nội", notes="Ghi chú")[0]
+        self.url = f"/api/contacts/{self.contact.pk}/"
+
+    def test_fields_and_omit(self):
+        response = self.client.get(self.url, {"fields": "id,phone,first_name"})
+        # Thứ tự theo serializer, không theo ?fields=
+        self.assertEqual(list(response.json()), ["id", "first_name", "phone"])
+
+        response = self.client.get(self.url, {"omit": "address,notes,groups"})
+        self.assertNotIn("notes", response.json())
+        self.assertIn("group_ids", response.json())
+
+        response = self.client.get("/api/contacts/", {"fields": "id,email", "omit": "email"})
+        self.assertEqual([list(row) for row in response.json()["results"]], [["id"], ["id"]])
+
+    def test_unknown_field(self):
+        response = self.client.get("/api/contacts/", {"fields": "id,bogus", "omit": "x"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {"fields", "omit"})
+        self.assertIn("bogus", response.json()["fields"])
+
+    def test_projection(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"fields": "id,first_name"})
+        self.assertEqual(response.json(), {"id": self.contact.pk, "first_name": "Tên0"})
+        # Không SELECT cột TextField lớn, không prefetch groups
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"notes"', queries[0]["sql"])
+        self.assertNotIn('"address"', queries[0]["sql"])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {"fields": "id,group_ids"})
+        self.assertEqual(len(queries), 2)  # + prefetch groups
+
+    def test_write_uses_all_fields(self):
+        response = self.client.patch(
+            f"{self.url}?fields=id", {"first_name": "Mới"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["first_name"], "Mới")
+        self.assertIn("notes", response.json())
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class ContactBatchTests(TestCase):
+    def setUp(self):
+        self.contacts = make_contacts(4)
+        self.contacts[3].soft_delete()
+        self.ids = [contact.pk for contact in self.contacts]
+
+    def test_order_and_missing(self):
+        first, second, third, deleted = self.ids
+        requested = [third, 999999, first, third, deleted, second]
+
+        response = self.client.get(
+            "/api/contacts/batch/", {"ids": ",".join(map(str, requested)), "fields": "id,email"}
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        # Đúng thứ tự ids, id trùng chỉ trả một lần, id không tồn tại/đã xóa -> missing
+        self.assertEqual([row["id"] for row in body["results"]], [third, first, second])
+        self.assertEqual(list(body["results"][0]), ["id", "email"])
+        self.assertEqual(body["missing"], [999999, deleted])
+
+        response = self.client.post(
+            "/api/contacts/batch/?fields=id,email",
+            {"ids": requested},
+            content_type="application/json",
+        )
+        self.assertEqual(response.json(), body)
+
+    def test_invalid_ids(self):
+        for ids in ("", "1,abc", "0"):
+            with self.subTest(ids=ids):
+                response = self.client.get("/api/contacts/batch/", {"ids": ids})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("ids", response.json())
+
+        too_many = list(range(1, ContactBatchSerializer.MAX_IDS + 2))
+        response = self.client.post(
+            "/api/contacts/batch/", {"ids": too_many}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(API_CACHE_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0)
+class BulkFlagTests(TestCase):
+    def setUp(self):
+        self.contacts = make_contacts(4)
+        self.ids = [contact.pk for contact in self.contacts]
+
+    def post(self, action, body):
+        return self.client.post(f"/api/contacts/{action}/", body, content_type="application/json")
+
+    def flags(self, field):
+        return list(Contact.all_objects.order_by("pk").values_list(field, flat=True))
+
+    def test_only_changed_rows_are_written(self):
+        Contact.objects.filter(pk=self.ids[0]).update(is_favorite=True)
+        before = dict(Contact.objects.values_list("pk", "updated_at"))
+
+        body = {"contact_ids": [*self.ids[:3], 999999]}
+        response = self.post("bulk_favorite", body)
+        self.assertEqual(
+            response.json(), {"matched": 3, "updated": 2, "skipped": 1, "not_found": 1}
+        )
+        self.assertEqual(self.flags("is_favorite"), [True, True, True, False])
+        after = dict(Contact.objects.values_list("pk", "updated_at"))
+        self.assertEqual(after[self.ids[0]], before[self.ids[0]])
+        self.assertNotEqual(after[self.ids[1]], before[self.ids[1]])
+
+        response = self.post("bulk_unfavorite", {"filters": {"is_favorite": "true"}})
+        self.assertEqual(response.json(), {"matched": 3, "updated": 3, "skipped": 0})
+        self.assertEqual(self.flags("is_favorite"), [False] * 4)
+
+    def test_soft_delete_and_restore(self):
+        response = self.post("bulk_soft_delete", {"filters": {"search": "ten1"}})
+        self.assertEqual(response.json(), {"matched": 1, "updated": 1, "skipped": 0})
+        self.assertEqual(self.flags("is_active"), [True, False, True, True])
+
+        # filters không có is_active -> chỉ xét contact đã soft delete
+        response = self.post("bulk_restore", {"filters": {"search": "nguyen"}})
+        self.assertEqual(response.json(), {"matched": 1, "updated": 1, "skipped": 0})
+        self.assertEqual(self.flags("is_active"), [True] * 4)
+
+        response = self.post("bulk_restore", {"contact_ids": self.ids[:2]})
+        self.assertEqual(
+            response.json(), {"matched": 2, "updated": 0, "skipped": 2, "not_found": 0}
+        )
+
+    def test_invalid_body(self):
+        bodies = [
+            {},
+            {"contact_ids": [1], "filters": {"search": "a"}},
+            {"filters": {}},
+            {"filters": {"group": "1"}},
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                self.assertEqual(self.post("bulk_favorite", body).status_code, 400)
+        self.assertEqual(self.flags("is_favorite"), [False] * 4)
+
+    def test_toggle_favorite(self):
+        url = f"/api/contacts/{self.ids[0]}/toggle_favorite/"
+        self.assertEqual(self.client.post(url).json()["is_favorite"], True)
+        self.assertEqual(self.client.post(url).json()["is_favorite"], False)
+        self.assertEqual(
+            Contact.objects.filter(pk__in=self.ids[:2]).toggle_favorite(),
+            {self.ids[0]: True, self.ids[1]: True},
+        )
+
+        self.contacts[3].soft_delete()
+        for pk in (self.ids[3], 999999, "abc"):
+            with self.subTest(pk=pk):
+                response = self.client.post(f"/api/contacts/{pk}/toggle_favorite/")
+                self.assertEqual(response.status_code, 404)
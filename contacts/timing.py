@@ -0,0 +1,230 @@
+"""
+Đo thời gian theo từng request: số query + tổng thời gian SQL (connection.execute_wrapper),
+thời gian view / serializer / renderer của DRF. Kết quả trả về qua header Server-Timing
+(xem được trong tab Network của trình duyệt) và một dòng log JSON (logger contacts.timing).
+
+Chỉ request được lấy mẫu (SERVER_TIMING_SAMPLE_RATE) mới bị đo; request còn lại chỉ tốn
+một lần random() nên có thể bật thường trực trên production.
+"""
+
+import json
+import logging
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_current_timing = ContextVar("request_timing", default=None)
+
+
+def current_timing():
+    """RequestTiming của request đang được đo, hoặc None nếu request không được lấy mẫu."""
+    return _current_timing.get()
+
+
+def view_action(request):
+    """
+    (view, action) của request đã resolve URL: ("ContactViewSet", "list") cho ViewSet,
+    (đường dẫn hàm, method) cho view thường; view là None nếu URL chưa resolve/404.
+    """
+    method = request.method.lower()
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None, method
+
+    view_class = getattr(match.func, "cls", None)
+    if view_class is None:
+        return match._func_path, method
+    actions = getattr(match.func, "actions", None) or {}
+    return view_class.__name__, actions.get(method, method)
+
+
+class RequestTiming:
+    """Số liệu của một request; dùng luôn làm execute_wrapper để đếm query."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.phases = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += perf_counter() - started
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - started)
+
+    def metrics(self):
+        """[(tên, mili giây)] theo thứ tự db, các phase, total."""
+        total = perf_counter() - self.started
+        durations = [("db", self.db_time), *self.phases.items(), ("total", total)]
+        return [(name, round(seconds * 1000, 2)) for name, seconds in durations]
+
+    def header(self, metrics):
+        entries = []
+        for name, duration in metrics:
+            entry = f"{name};dur={duration}"
+            if name == "db":
+                entry += f';desc="{self.queries} queries"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    Đặt đầu danh sách MIDDLEWARE để "total" gồm cả các middleware khác.
+    Các phase view/serialize/render do ServerTimingMixin ghi thêm (chỉ có ở view DRF).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        try:
+            with connection.execute_wrapper(timing):
+                response = self.get_response(request)
+        finally:
+            _current_timing.reset(token)
+        return self._finish(request, response, timing)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        # Kết nối DB gắn với thread: async ORM chạy query trên thread sync_to_async
+        # (thread_sensitive) của request -> gắn wrapper vào kết nối của chính thread đó
+        await sync_to_async(_install_wrapper)(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_uninstall_wrapper)(timing)
+            _current_timing.reset(token)
+        return self._finish(request, response, timing)
+
+    @staticmethod
+    def _sampled():
+        rate = settings.SERVER_TIMING_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    @staticmethod
+    def _finish(request, response, timing):
+        metrics = timing.metrics()
+        response["Server-Timing"] = timing.header(metrics)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": timing.queries,
+            **{f"{name}_ms": duration for name, duration in metrics},
+        }
+        logger.info(json.dumps(record))
+        return response
+
+
+def _install_wrapper(wrapper):
+    # Phải tra `connection` bên trong thread đích, không phải ở event loop
+    connection.execute_wrappers.append(wrapper)
+
+
+def _uninstall_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+class ServerTimingMixin:
+    """
+    Mixin cho APIView/ViewSet: ghi phase "view" (initial -> finalize_response, gồm cả SQL và
+    serialize), "serialize" (serializer.data của get_serializer) và "render" (renderer.render).
+    Không làm gì khi request không được lấy mẫu.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self._view_started = perf_counter()
+        super().initial(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if current_timing() is not None:
+            serializer.__class__ = _timed_serializer_class(type(serializer))
+        return serializer
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        timing = current_timing()
+        if timing is None:
+            return response
+
+        started = getattr(self, "_view_started", None)
+        if started is not None:
+            timing.add("view", perf_counter() - started)
+        renderer = getattr(response, "accepted_renderer", None)
+        if renderer is not None and not isinstance(renderer, TimedRenderer):
+            response.accepted_renderer = TimedRenderer(renderer, timing)
+        return response
+
+
+class TimedRenderer:
+    """Bọc renderer đã chọn để ghi phase "render"; các thuộc tính khác giữ nguyên."""
+
+    def __init__(self, renderer, timing):
+        self._renderer = renderer
+        self._timing = timing
+
+    def __getattr__(self, name):
+        return getattr(self._renderer, name)
+
+    def render(self, *args, **kwargs):
+        with self._timing.phase("render"):
+            return self._renderer.render(*args, **kwargs)
+
+
+@cache
+def _timed_serializer_class(serializer_class):
+    # Lớp con chỉ ghi đè .data; gán vào __class__ của serializer (kể cả ListSerializer
+    # khi many=True) sau khi đã khởi tạo
+    class TimedSerializer(serializer_class):
+        @property
+        def data(self):
+            started = perf_counter()
+            try:
+                return super().data
+            finally:
+                timing = current_timing()
+                if timing is not None:
+                    timing.add("serialize", perf_counter() - started)
+
+    TimedSerializer.__name__ = TimedSerializer.__qualname__ = serializer_class.__name__
+    return TimedSerializer
@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import ContactGroupMembershipViewSet, ContactGroupViewSet, ContactViewSet
 
 router = DefaultRouter()
@@ -10,6 +11,16 @@ router.register(r"memberships", ContactGroupMembershipViewSet, basename="members
 
 app_name = "contacts"
 
+# Bản async (chạy dưới ASGI) của các endpoint đọc, xem contacts/async_views.py
+async_urlpatterns = [
+    path("contacts/", async_views.contact_list, name="async-contact-list"),
+    path("contacts/favorites/", async_views.contact_favorites, name="async-contact-favorites"),
+    path("contacts/<int:pk>/", async_views.contact_detail, name="async-contact-detail"),
+    path("groups/", async_views.group_list, name="async-group-list"),
+    path("groups/<int:pk>/members/", async_views.group_members, name="async-group-members"),
+]
+
 urlpatterns = [
+    path("async/", include(async_urlpatterns)),
     path("", include(router.urls)),
 ]
@@ -1,20 +1,63 @@
-from django.db.models import Count, Q
+import io
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Max, Prefetch
+from django.http import Http404, QueryDict, StreamingHttpResponse
+from django.utils.text import compress_sequence
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import search_smart_split
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from .caching import cache_response
+from .compiled import CompiledListMixin
+from .conditional import ConditionalRequestMixin, make_etag
+from .expand import ExpandMixin, Expansion
+from .exporters import (
+    CSVExportRenderer,
+    NDJSONExportRenderer,
+    VCardExportRenderer,
+    export_rows,
+)
+from .fieldsets import SparseFieldsetMixin
+from .filters import ContactFilter, ContactSearchFilter
+from .importers import ENCODING_ERROR, ContactImporter, detect_format
 from .models import Contact, ContactGroup, ContactGroupMembership
+from .pagination import KeysetPagination
 from .serializers import (
+    BulkContactSerializer,
+    BulkMembershipSerializer,
+    ContactBatchSerializer,
     ContactDetailSerializer,
     ContactGroupMembershipSerializer,
     ContactGroupSerializer,
     ContactListSerializer,
+    GroupMemberSerializer,
 )
+from .timing import ServerTimingMixin
+
+
+def bulk_summary(requested, matched, changed, label):
+    """Kết quả của các endpoint bulk_*: số dòng khớp / đã đổi / bỏ qua (đã đúng trạng thái)."""
+    summary = {"matched": matched, label: changed, "skipped": matched - changed}
+    if requested is not None:
+        summary["not_found"] = requested - matched  # id không tồn tại (hoặc đã soft delete)
+    return summary
+
+
+# Sắp xếp cho /api/groups/{id}/members/, ngoài ordering_fields của ContactViewSet
+MEMBER_ORDERINGS = ["joined_at", "-joined_at"]
 
 
-class ContactGroupViewSet(viewsets.ModelViewSet):
+class ContactGroupViewSet(
+    ServerTimingMixin, SparseFieldsetMixin, CompiledListMixin, viewsets.ModelViewSet
+):
     queryset = ContactGroup.objects.all()
     serializer_class = ContactGroupSerializer
     permission_classes = [AllowAny]
@@ -30,21 +73,35 @@ class ContactGroupViewSet(viewsets.ModelViewSet):
     ordering_fields = ["name", "created_at"]  # Sort: ?ordering=-created_at
     ordering = ["name"]
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        queryset = queryset.annotate(total_members=Count("contacts"))
-        return queryset
+    def get_serializer_class(self):
+        if self.action == "members":
+            return member_serializer_class(self.request)
+        return super().get_serializer_class()
+
+    @cache_response(timeout=300, depends_on=[ContactGroup])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response(timeout=300, depends_on=[ContactGroup])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(detail=True, methods=["get"])
+    @cache_response(timeout=120, depends_on=[ContactGroup, ContactGroupMembership, Contact])
     def members(self, request, pk=None):
         """
         Custom endpoint: GET /api/groups/{id}/members/
-        Lấy danh sách members của group
+        Lấy danh sách members của group, phân trang bằng cursor (?cursor=...)
+        - Lọc/tìm kiếm như /api/contacts/: ?is_favorite=true&search=nguyen
+        - Sắp xếp: mặc định -joined_at (mới vào nhóm trước), hoặc ?ordering=joined_at,
+          ?ordering=last_name... như /api/contacts/
+        - ?include=membership: thêm role, joined_at của từng member
         """
-        group = self.get_object()
-        contacts = group.contacts.all()
-        serializer = ContactListSerializer(contacts, many=True)
-        return Response(serializer.data)
+        # Không dùng get_object(): ?search=... ở đây là tìm contact, không phải lọc group
+        group = get_object_or_404(self.get_queryset(), pk=pk)
+        self.check_object_permissions(request, group)
+
+        return self.list_response(group_members_queryset(request, group), KeysetPagination())
 
     @action(detail=True, methods=["post"])
     def add_member(self, request, pk=None):
@@ -73,36 +130,151 @@ class ContactGroupViewSet(viewsets.ModelViewSet):
         except Contact.DoesNotExist:
             return Response({"error": "Contact không tồn tại"}, status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=True, methods=["post"])
+    def bulk_add_members(self, request, pk=None):
+        """
+        Custom endpoint: POST /api/groups/{id}/bulk_add_members/
+        Body: {"contact_ids": [1, 2, 3], "role": "Member"}
+           | {"members": [{"contact_id": 1, "role": "Admin"}, ...]}
+           | {"filters": {"search": "nguyen", "is_favorite": "true"}, "role": "Member"}
+        Một câu INSERT ... SELECT ... ON CONFLICT DO NOTHING, contact đã có trong group bị bỏ qua
+        """
+        group = self.get_object()
+        contacts, roles, requested, data = self._bulk_selection(request)
+        matched, inserted = group.bulk_add_contacts(contacts, role=data["role"], roles=roles)
+        return Response(
+            bulk_summary(requested, matched, inserted, "inserted"),
+            status=status.HTTP_201_CREATED if inserted else status.HTTP_200_OK,
+        )
 
-class ContactViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["post"])
+    def bulk_remove_members(self, request, pk=None):
+        """
+        Custom endpoint: POST /api/groups/{id}/bulk_remove_members/
+        Body: {"contact_ids": [1, 2, 3]} | {"filters": {"search": "nguyen"}}
+        Một câu DELETE ... USING
+        """
+        group = self.get_object()
+        contacts, _, requested, _ = self._bulk_selection(request)
+        matched, removed = group.bulk_remove_contacts(contacts)
+        return Response(bulk_summary(requested, matched, removed, "removed"))
+
+    def _bulk_selection(self, request):
+        """Trả về (queryset Contact, {contact_id: role}, số id client gửi, dữ liệu đã validate)."""
+        serializer = BulkMembershipSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if "filters" in data:
+            return filtered_contacts(data["filters"]), {}, None, data
+
+        roles = {}
+        if "members" in data:
+            for member in data["members"]:
+                roles.setdefault(member["contact_id"], member.get("role") or data["role"])
+        else:
+            roles = dict.fromkeys(data["contact_ids"], data["role"])
+        # Một tham số mảng (id = ANY(%s)) thay cho tối đa MAX_CONTACTS tham số của IN (...)
+        return Contact.objects.filter(pk__any=list(roles)), roles, len(roles), data
+
+
+class ContactViewSet(
+    ServerTimingMixin,
+    ExpandMixin,
+    ConditionalRequestMixin,
+    CompiledListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Contact.objects.all()
     permission_classes = [AllowAny]
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # ContactSearchFilter đứng sau OrderingFilter để sắp theo độ liên quan khi có ?search=
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ContactSearchFilter]
 
-    filterset_fields = ["is_favorite", "is_active"]  # ?is_favorite=true
-    search_fields = ["first_name", "last_name", "email", "phone"]  # ?search=nguyen
+    filterset_class = ContactFilter  # ?is_favorite=true&is_active=false
+    # ?search=nguyen: full-text trên search_vector/search_document (gồm các field dưới)
+    search_fields = ["first_name", "last_name", "email", "phone"]
     ordering_fields = ["first_name", "last_name", "created_at"]
     ordering = ["last_name", "first_name"]
+    export_chunk_size = 2000  # Số contact mỗi lần fetch từ server-side cursor khi export
+    fieldset_columns = ["updated_at"]  # ETag/Last-Modified
+    # ?expand=groups,memberships,memberships.group
+    expandable = {
+        "groups": Expansion(
+            lambda: ContactGroupSerializer(many=True, read_only=True),
+            prefetch=lambda: Prefetch("groups", queryset=ContactGroup.objects.all()),
+        ),
+        # contact của mỗi membership là chính contact cha (Django gán sẵn khi prefetch)
+        "memberships": Expansion(
+            lambda: ContactGroupMembershipSerializer(many=True, read_only=True),
+            prefetch=lambda: Prefetch(
+                "memberships", queryset=ContactGroupMembership.objects.select_related("group")
+            ),
+        ),
+        "memberships.group": Expansion(lambda: ContactGroupSerializer(read_only=True)),
+    }
+    # retrieve/favorites/batch tự prefetch qua detail_prefetch_related
+    expand_deferred_actions = ("retrieve", "favorites", "batch")
+    read_only_actions = ("batch",)  # POST batch: danh sách id dài trong body
 
     def get_serializer_class(self):
         if self.action == "list":
             return ContactListSerializer
+        if self.action == "groups":
+            return ContactGroupSerializer
         return ContactDetailSerializer
 
+    @property
+    def detail_prefetch_related(self):
+        lookups = self.get_expand_prefetches()
+        # groups và group_ids cùng đọc từ prefetch groups; ?fields= không có cả hai -> bỏ
+        if not self.expands("groups") and self.fieldset_needs("groups", "group_ids"):
+            lookups.append("groups")
+        return lookups
+
+    def get_list_dependencies(self):
+        # ?expand=groups/memberships/memberships.group: list có cả dữ liệu group, membership
+        return [ContactGroupMembership, ContactGroup] if self.get_expand() else []
+
+    @cache_response(timeout=60, depends_on=lambda view: [Contact, *view.get_list_dependencies()])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response(timeout=300, depends_on=[Contact, ContactGroupMembership, ContactGroup])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def get_queryset(self):
+        # Contact.objects chỉ có contact đang hoạt động; restore và ?is_active= cần cả đã xóa
+        if self.action == "restore" or "is_active" in self.request.query_params:
+            self.queryset = Contact.all_objects.all()
         queryset = super().get_queryset()
 
-        queryset = queryset.annotate(total_groups=Count("groups"))
-
-        if self.action == "retrieve":
-            queryset = queryset.prefetch_related("groups")
+        # group_count là cột đếm sẵn (xem contacts/signals.py), không cần annotate Count
+        detail_actions = ("retrieve", "update", "partial_update", "destroy")
+        if self.action in detail_actions and self.fieldset_needs("groups"):
+            # Chi tiết contact gồm cả group -> ETag phụ thuộc cả updated_at của group
+            queryset = queryset.annotate(groups_updated_at=Max("groups__updated_at"))
 
         return queryset
 
+    def get_object_validators(self, instance):
+        # Thêm/bớt group đã làm đổi updated_at của contact (group_count), sửa group thì
+        # đổi groups_updated_at
+        # (không annotate khi ?fields= không có groups)
+        groups_updated_at = getattr(instance, "groups_updated_at", None)
+        last_modified = max(filter(None, [instance.updated_at, groups_updated_at]))
+        etag = make_etag(
+            instance.pk,
+            instance.updated_at.isoformat(),
+            groups_updated_at.isoformat() if groups_updated_at else None,
+        )
+        return etag, last_modified
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.soft_delete()
+        with self.compare_and_swap(instance):
+            instance.soft_delete()
         return Response(
             {"message": "Contact đã được soft delete"},
             status=status.HTTP_204_NO_CONTENT,
@@ -119,45 +291,251 @@ class ContactViewSet(viewsets.ModelViewSet):
         return Response({"message": "Contact đã được khôi phục"})
 
     @action(detail=False, methods=["get"])
+    @cache_response(timeout=60, depends_on=[Contact, ContactGroupMembership, ContactGroup])
     def favorites(self, request):
         """
         Custom endpoint: GET /api/contacts/favorites/
         Lấy danh sách contacts yêu thích
         """
+        # ContactDetailSerializer đọc groups (cả groups lẫn group_ids) -> prefetch 1 query
         favorites = self.get_queryset().filter(is_favorite=True)
+        if self.detail_prefetch_related:
+            favorites = favorites.prefetch_related(*self.detail_prefetch_related)
         serializer = self.get_serializer(favorites, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["get", "post"])
+    def batch(self, request):
+        """
+        Custom endpoint: GET /api/contacts/batch/?ids=3,1,2
+                         POST /api/contacts/batch/ Body: {"ids": [3, 1, 2]} (danh sách dài)
+        Nhiều contact trong một request, đúng thứ tự ids: một query id = ANY(...) + prefetch
+        groups, cùng serializer/?fields=/?expand= với GET /api/contacts/{id}/.
+        id không tồn tại (hoặc đã soft delete) nằm trong "missing"
+        """
+        if request.method == "GET":
+            raw = request.query_params.get("ids", "")
+            data = {"ids": [part.strip() for part in raw.split(",") if part.strip()]}
+        else:
+            data = request.data
+        serializer = ContactBatchSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data["ids"]))
+
+        queryset = self.get_queryset().filter(pk__any=ids).order_by()
+        if self.detail_prefetch_related:
+            queryset = queryset.prefetch_related(*self.detail_prefetch_related)
+        found = {contact.pk: contact for contact in queryset}
+        contacts = [found[pk] for pk in ids if pk in found]
+        return Response(
+            {
+                "results": self.get_serializer(contacts, many=True).data,
+                "missing": [pk for pk in ids if pk not in found],
+            }
+        )
+
     @action(detail=True, methods=["post"])
     def toggle_favorite(self, request, pk=None):
         """
         Custom endpoint: POST /api/contacts/{id}/toggle_favorite/
-        Bật/tắt yêu thích
+        Bật/tắt yêu thích: một câu UPDATE ... SET is_favorite = NOT is_favorite RETURNING
+        (không đọc contact trước, hai request đồng thời không ghi đè lẫn nhau)
         """
-        contact = self.get_object()
-        contact.is_favorite = not contact.is_favorite
-        contact.save(update_fields=["is_favorite"])
+        try:
+            contacts = self.get_queryset().filter(pk=pk)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        toggled = contacts.toggle_favorite()
+        if not toggled:
+            raise Http404
 
         return Response(
             {
                 "message": "Đã cập nhật trạng thái yêu thích",
-                "is_favorite": contact.is_favorite,
+                "is_favorite": toggled.popitem()[1],
             }
         )
 
+    @action(detail=False, methods=["post"])
+    def bulk_favorite(self, request):
+        """
+        Custom endpoint: POST /api/contacts/bulk_favorite/
+        Body: {"contact_ids": [1, 2, 3]} | {"filters": {"search": "nguyen"}}
+        """
+        return self._bulk_update(request, "favorite")
+
+    @action(detail=False, methods=["post"])
+    def bulk_unfavorite(self, request):
+        """Custom endpoint: POST /api/contacts/bulk_unfavorite/ (body như bulk_favorite)"""
+        return self._bulk_update(request, "unfavorite")
+
+    @action(detail=False, methods=["post"])
+    def bulk_soft_delete(self, request):
+        """Custom endpoint: POST /api/contacts/bulk_soft_delete/ (body như bulk_favorite)"""
+        return self._bulk_update(request, "soft_delete")
+
+    @action(detail=False, methods=["post"])
+    def bulk_restore(self, request):
+        """
+        Custom endpoint: POST /api/contacts/bulk_restore/ (body như bulk_favorite)
+        filters không có is_active -> chỉ xét contact đã soft delete (is_active=false)
+        """
+        return self._bulk_update(request, "restore")
+
+    def _bulk_update(self, request, operation):
+        """
+        Một câu UPDATE cho cả danh sách (xem ContactQuerySet.set_flag), chỉ dòng đổi trạng
+        thái mới được ghi và tăng updated_at.
+        """
+        serializer = BulkContactSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if "filters" in data:
+            filters = dict(data["filters"])
+            if operation == "restore":
+                filters.setdefault("is_active", "false")
+            contacts, requested = filtered_contacts(filters), None
+        else:
+            ids = list(dict.fromkeys(data["contact_ids"]))
+            manager = Contact.all_objects if operation == "restore" else Contact.objects
+            contacts, requested = manager.filter(pk__any=ids), len(ids)
+
+        matched, updated = getattr(contacts, operation)()
+        return Response(bulk_summary(requested, matched, updated, "updated"))
+
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
+    def import_contacts(self, request):
+        """
+        Custom endpoint: POST /api/contacts/import/
+        Form-data: file=<contacts.csv | .jsonl | .vcf>, format=csv|jsonl|vcf (tùy chọn)
+        Upsert theo email (contact đã soft delete được khôi phục), trả về số dòng tạo
+        mới/cập nhật và lỗi theo từng dòng
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "Thiếu file import"}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get("format") or detect_format(upload.name)
+        try:
+            importer = ContactImporter(file_format)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload.open("rb")
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            result = importer.run(stream)
+        except UnicodeDecodeError:
+            return Response({"error": ENCODING_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict())
+
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[CSVExportRenderer, NDJSONExportRenderer, VCardExportRenderer],
+    )
+    def export(self, request):
+        """
+        Custom endpoint: GET /api/contacts/export/?format=csv|ndjson|vcf&gzip=1
+        Cùng filter/search/ordering với danh sách, không phân trang: stream từng lô
+        qua server-side cursor nên bộ nhớ và thời gian tới byte đầu không phụ thuộc số contact
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        use_gzip = request.query_params.get("gzip") in ("1", "true")
+
+        content = (
+            chunk.encode(renderer.charset)
+            for chunk in renderer.stream(export_rows(queryset, chunk_size=self.export_chunk_size))
+        )
+        if use_gzip:
+            content = compress_sequence(content)
+
+        response = StreamingHttpResponse(
+            content, content_type=f"{renderer.media_type}; charset={renderer.charset}"
+        )
+        response["Content-Disposition"] = f'attachment; filename="contacts.{renderer.format}"'
+        if use_gzip:
+            response["Content-Encoding"] = "gzip"
+        return response
+
     @action(detail=True, methods=["get"])
+    @cache_response(timeout=300, depends_on=[Contact, ContactGroupMembership, ContactGroup])
     def groups(self, request, pk=None):
         """
         Custom endpoint: GET /api/contacts/{id}/groups/
         Lấy danh sách groups của contact
         """
         contact = self.get_object()
-        groups = contact.groups.all()
-        serializer = ContactGroupSerializer(groups, many=True)
-        return Response(serializer.data)
+        return self.list_response(contact.groups.all())
+
+
+def group_members_queryset(request, group):
+    """
+    Contact thuộc group, lọc/tìm kiếm như /api/contacts/, kèm role/joined_at của membership.
+    role/joined_at dùng chung JOIN với điều kiện group_id -> đi theo idx_membership_group_joined.
+    """
+    queryset = (
+        contact_list_queryset(request)
+        .filter(memberships__group=group)
+        .annotate(role=F("memberships__role"), joined_at=F("memberships__joined_at"))
+    )
+    ordering = request.query_params.get(api_settings.ORDERING_PARAM)
+    if ordering in MEMBER_ORDERINGS:
+        queryset = queryset.order_by(ordering)
+    elif not ordering and not request.query_params.get(api_settings.SEARCH_PARAM):
+        queryset = queryset.order_by("-joined_at")
+    return queryset
+
 
+def member_serializer_class(request):
+    """?include=membership -> thêm role, joined_at của từng member."""
+    include = request.query_params.get("include", "").split(",")
+    return GroupMemberSerializer if "membership" in include else ContactListSerializer
 
-class ContactGroupMembershipViewSet(viewsets.ModelViewSet):
+
+def contact_list_queryset(request):
+    """Queryset Contact đã qua filter/search/ordering của ContactViewSet cho request này."""
+    # sparse_fieldsets=False: ?fields= là của endpoint gọi hàm này (members...), không phải list
+    view = ContactViewSet(
+        request=request,
+        action="list",
+        format_kwarg=None,
+        args=(),
+        kwargs={},
+        sparse_fieldsets=False,
+    )
+    return view.filter_queryset(view.get_queryset())
+
+
+def filtered_contacts(filters):
+    """
+    Queryset Contact giống GET /api/contacts/?<filters>: ContactFilter rồi ContactSearchFilter
+    trên các tham số lọc (không sắp xếp).
+    """
+    allowed = set(ContactFilter.base_filters) | {api_settings.SEARCH_PARAM}
+    unknown = set(filters) - allowed
+    if unknown:
+        raise ValidationError(
+            {
+                "filters": f"Không hỗ trợ: {', '.join(sorted(unknown))} (chỉ: {', '.join(sorted(allowed))})"
+            }
+        )
+
+    query_params = QueryDict(mutable=True)
+    query_params.update(filters)
+    # Như ContactViewSet.get_queryset: lọc theo is_active thì xét cả contact đã soft delete
+    manager = Contact.all_objects if "is_active" in query_params else Contact.objects
+    filterset = ContactFilter(query_params, queryset=manager.all())
+    if not filterset.is_valid():
+        raise ValidationError({"filters": filterset.errors})
+
+    terms = search_smart_split(query_params.get(api_settings.SEARCH_PARAM, ""))
+    return ContactSearchFilter().search(filterset.qs, terms, keep_ordering=True)
+
+
+class ContactGroupMembershipViewSet(ServerTimingMixin, ExpandMixin, viewsets.ModelViewSet):
     queryset = ContactGroupMembership.objects.all()
     serializer_class = ContactGroupMembershipSerializer
     permission_classes = [AllowAny]
@@ -166,6 +544,20 @@ class ContactGroupMembershipViewSet(viewsets.ModelViewSet):
     filterset_fields = ["contact", "group"]
     ordering_fields = ["joined_at"]
     ordering = ["-joined_at"]
+    # ?expand=contact,group: object thay cho id, JOIN trong cùng query
+    expandable = {
+        "contact": Expansion(
+            lambda: ContactListSerializer(read_only=True), select_related="contact"
+        ),
+        "group": Expansion(lambda: ContactGroupSerializer(read_only=True), select_related="group"),
+    }
 
     def get_queryset(self):
-        return super().get_queryset().select_related("contact", "group")
+        # contact_name/group_name đọc qua quan hệ -> chỉ JOIN khi response có các field này
+        related = [
+            relation
+            for relation, field in (("contact", "contact_name"), ("group", "group_name"))
+            if self.fieldset_needs(field)
+        ]
+        queryset = super().get_queryset()
+        return queryset.select_related(*related) if related else queryset